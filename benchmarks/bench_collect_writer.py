@@ -0,0 +1,109 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark du coût par exécution de l'écriture d'un lot de collecte en
+fonction de la taille de l'historique brut.
+
+Pour chaque taille (--rows lignes déjà présentes dans le stock, générées par
+synthetic.py), on mesure sur --runs exécutions (médiane) :
+  - shell : ancien chemin de collect.sh, ajout 'printf >>' puis 'wc -l' et
+    'head | awk' pour le résumé, et 'wc -l' pour le manifeste ;
+  - writer : src/collect_writer.py en sous-processus (démarrage de
+    l'interpréteur compris), ajout + fsync et résumé lu dans les compteurs ;
+  - writer (in-process) : collect_writer.append_batch seul.
+La première exécution de l'écrivain (reconstruction des compteurs par
+relecture, une seule fois par fichier) est mesurée à part.
+
+Usage :
+    python benchmarks/bench_collect_writer.py [--rows 10000 1000000 10000000]
+                                              [--runs 5] [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import collect_writer  # noqa: E402
+import synthetic  # noqa: E402
+
+WRITER = ROOT / "src" / "collect_writer.py"
+# Ancien chemin de append_batch + publish_manifest (collect.sh)
+SHELL_RUN = """
+printf '%s' "$BATCH" >> "$1"
+n_lines="$(wc -l < "$1" | tr -d ' ')"
+n_cols="$(head -n1 "$1" | awk -F',' '{print NF}')"
+n_lines_manifest="$(wc -l < "$1" | tr -d ' ')"
+echo "$n_lines $n_cols $n_lines_manifest"
+"""
+
+
+def batch_bytes(run: int) -> bytes:
+    ts = f"2030-01-01T00:{run // 6:02d}:{run % 6 * 10:02d}Z"
+    return "".join(f"{ts},{m},{run % 25}\n" for m in synthetic.GPU_MODELS).encode()
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_size(n_rows: int, runs: int, workdir: Path) -> dict:
+    store = workdir / "sales_store.csv"
+    synthetic.write_long_csv(synthetic.make_long(n_rows), store)
+
+    shell = []
+    for run in range(runs):
+        batch = batch_bytes(run).decode()
+        shell.append(timed(lambda: subprocess.run(
+            ["bash", "-c", SHELL_RUN, "bench", str(store)], env={"BATCH": batch},
+            check=True, capture_output=True)))
+
+    def writer(run: int) -> None:
+        subprocess.run([sys.executable, str(WRITER), str(store)], input=batch_bytes(run),
+                       check=True, capture_output=True)
+
+    rebuild = timed(lambda: writer(runs))
+    process = [timed(lambda: writer(runs + 1 + run)) for run in range(runs)]
+    in_process = [timed(lambda: collect_writer.append_batch(store, batch_bytes(2 * runs + 1 + run)))
+                  for run in range(runs)]
+    return {"rows": n_rows, "store_mib": store.stat().st_size / 2 ** 20,
+            "shell_s": statistics.median(shell), "writer_rebuild_s": rebuild,
+            "writer_s": statistics.median(process),
+            "writer_in_process_s": statistics.median(in_process)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Coût par exécution de l'écriture des lots.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'rows':>10} {'MiB':>8} {'shell (ms)':>11} {'writer (ms)':>12} "
+          f"{'in-process (ms)':>16} {'rebuild (ms)':>13}")
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            r = bench_size(n_rows, args.runs, Path(tmp))
+        results.append(r)
+        print(f"{n_rows:>10} {r['store_mib']:>8.1f} {r['shell_s'] * 1e3:>11.1f} "
+              f"{r['writer_s'] * 1e3:>12.1f} {r['writer_in_process_s'] * 1e3:>16.2f} "
+              f"{r['writer_rebuild_s'] * 1e3:>13.0f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark de la génération des variables temporelles (src/features.py).
+
+Pour chaque taille de table large (lignes prétraitées, une par minute), mesure
+le temps de features.time_features (décalages, moyennes glissantes,
+calendrier) et le temps par ligne. Le calcul étant vectorisé, le temps par
+ligne doit rester à peu près constant : code retour 1 si le temps par ligne de
+la plus grande taille dépasse --tolerance fois celui de la plus petite taille
+mesurée au-delà de 100k lignes (coûts fixes exclus).
+
+Usage :
+    python benchmarks/bench_features.py [--rows 100000 1000000 5000000]
+                                        [--models 5] [--repeat 3]
+                                        [--tolerance 2.0] [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import features  # noqa: E402
+
+
+def make_wide(n_rows: int, n_models: int, seed: int = 42) -> tuple[pd.DataFrame, pd.DatetimeIndex]:
+    rng = np.random.default_rng(seed)
+    wide = pd.DataFrame(rng.integers(0, 50, (n_rows, n_models)).astype(np.int64),
+                        columns=[f"gpu{i}" for i in range(n_models)])
+    timestamps = pd.date_range("2025-01-01", periods=n_rows, freq="min", tz="UTC")
+    return wide, timestamps
+
+
+def bench_size(n_rows: int, n_models: int, repeat: int) -> dict:
+    wide, timestamps = make_wide(n_rows, n_models)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        feats = features.time_features(wide, timestamps)
+        times.append(time.perf_counter() - start)
+    seconds = statistics.median(times)
+    return {"rows": n_rows, "models": n_models, "features": feats.shape[1],
+            "seconds": seconds, "us_per_row": seconds / n_rows * 1e6,
+            "feature_mib": feats.memory_usage(index=False).sum() / 2**20}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark des variables temporelles.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="Facteur toléré sur le temps par ligne (défaut: 2.0).")
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'rows':>10} {'features':>9} {'time (s)':>10} {'us/row':>8} {'MiB':>8}")
+    for n_rows in sorted(args.rows):
+        r = bench_size(n_rows, args.models, args.repeat)
+        results.append(r)
+        print(f"{r['rows']:>10} {r['features']:>9} {r['seconds']:>10.4f} "
+              f"{r['us_per_row']:>8.3f} {r['feature_mib']:>8.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    scaled = [r for r in results if r["rows"] >= 100_000]
+    if len(scaled) >= 2:
+        ratio = scaled[-1]["us_per_row"] / scaled[0]["us_per_row"]
+        print(f"\nTemps par ligne {scaled[-1]['rows']} / {scaled[0]['rows']} : x{ratio:.2f}")
+        if ratio > args.tolerance:
+            print(f"RÉGRESSION : croissance non linéaire (x{ratio:.2f} > {args.tolerance})")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
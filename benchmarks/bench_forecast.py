@@ -0,0 +1,125 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark des prévisions multi-pas (src/forecast.py).
+
+Pour chaque nombre de colonnes GPU de la table large (--columns, 20 et 100
+par défaut), un petit XGBRegressor par colonne est entraîné sur l'agencement
+de train.py (autres colonnes + variables temporelles) à partir d'un
+historique synthétique. Pour chaque nombre de séries (--series, historiques
+indépendants dérivés de celui-ci, 1, 100 et 1000 par défaut),
+forecast.forecast_batch prévoit toutes les colonnes de toutes les séries sur
+--horizon pas. On mesure le temps, le nombre d'appels à predict (qui ne
+dépend pas du nombre de séries) et le débit (séries x colonnes x pas par
+seconde).
+
+Référence : la boucle ad hoc qu'elle remplace (à chaque pas, variables
+recalculées par pandas sur l'historique prolongé puis model.predict d'un
+DataFrame d'une ligne, modèle par modèle, série par série), mesurée sur
+--baseline-steps pas d'une série puis extrapolée à l'horizon et aux séries.
+
+Usage :
+    python benchmarks/bench_forecast.py [--columns 20 100] [--series 1 100 1000]
+                                        [--horizon 60] [--rows 500]
+                                        [--baseline-steps 3] [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from xgboost import XGBRegressor
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import forecast  # noqa: E402
+import synthetic  # noqa: E402
+import train  # noqa: E402
+
+
+def make_models(n_series: int, n_rows: int, seed: int = 42
+                ) -> tuple[pd.DataFrame, pd.DatetimeIndex, dict[str, XGBRegressor]]:
+    rng = np.random.default_rng(seed)
+    columns = synthetic.model_names(n_series)
+    history = pd.DataFrame(rng.integers(0, 25, (n_rows, n_series)), columns=columns)
+    timestamps = pd.date_range("2025-01-01", periods=n_rows, freq="min", tz="UTC")
+    feats = train.time_features(history, timestamps)
+    models = {}
+    for target in columns:
+        X, y = train.infer_X_y(history, target=target, extra=feats)
+        models[target] = XGBRegressor(n_estimators=20, max_depth=4, tree_method="hist",
+                                      n_jobs=1).fit(X.to_numpy(), y.to_numpy())
+        models[target].get_booster().feature_names = list(X.columns)
+    return history, timestamps, models
+
+
+def adhoc_loop(history: pd.DataFrame, timestamps: pd.DatetimeIndex,
+               models: dict[str, XGBRegressor], steps: int) -> float:
+    """
+    Boucle naïve : variables pandas sur tout l'historique et un predict
+    d'un DataFrame d'une ligne par modèle et par pas.
+    """
+    hist, ts = history.astype(np.float32), timestamps
+    start = time.perf_counter()
+    for _ in range(steps):
+        hist = pd.concat([hist, hist.iloc[[-1]]], ignore_index=True)
+        ts = ts.append(pd.DatetimeIndex([ts[-1] + pd.Timedelta(minutes=1)]))
+        feats = train.time_features(hist, ts)
+        for target, model in models.items():
+            X, _ = train.infer_X_y(hist.iloc[[-1]], target=target, extra=feats.iloc[[-1]])
+            hist.loc[hist.index[-1], target] = max(float(model.predict(X)[0]), 0.0)
+    return time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark des prévisions multi-pas.")
+    parser.add_argument("--columns", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--series", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--horizon", type=int, default=60)
+    parser.add_argument("--rows", type=int, default=500, help="Lignes d'historique.")
+    parser.add_argument("--baseline-steps", type=int, default=3)
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'columns':>8} {'series':>7} {'steps':>6} {'calls':>7} {'time (s)':>9} "
+          f"{'values/s':>11} {'ad hoc (s, extrap.)':>20} {'speedup':>8}")
+    for n_cols in args.columns:
+        history, timestamps, models = make_models(n_cols, args.rows)
+        boosters = {t: m.get_booster() for t, m in models.items()}
+        tail = history.iloc[-forecast.CONTEXT_ROWS:].reset_index(drop=True)
+        future = forecast.future_timestamps(timestamps, args.horizon)
+        adhoc_one = adhoc_loop(history, timestamps, models, args.baseline_steps)
+        adhoc_one *= args.horizon / args.baseline_steps
+
+        rng = np.random.default_rng(0)
+        for n_series in args.series:
+            # Séries indépendantes : historique décalé d'un bruit entier par série
+            histories = [tail + int(k) for k in rng.integers(0, 5, n_series)]
+            start = time.perf_counter()
+            values, n_calls = forecast.forecast_batch(histories, boosters, args.horizon,
+                                                      [future] * n_series)
+            seconds = time.perf_counter() - start
+
+            adhoc = adhoc_one * n_series
+            r = {"columns": n_cols, "series": n_series, "horizon": args.horizon,
+                 "predict_calls": n_calls, "seconds": seconds,
+                 "throughput": n_series * n_cols * args.horizon / seconds,
+                 "adhoc_seconds_extrapolated": adhoc, "speedup": adhoc / seconds,
+                 "finite": bool(np.isfinite(values).all())}
+            results.append(r)
+            print(f"{n_cols:>8} {n_series:>7} {args.horizon:>6} {n_calls:>7} {seconds:>9.3f} "
+                  f"{r['throughput']:>11.0f} {adhoc:>20.2f} {r['speedup']:>8.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0 if all(r["finite"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark des formats d'artefacts de modèles (src/artifacts.py).
+
+Un XGBRegressor est entraîné par taille de modèle (nombre d'arbres, 100 et
+1000 par défaut) sur une table large synthétique, puis écrit dans chaque
+format : pickle joblib (historique, avec ou sans compression zlib), UBJSON et
+JSON natifs XGBoost (avec ou sans gzip). On mesure le temps d'écriture, le
+meilleur temps de chargement (artifacts.load_model) sur plusieurs répétitions,
+la taille sur disque, et on vérifie que les prédictions sont identiques.
+
+Usage :
+    python benchmarks/bench_model_formats.py [--trees 100 1000] [--rows 100000]
+                                             [--repeat 5] [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from xgboost import XGBRegressor
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import artifacts  # noqa: E402
+
+MODELS = ["rtx3060", "rtx3070", "rtx3080", "rtx3090", "rx6700"]
+VARIANTS = [("pkl", 0), ("pkl", 3), ("ubj", 0), ("ubj", 6), ("json", 0), ("json", 6)]
+
+
+def make_model(n_trees: int, n_rows: int, seed: int = 42) -> tuple[object, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({m: rng.integers(0, 25, size=n_rows) for m in MODELS[1:]})
+    y = X.sum(axis=1) + rng.normal(0, 1, n_rows)
+    model = XGBRegressor(n_estimators=n_trees, max_depth=6, n_jobs=-1).fit(X, y)
+    return model, X
+
+
+def bench_variant(model: object, X: pd.DataFrame, fmt: str, compress: int,
+                  workdir: Path, repeat: int) -> dict:
+    path = workdir / f"model_bench{artifacts.artifact_suffix(fmt, compress)}"
+
+    start = time.perf_counter()
+    artifacts.dump_model(model, path, compress)
+    write_s = time.perf_counter() - start
+
+    load_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = artifacts.load_model(path)
+        load_times.append(time.perf_counter() - start)
+
+    sample = X.iloc[:1000]
+    return {
+        "format": fmt,
+        "compress": compress,
+        "write_s": write_s,
+        "load_s": min(load_times),
+        "size_bytes": path.stat().st_size,
+        "same_predictions": bool(np.allclose(loaded.predict(sample),  # type: ignore
+                                             model.predict(sample), rtol=1e-6)),  # type: ignore
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pickle vs UBJSON vs JSON.")
+    parser.add_argument("--trees", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'trees':>6} {'format':>8} {'gz':>3} {'write (s)':>10} {'load (s)':>10} "
+          f"{'size (KiB)':>11} {'same':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_trees in args.trees:
+            model, X = make_model(n_trees, args.rows)
+            for fmt, compress in VARIANTS:
+                r = {"trees": n_trees, **bench_variant(model, X, fmt, compress, Path(tmp),
+                                                       args.repeat)}
+                results.append(r)
+                print(f"{n_trees:>6} {fmt:>8} {compress:>3} {r['write_s']:>10.4f} "
+                      f"{r['load_s']:>10.4f} {r['size_bytes'] / 1024:>11.1f} "
+                      f"{str(r['same_predictions']):>5}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0 if all(r["same_predictions"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,242 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark du pipeline complet (collecte -> prétraitement -> entraînement) sur
+des données brutes synthétiques (benchmarks/synthetic.py).
+
+Pour chaque taille (1k, 100k, 1M et 10M lignes brutes par défaut), chaque étape
+est chronométrée et son empreinte mémoire relevée :
+  collect_write   écriture du CSV brut (coût disque de la collecte ; la partie
+                  réseau de collect.sh est hors périmètre)
+  read_raw        pd.read_csv du CSV brut
+  clean           preprocessed._clean_dataframe
+  save_processed  preprocessed._save_processed (--format)
+  load_processed  train.load_processed
+  infer_X_y       train.infer_X_y
+  train_and_eval  train.train_and_eval
+  save_model      train.save_model
+
+Mémoire : 'rss_peak_mib' est le pic de RSS du processus pendant l'étape
+(échantillonné, inclut les allocations natives d'XGBoost) ; avec --tracemalloc,
+'py_peak_mib' est le pic des allocations Python/NumPy de l'étape, mesuré lors
+d'une seconde exécution (tracemalloc multiplie le temps de to_csv par ~10).
+
+Les résultats (métadonnées : commit git, versions, CPU) sont écrits en JSON
+dans benchmarks/results/ ; --baseline compare à un fichier précédent.
+
+Usage :
+    python benchmarks/bench_pipeline.py [--rows 1000 100000 1000000 10000000]
+                                        [--models 5] [--dup-rate 0.01]
+                                        [--nan-rate 0.01] [--neg-rate 0.01]
+                                        [--format csv] [--tracemalloc]
+                                        [--json out.json]
+                                        [--baseline previous.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import xgboost
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import preprocessed  # noqa: E402
+import synthetic  # noqa: E402
+import train  # noqa: E402
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+MIB = 2 ** 20
+
+
+class RssSampler:
+    """
+    Pic de RSS du processus pendant un bloc 'with' (lecture de /proc/self/statm
+    toutes les 'interval' secondes) ; None hors Linux.
+    """
+
+    PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.peak: int | None = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def rss(cls) -> int | None:
+        try:
+            with open("/proc/self/statm", encoding="ascii") as f:
+                return int(f.read().split()[1]) * cls.PAGE
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        rss = self.rss()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+    def __enter__(self) -> "RssSampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def run_stage(name: str, trace: bool, func, *args):
+    """
+    Exécute une étape ; renvoie (résultat, mesures). Avec 'trace', l'étape est
+    rejouée sous tracemalloc pour le pic Python (le traçage fausserait le temps).
+    """
+    rss_before = RssSampler.rss()
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+
+    py_peak = None
+    if trace:
+        tracemalloc.start()
+        func(*args)
+        py_peak = tracemalloc.get_traced_memory()[1] / MIB
+        tracemalloc.stop()
+
+    return result, {
+        "stage": name,
+        "seconds": seconds,
+        "py_peak_mib": py_peak,
+        "rss_peak_mib": sampler.peak / MIB if sampler.peak is not None else None,
+        "rss_delta_mib": ((sampler.peak - rss_before) / MIB
+                          if sampler.peak is not None and rss_before is not None else None),
+    }
+
+
+def bench_size(n_rows: int, args: argparse.Namespace, workdir: Path) -> list[dict]:
+    raw = synthetic.make_long(n_rows, args.models, args.dup_rate, args.nan_rate,
+                              args.neg_rate, args.seed)
+    raw_csv = workdir / f"sales_bench_{n_rows}.csv"
+    suffix = preprocessed.PROCESSED_FORMATS[args.format]
+    processed = workdir / f"sales_processed_bench_{n_rows}{suffix}"
+    train.MODEL_DIR = workdir / f"model_{n_rows}"
+
+    stages = []
+
+    def stage(name: str, func, *stage_args):
+        result, measures = run_stage(name, args.tracemalloc, func, *stage_args)
+        stages.append(measures)
+        return result
+
+    stage("collect_write", synthetic.write_long_csv, raw, raw_csv)
+    del raw
+    df = stage("read_raw", pd.read_csv, raw_csv)
+    wide = stage("clean", preprocessed._clean_dataframe, df)
+    del df
+    stage("save_processed", preprocessed._save_processed, wide, processed, args.format)
+    del wide
+    wide = stage("load_processed", train.load_processed, processed)
+    X, y = stage("infer_X_y", train.infer_X_y, wide)
+    model, _ = stage("train_and_eval", train.train_and_eval, X, y)
+    stage("save_model", train.save_model, model, train.MODEL_DIR / "model.pkl")
+
+    sizes = {"raw_bytes": raw_csv.stat().st_size, "processed_bytes": processed.stat().st_size,
+             "wide_rows": len(wide), "wide_cols": wide.shape[1]}
+    for m in stages:
+        m.update({"rows": n_rows, **sizes})
+    return stages
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: list[dict], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    ref = {(r["rows"], r["stage"]): r for r in baseline["results"]}
+    print(f"\nComparaison avec {baseline_path} (commit {baseline['meta'].get('commit')}) :")
+    print(f"{'rows':>10} {'stage':<16} {'ref (s)':>10} {'now (s)':>10} {'ratio':>7}")
+    for r in results:
+        old = ref.get((r["rows"], r["stage"]))
+        if old is None or not old["seconds"]:
+            continue
+        print(f"{r['rows']:>10} {r['stage']:<16} {old['seconds']:>10.4f} "
+              f"{r['seconds']:>10.4f} {r['seconds'] / old['seconds']:>7.2f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark des étapes du pipeline.")
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--dup-rate", type=float, default=0.01)
+    parser.add_argument("--nan-rate", type=float, default=0.01)
+    parser.add_argument("--neg-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", default="csv", choices=sorted(preprocessed.PROCESSED_FORMATS))
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Rejoue chaque étape sous tracemalloc (pic Python).")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Fichier JSON de sortie "
+                             "(défaut: benchmarks/results/pipeline_<commit>_<date>.json).")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Résultats JSON précédents à comparer.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'rows':>10} {'stage':<16} {'time (s)':>10} {'py peak MiB':>12} {'rss peak MiB':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            for m in bench_size(n_rows, args, Path(tmp)):
+                results.append(m)
+                py = f"{m['py_peak_mib']:.1f}" if m["py_peak_mib"] is not None else "-"
+                rss = f"{m['rss_peak_mib']:.1f}" if m["rss_peak_mib"] is not None else "-"
+                print(f"{m['rows']:>10} {m['stage']:<16} {m['seconds']:>10.4f} {py:>12} {rss:>13}")
+
+    commit = git_commit()
+    meta = {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "xgboost": xgboost.__version__,
+        "cpu_count": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+    }
+    if args.json:
+        out = Path(args.json)
+    else:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        out = RESULTS_DIR / f"pipeline_{commit or 'nogit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.write_text(json.dumps({"meta": meta, "results": results}, indent=2), encoding="utf-8")
+    print(f"\nRésultats écrits dans {out}")
+
+    if args.baseline:
+        print_comparison(results, Path(args.baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark de passage à l'échelle de preprocessed.py --workers.
+
+Un CSV brut synthétique (--rows lignes, une mesure par minute et par modèle,
+avec doublons, NaN et négatifs) est lu une fois, puis le nettoyage + pivot
+est mesuré :
+  - en mono-processus (_pivot_wide(_aggregate_long(df)), référence) ;
+  - en mode partitionné (_clean_partitioned) pour chaque valeur de --workers
+    (partitions --partition-freq, un jour par défaut).
+
+Pour chaque configuration : temps, accélération et efficacité (accélération
+/ processus) par rapport à la référence, et égalité exacte avec la table
+mono-processus. Le nombre de cœurs utilisables est affiché : au-delà, les
+processus se partagent les mêmes cœurs et l'accélération plafonne.
+
+Usage :
+    python benchmarks/bench_preprocess_workers.py [--rows 2000000]
+                                                  [--workers 1 2 4 8]
+                                                  [--partition-freq D]
+                                                  [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import preprocessed  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def usable_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Passage à l'échelle de --workers.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--partition-freq", type=str, default="D")
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = synthetic.write_long_csv(
+            synthetic.make_long(args.rows, dup_rate=0.01, nan_rate=0.01, neg_rate=0.01),
+            Path(tmp) / "raw.csv")
+        df = pd.read_csv(raw)
+
+    start = time.perf_counter()
+    reference = preprocessed._pivot_wide(preprocessed._aggregate_long(df))
+    baseline = time.perf_counter() - start
+
+    cores = usable_cores()
+    print(f"{args.rows} lignes brutes -> {len(reference)} lignes, {cores} cœur(s) utilisable(s)")
+    print(f"{'workers':>8} {'partitions':>11} {'time (s)':>9} {'speedup':>8} "
+          f"{'efficiency':>11} {'identical':>10}")
+    print(f"{'single':>8} {'-':>11} {baseline:>9.2f} {1.0:>8.2f} {1.0:>11.2f} {'-':>10}")
+    results = [{"workers": 0, "seconds": baseline, "rows": args.rows, "cores": cores}]
+    for workers in args.workers:
+        start = time.perf_counter()
+        wide, n_parts = preprocessed._clean_partitioned(df, workers, args.partition_freq)
+        seconds = time.perf_counter() - start
+        identical = wide.equals(reference)
+        r = {"workers": workers, "partitions": n_parts, "seconds": seconds,
+             "speedup": baseline / seconds, "efficiency": baseline / seconds / workers,
+             "identical": identical, "rows": args.rows, "cores": cores}
+        results.append(r)
+        print(f"{workers:>8} {n_parts:>11} {seconds:>9.2f} {r['speedup']:>8.2f} "
+              f"{r['efficiency']:>11.2f} {str(identical):>10}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0 if all(r.get("identical", True) for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
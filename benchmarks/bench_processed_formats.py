@@ -0,0 +1,93 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark du chargement des fichiers prétraités selon leur format.
+
+Pour chaque taille (10k, 1M et 10M lignes par défaut), une table large
+synthétique (une colonne int64 par modèle GPU) est écrite en CSV, Parquet et
+Feather via preprocessed._save_processed, puis rechargée avec
+train.load_processed. On mesure le temps d'écriture, le meilleur temps de
+chargement sur plusieurs répétitions et la taille sur disque, et on vérifie que
+les dtypes int64 sont restitués.
+
+Usage :
+    python benchmarks/bench_processed_formats.py [--rows 10000 1000000 10000000]
+                                                 [--repeat 3] [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import preprocessed  # noqa: E402
+import train  # noqa: E402
+
+MODELS = ["rtx3060", "rtx3070", "rtx3080", "rtx3090", "rx6700"]
+
+
+def make_wide(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {m: rng.integers(0, 25, size=n_rows, dtype=np.int64) for m in MODELS}
+    )
+
+
+def bench_format(df: pd.DataFrame, fmt: str, workdir: Path, repeat: int) -> dict:
+    path = workdir / f"sales_processed_bench{preprocessed.PROCESSED_FORMATS[fmt]}"
+
+    start = time.perf_counter()
+    preprocessed._save_processed(df, path, fmt)
+    write_s = time.perf_counter() - start
+
+    load_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = train.load_processed(path)
+        load_times.append(time.perf_counter() - start)
+
+    return {
+        "format": fmt,
+        "rows": len(df),
+        "write_s": write_s,
+        "load_s": min(load_times),
+        "size_bytes": path.stat().st_size,
+        "int64_preserved": bool((loaded.dtypes == "int64").all()),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs Parquet vs Feather.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--formats", nargs="+", default=sorted(preprocessed.PROCESSED_FORMATS),
+                        choices=sorted(preprocessed.PROCESSED_FORMATS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'rows':>10} {'format':>8} {'write (s)':>10} {'load (s)':>10} "
+          f"{'size (MiB)':>11} {'int64':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            df = make_wide(n_rows)
+            for fmt in args.formats:
+                res = bench_format(df, fmt, Path(tmp), args.repeat)
+                results.append(res)
+                print(f"{res['rows']:>10} {fmt:>8} {res['write_s']:>10.4f} {res['load_s']:>10.4f} "
+                      f"{res['size_bytes'] / 2**20:>11.2f} {str(res['int64_preserved']):>6}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
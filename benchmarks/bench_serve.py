@@ -0,0 +1,129 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark latence / débit du service de prédiction (src/serve.py).
+
+Le service est démarré dans le processus (port éphémère) sur le dernier
+modèle de 'model/'. Des clients concurrents (connexions HTTP keep-alive)
+envoient chacun --requests requêtes de --rows lignes. On mesure les
+percentiles de latence et le débit, avec et sans micro-batching, et on les
+compare au chemin « à froid » (joblib.load + predict à chaque appel).
+
+Usage :
+    python benchmarks/bench_serve.py [--clients 16] [--requests 200] [--rows 1]
+                                     [--model-dir model] [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import serve  # noqa: E402
+
+
+def run_clients(port: int, n_features: int, clients: int, requests: int, rows: int) -> dict:
+    rng = np.random.default_rng(0)
+    body = json.dumps({"instances": rng.integers(0, 25, (rows, n_features)).tolist()})
+
+    def client(_: int) -> list[float]:
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            assert resp.status == 200, resp.status
+            latencies.append(time.perf_counter() - start)
+        conn.close()
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = np.concatenate([np.asarray(lat) for lat in pool.map(client, range(clients))])
+    wall = time.perf_counter() - start
+    return {
+        "requests": int(latencies.size),
+        "wall_s": wall,
+        "throughput_rps": latencies.size / wall,
+        "rows_per_s": latencies.size * rows / wall,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+    }
+
+
+def bench_server(model_dir: Path, max_wait_ms: float, args: argparse.Namespace) -> dict:
+    holder = serve.ModelHolder(model_dir)
+    holder.reload_if_changed()
+    batcher = serve.MicroBatcher(holder, max_batch_rows=4096, max_wait_s=max_wait_ms / 1000)
+    server = serve.make_server(holder, batcher, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        port = server.server_address[1]  # type: ignore[attr-defined]
+        res = run_clients(port, len(holder.features), args.clients, args.requests, args.rows)
+    finally:
+        server.shutdown()
+        server.server_close()
+    res.update({"mode": f"serve (max_wait={max_wait_ms} ms)", "batches": batcher.n_batches})
+    return res
+
+
+def bench_cold(model_dir: Path, n_calls: int, rows: int) -> dict:
+    path = serve.find_latest_model(model_dir)
+    latencies = []
+    for _ in range(n_calls):
+        start = time.perf_counter()
+        model = joblib.load(path)
+        model.predict(np.ones((rows, model.n_features_in_), dtype=np.float32))
+        latencies.append(time.perf_counter() - start)
+    lat = np.asarray(latencies)
+    return {
+        "mode": "cold (joblib.load + predict)",
+        "requests": n_calls,
+        "throughput_rps": 1 / lat.mean(),
+        "p50_ms": float(np.percentile(lat, 50) * 1000),
+        "p95_ms": float(np.percentile(lat, 95) * 1000),
+        "p99_ms": float(np.percentile(lat, 99) * 1000),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark du service de prédiction.")
+    parser.add_argument("--model-dir", type=str, default=str(serve.MODEL_DIR))
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes par client.")
+    parser.add_argument("--rows", type=int, default=1, help="Lignes par requête.")
+    parser.add_argument("--cold-calls", type=int, default=5)
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+
+    model_dir = Path(args.model_dir)
+    results = [
+        bench_cold(model_dir, args.cold_calls, args.rows),
+        bench_server(model_dir, 0.0, args),
+        bench_server(model_dir, 2.0, args),
+    ]
+
+    print(f"{'mode':<32} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'batches':>8}")
+    for res in results:
+        print(f"{res['mode']:<32} {res['throughput_rps']:>10.1f} {res['p50_ms']:>9.2f} "
+              f"{res['p95_ms']:>9.2f} {res['p99_ms']:>9.2f} {res.get('batches', '-'):>8}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
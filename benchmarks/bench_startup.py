@@ -0,0 +1,131 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark du temps de démarrage des scripts Python du pipeline.
+
+1. 'python -X importtime' sur l'import de chaque module (train, preprocessed,
+   pipeline) : temps d'import cumulé et principaux paquets importés.
+2. Temps mural des chemins rapides de la CLI (--help, --check), médiane sur
+   --repeat exécutions.
+3. Garde-fous (code retour 1 en cas de régression) :
+   - aucun module lourd différé (xgboost, sklearn, joblib) ne doit être
+     importé par 'import train' ou 'import preprocessed' ;
+   - avec --baseline, aucune mesure ne doit dépasser --tolerance fois la
+     valeur de référence.
+
+Usage :
+    python benchmarks/bench_startup.py [--repeat 5] [--json out.json]
+                                       [--baseline previous.json] [--tolerance 1.5]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+
+MODULES = ["train", "preprocessed", "pipeline"]
+# Modules dont l'import doit rester différé (chargés au premier entraînement)
+DEFERRED = {"train": ["xgboost", "sklearn", "joblib"],
+            "preprocessed": ["xgboost", "sklearn", "joblib"]}
+COMMANDS = {
+    "train --help": ["src/train.py", "--help"],
+    "train --check": ["src/train.py", "--check"],
+    "preprocessed --help": ["src/preprocessed.py", "--help"],
+    "preprocessed --check": ["src/preprocessed.py", "--check"],
+}
+
+
+def import_profile(module: str) -> dict:
+    """
+    Import de 'module' sous -X importtime ; renvoie le temps cumulé (ms), les
+    paquets de premier niveau les plus coûteux et les modules chargés.
+    """
+    code = f"import sys; sys.path.insert(0, {str(SRC)!r}); import {module}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True, cwd=ROOT)
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        try:
+            cum_us = int(parts[1])
+        except ValueError:
+            continue  # entête "self [us] | cumulative | imported package"
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            top = name.strip().split(".")[0]
+            cumulative[top] = max(cumulative.get(top, 0), cum_us)
+    packages = sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)
+    return {
+        "module": module,
+        "import_ms": cumulative.get(module, 0) / 1000,
+        "top_packages_ms": {name: us / 1000 for name, us in packages[:8] if name != module},
+        "loaded": sorted(cumulative),
+    }
+
+
+def time_command(args: list[str], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage des scripts.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Résultats JSON de référence (régression si dépassement).")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Facteur toléré par rapport à la référence (défaut: 1.5).")
+    args = parser.parse_args(argv)
+
+    failures = []
+    results: dict = {"imports": {}, "commands_ms": {}}
+    print(f"{'import':<16} {'ms':>9}  principaux paquets")
+    for module in MODULES:
+        prof = import_profile(module)
+        results["imports"][module] = prof
+        top = ", ".join(f"{n} {ms:.0f}" for n, ms in list(prof["top_packages_ms"].items())[:4])
+        print(f"{module:<16} {prof['import_ms']:>9.1f}  {top}")
+        leaked = [m for m in DEFERRED.get(module, []) if m in prof["loaded"]]
+        if leaked:
+            failures.append(f"'import {module}' charge des modules différés : {leaked}")
+
+    print(f"\n{'commande':<24} {'ms (médiane)':>13}")
+    for name, cmd in COMMANDS.items():
+        ms = time_command(cmd, args.repeat)
+        results["commands_ms"][name] = ms
+        print(f"{name:<24} {ms:>13.1f}")
+
+    if args.baseline:
+        ref = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        measures = {f"import {m}": r["import_ms"] for m, r in results["imports"].items()}
+        measures.update(results["commands_ms"])
+        ref_measures = {f"import {m}": r["import_ms"] for m, r in ref["imports"].items()}
+        ref_measures.update(ref["commands_ms"])
+        for name, value in measures.items():
+            old = ref_measures.get(name)
+            if old and value > args.tolerance * old:
+                failures.append(f"{name} : {value:.1f} ms > {args.tolerance} x {old:.1f} ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    for failure in failures:
+        print(f"RÉGRESSION : {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+"""
+-------------------------------------------------------------------------------
+Benchmark mémoire de train.py (pic de RSS d'un entraînement complet).
+
+Une table prétraitée large synthétique (--rows lignes, une par minute, avec
+son fichier annexe '.ts') est écrite dans un dossier temporaire, puis
+'train.main(["--processed-dir", ..., "--no-cache"])' est exécuté dans un
+processus neuf par taille : le pic de RSS du processus (ru_maxrss) ne mesure
+alors que cet entraînement. Le pic de RSS à la fin de chaque étape est lu
+dans le fichier de métriques (PIPELINE_METRICS_FILE) du processus, et le
+débit (lignes par seconde) du temps total de train.main.
+
+--external-memory mesure l'entraînement hors mémoire (lots de --batch-rows
+lignes) : le pic de RSS doit rester à peu près constant quand --rows croît.
+
+--src permet de mesurer une autre version de src/ (par exemple une copie
+extraite d'un commit antérieur avec 'git worktree add') pour comparer avant
+et après une modification.
+
+Usage :
+    python benchmarks/bench_train_memory.py [--rows 1000000 4000000]
+                                            [--external-memory] [--batch-rows 250000]
+                                            [--src autre/src] [--json out.json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+MODELS = ["rtx3060", "rtx3070", "rtx3080", "rtx3090", "rx6700"]
+START = 1_735_689_600  # 2025-01-01T00:00:00Z
+
+# Exécuté dans le processus fils : dossiers de train.py redirigés vers le
+# dossier temporaire, puis pic de RSS (ru_maxrss, Kio sous Linux) en JSON
+CHILD = """
+import json, resource, sys, time
+from pathlib import Path
+src, workdir, extra = sys.argv[1], Path(sys.argv[2]), sys.argv[3:]
+sys.path.insert(0, src)
+import train
+train.MODEL_DIR = workdir / "model"
+train.TRAIN_STATE = train.MODEL_DIR / ".train_state.json"
+train.TRAIN_CACHE = train.MODEL_DIR / ".train_cache.json"
+train.LOGS_DIR = workdir
+train.TRAIN_LOG = workdir / "train.logs"
+start = time.perf_counter()
+code = train.main(["--processed-dir", str(workdir / "processed"), "--no-cache", *extra])
+print(json.dumps({"code": code, "seconds": time.perf_counter() - start,
+                  "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def write_processed(n_rows: int, proc_dir: Path, seed: int = 42) -> Path:
+    rng = np.random.default_rng(seed)
+    proc_dir.mkdir(parents=True, exist_ok=True)
+    out = proc_dir / "sales_processed_bench.csv"
+    wide = pd.DataFrame({m: rng.integers(0, 25, size=n_rows) for m in MODELS})
+    wide.to_csv(out, index=False)
+    ts = START + 60 * np.arange(n_rows, dtype=np.int64)
+    np.savetxt(out.with_name(out.name + ".ts"), ts, fmt="%d")
+    return out
+
+
+def bench_size(n_rows: int, src: Path, workdir: Path, extra: list[str]) -> dict:
+    # Données générées dans un processus à part : ru_maxrss est hérité à la
+    # création du fils, le processus parent doit donc rester petit
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        processed = pool.apply(write_processed, (n_rows, workdir / "processed"))
+    metrics = workdir / "metrics.jsonl"
+    env = {**os.environ, "PIPELINE_METRICS_FILE": str(metrics)}
+    out = subprocess.run([sys.executable, "-c", CHILD, str(src), str(workdir), *extra],
+                         capture_output=True, text=True, env=env, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    stages = {}
+    for line in metrics.read_text(encoding="utf-8").splitlines():
+        r = json.loads(line)
+        if r.get("script") == "train":
+            stages[r["stage"]] = r.get("peak_rss_mib")
+    return {"rows": n_rows, "processed_bytes": processed.stat().st_size,
+            "dataset_mib": n_rows * len(MODELS) * 8 / 2 ** 20, **result,
+            "rows_per_s": n_rows / result["seconds"], "stages": stages}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Pic de RSS de train.py.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 4_000_000])
+    parser.add_argument("--src", type=str, default=str(ROOT / "src"),
+                        help="Dossier src/ à mesurer (défaut: celui du dépôt).")
+    parser.add_argument("--external-memory", action="store_true",
+                        help="Mesure train.py --external-memory.")
+    parser.add_argument("--batch-rows", type=int, default=250_000)
+    parser.add_argument("--json", type=str, default=None, help="Export JSON des résultats.")
+    args = parser.parse_args(argv)
+    extra = (["--external-memory", "--batch-rows", str(args.batch_rows)]
+             if args.external_memory else [])
+
+    results = []
+    print(f"{'rows':>10} {'int64 MiB':>10} {'peak RSS MiB':>13} {'time (s)':>9} "
+          f"{'rows/s':>9}  pic par étape (MiB)")
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            r = bench_size(n_rows, Path(args.src).resolve(), Path(tmp), extra)
+        results.append(r)
+        per_stage = " ".join(f"{k}={v:.0f}" for k, v in r["stages"].items() if v)
+        print(f"{n_rows:>10} {r['dataset_mib']:>10.1f} {r['peak_rss_mib']:>13.1f} "
+              f"{r['seconds']:>9.1f} {r['rows_per_s']:>9.0f}  {per_stage}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0 if all(r["code"] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+"""
+-------------------------------------------------------------------------------
+Générateur de données brutes synthétiques au format long de collect.sh :
+    timestamp,model,sales
+
+Une mesure par (minute, modèle GPU), horodatée en ISO UTC comme l'API, avec
+des défauts injectés à des taux configurables :
+  - doublons   : lignes (timestamp, model) répétées (agrégées par somme)
+  - NaN        : ventes vides
+  - négatifs   : ventes négatives (clippées à 0 au prétraitement)
+
+Utilisable comme module (make_long / write_long_csv) ou en ligne de commande :
+    python benchmarks/synthetic.py --rows 1000000 --models 5 --output raw.csv
+                                   [--dup-rate 0.01] [--nan-rate 0.01]
+                                   [--neg-rate 0.01] [--seed 42]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+GPU_MODELS = ["rtx3060", "rtx3070", "rtx3080", "rtx3090", "rx6700"]
+START = np.datetime64("2025-01-01T00:00:00", "s")
+
+
+def model_names(n_models: int) -> list[str]:
+    """
+    Les 5 modèles de l'API, complétés au besoin par des modèles fictifs.
+    """
+    extra = [f"gpu{i:03d}" for i in range(max(0, n_models - len(GPU_MODELS)))]
+    return (GPU_MODELS + extra)[:n_models]
+
+
+def make_long(n_rows: int, n_models: int = 5, dup_rate: float = 0.0,
+              nan_rate: float = 0.0, neg_rate: float = 0.0, seed: int = 42) -> pd.DataFrame:
+    """
+    Table longue de 'n_rows' lignes triée par timestamp. Les doublons sont des
+    copies de lignes existantes, donc le nombre de timestamps distincts vaut
+    ceil(n_rows * (1 - dup_rate) / n_models).
+    """
+    rng = np.random.default_rng(seed)
+    names = model_names(n_models)
+    n_dup = int(n_rows * dup_rate)
+    n_unique = n_rows - n_dup
+
+    # Lignes distinctes : toutes les minutes x tous les modèles
+    ts_idx = np.arange(n_unique) // n_models
+    model_idx = np.arange(n_unique) % n_models
+    if n_dup:
+        picks = rng.integers(0, n_unique, size=n_dup)
+        ts_idx = np.concatenate([ts_idx, ts_idx[picks]])
+        model_idx = np.concatenate([model_idx, model_idx[picks]])
+        order = np.argsort(ts_idx, kind="stable")
+        ts_idx, model_idx = ts_idx[order], model_idx[order]
+
+    sales = rng.integers(0, 25, size=n_rows).astype("int64")
+    negative = rng.random(n_rows) < neg_rate
+    sales[negative] = -rng.integers(1, 25, size=int(negative.sum()))
+    sales_col = pd.array(sales, dtype="Int64")
+    sales_col[rng.random(n_rows) < nan_rate] = pd.NA
+
+    # Formatage des timestamps une seule fois par minute distincte
+    n_ts = int(ts_idx.max()) + 1 if n_rows else 0
+    stamps = np.char.add(np.datetime_as_string(START + np.arange(n_ts) * 60, unit="s"), "Z")
+    return pd.DataFrame({
+        "timestamp": pd.Categorical.from_codes(ts_idx, categories=stamps),
+        "model": pd.Categorical.from_codes(model_idx, categories=names),
+        "sales": sales_col,
+    })
+
+
+def write_long_csv(df: pd.DataFrame, path: Path) -> Path:
+    df.to_csv(path, index=False)
+    return path
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Génère un CSV brut synthétique (format long).")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--dup-rate", type=float, default=0.0)
+    parser.add_argument("--nan-rate", type=float, default=0.0)
+    parser.add_argument("--neg-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, required=True)
+    args = parser.parse_args(argv)
+
+    df = make_long(args.rows, args.models, args.dup_rate, args.nan_rate, args.neg_rate, args.seed)
+    path = write_long_csv(df, Path(args.output))
+    print(f"{len(df)} lignes écrites dans {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
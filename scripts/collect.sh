@@ -9,14 +9,42 @@
 #     - rtx3090
 #     - rx6700
 #
-#   Les données collectées sont ajoutées à une copie du fichier :
-#     data/raw/sales_data.csv
+#   Deux modes de collecte (variable d'environnement COLLECT_MODE) :
+#     - append (défaut) : chaque lot est ajouté à un stock unique en ajout seul
+#         data/raw/sales_store.csv
+#       et chaque exécution publie un manifeste léger (fichier, taille en
+#       octets, nombre de lignes) décrivant l'instantané correspondant :
+#         data/raw/manifests/sales_YYYYMMDD_HHMM.json
+#         data/raw/manifests/latest.json (pointeur remplacé atomiquement)
+#       seuls les MANIFEST_KEEP (défaut 60) derniers manifestes horodatés sont
+#       conservés (0 : latest.json seul)
+#     - snapshot : comportement historique, le plus récent sales_*.csv est
+#       copié puis complété dans data/raw/sales_YYYYMMDD_HHMM.csv
 #
-#   Le fichier de sortie est sauvegardé au format :
-#     data/raw/sales_YYYYMMDD_HHMM.csv
-#   avec les colonnes suivantes :
+#   Dans les deux cas les colonnes sont :
 #     timestamp, model, sales
 #
+#   Les modèles sont interrogés en parallèle (au plus FETCH_PARALLEL requêtes
+#   simultanées) puis le lot complet est ajouté en une seule écriture suivie
+#   d'un fsync par src/collect_writer.py (bibliothèque standard seule), qui
+#   tient des compteurs cumulés (lignes, dernier timestamp, totaux par modèle)
+#   dans '<csv>.counters.json' : le résumé de l'exécution et le manifeste ne
+#   relisent plus le fichier (coût par exécution indépendant de l'historique,
+#   compatible avec une collecte toutes les 10 s). Le rapport de validation du
+#   CSV brut ('<csv>.validation.json', format de src/validation.py) est
+#   réécrit à partir de ces compteurs à chaque lot.
+#   API_BASE permet de cibler une autre API (ex. un stub local de test).
+#
+#   Chaque fichier écrit est inscrit dans le catalogue data/raw/catalog.jsonl
+#   (nom, octets, lignes, intervalle de temps, empreinte ; voir src/catalog.py),
+#   lu à la place d'un 'ls -t' du dossier pour trouver le dernier instantané.
+#   Une entrée prolonge la précédente (même fichier ou copie de celui-ci) en
+#   O(taille du lot) : lignes cumulées et empreinte chaînée.
+#
+#   Chaque étape (fetch, append, manifest, catalog) émet une ligne de métriques JSON
+#   (temps, CPU, pic RSS du shell, lignes et octets) dans logs/metrics.jsonl
+#   (PIPELINE_METRICS_FILE), au même format que src/instrumentation.py.
+#
 #   L’activité de collecte (requêtes, modèles interrogés, résultats, erreurs)
 #   est enregistrée dans un fichier de log :
 #     logs/collect.logs
@@ -36,25 +64,93 @@ set -euo pipefail
 
 # --- Constantes et chemins ----------------------------------------------------
 MODELS=("rtx3060" "rtx3070" "rtx3080" "rtx3090" "rx6700")
-API_BASE="http://0.0.0.0:5000"
+API_BASE="${API_BASE:-http://0.0.0.0:5000}"
+# Nombre maximal de requêtes API simultanées (une par modèle)
+FETCH_PARALLEL="${FETCH_PARALLEL:-8}"
 
 RAW_DIR="data/raw"
 LOG_DIR="logs"
 LOG_FILE="${LOG_DIR}/collect.logs"
+CSV_HEADER="timestamp,model,sales"
 
-# Nom du fichier de sortie : sales_YYYYMMDD_HHMM.csv (heure locale pour le nom)
+# Écriture des lots : python de l'environnement virtuel, sinon python3 du PATH
+PROJECT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WRITER="${PROJECT_DIR}/src/collect_writer.py"
+PY="${PROJECT_DIR}/.venv/bin/python"
+[[ -x "$PY" ]] || PY="python3"
+
+# Mode de collecte : append (stock unique + manifestes) ou snapshot (copie)
+COLLECT_MODE="${COLLECT_MODE:-append}"
+STORE_CSV="${RAW_DIR}/sales_store.csv"
+MANIFEST_DIR="${RAW_DIR}/manifests"
+LATEST_MANIFEST="${MANIFEST_DIR}/latest.json"
+# Manifestes horodatés conservés (les plus anciens sont supprimés)
+MANIFEST_KEEP="${MANIFEST_KEEP:-60}"
+CATALOG="${RAW_DIR}/catalog.jsonl"
+# Fichier source copié (mode snapshot), lot ajouté, taille avant ajout et
+# résumé renvoyé par l'écrivain (compteurs cumulés après ajout)
+SOURCE_CSV=""
+BATCH=""
+BATCH_BASE_BYTES=""
+WRITE_SUMMARY=""
+
+# Horodatage de l'exécution : sales_YYYYMMDD_HHMM (heure locale pour le nom)
 OUT_STAMP="$(date +"%Y%m%d_%H%M")"
-OUTPUT_CSV="${RAW_DIR}/sales_${OUT_STAMP}.csv"
+if [[ "$COLLECT_MODE" == "append" ]]; then
+  OUTPUT_CSV="$STORE_CSV"
+else
+  OUTPUT_CSV="${RAW_DIR}/sales_${OUT_STAMP}.csv"
+fi
 
 # Timestamp ISO UTC pour les nouvelles mesures
 NOW_UTC="$(date -u +"%Y-%m-%dT%H:%M:%SZ")"
 
+# Métriques par étape (format commun avec src/instrumentation.py)
+METRICS_FILE="${PIPELINE_METRICS_FILE:-${LOG_DIR}/metrics.jsonl}"
+RUN_ID="${PIPELINE_RUN_ID:-$(date +"%Y%m%dT%H%M%S")-$$}"
+CLK_TCK="$(getconf CLK_TCK 2>/dev/null || echo 100)"
+
 # --- Fonctions utilitaires ---
 log() {
   # Format lisible avec date locale
   printf "[%s] | INFO | %s\n" "$(date +"%Y-%m-%d %H:%M:%S")" "$*" | tee -a "$LOG_FILE" >/dev/null
 }
 
+cpu_ticks() {
+  # Temps CPU (ticks) du shell et de ses enfants terminés (curl, wc...) :
+  # champs utime, stime, cutime, cstime de /proc/<pid>/stat
+  local stat fields
+  if ! read -r stat 2>/dev/null < "/proc/$$/stat"; then
+    echo 0
+    return
+  fi
+  # Le nom de commande (2e champ) peut contenir des espaces : on repart après ')'
+  read -r -a fields <<< "${stat##*) }"
+  echo $(( fields[11] + fields[12] + fields[13] + fields[14] ))
+}
+
+stage_begin() {
+  STAGE_T0="$(date +%s%N)"
+  STAGE_C0="$(cpu_ticks)"
+}
+
+stage_end() {
+  # stage_end <étape> <status> <rows_out> <bytes_read> <bytes_written>
+  # (compteurs vides -> null) ; la ligne est ajoutée en une seule écriture
+  local name="$1" status="$2" wall_ns cpu rss line
+  wall_ns=$(( $(date +%s%N) - STAGE_T0 ))
+  cpu=$(( $(cpu_ticks) - STAGE_C0 ))
+  rss="$(awk '/^VmHWM:/ {printf "%.1f", $2 / 1024}' "/proc/$$/status" 2>/dev/null || true)"
+  line="$(printf '{"ts": "%s", "run_id": "%s", "script": "collect", "stage": "%s", ' \
+    "$(date +"%Y-%m-%dT%H:%M:%S.%3N")" "$RUN_ID" "$name")"
+  line+="$(printf '"status": "%s", "wall_s": %s, "cpu_s": %s, "peak_rss_mib": %s, ' \
+    "$status" "$(awk -v n="$wall_ns" 'BEGIN {printf "%.6f", n / 1e9}')" \
+    "$(awk -v t="$cpu" -v hz="$CLK_TCK" 'BEGIN {printf "%.6f", t / hz}')" "${rss:-null}")"
+  line+="$(printf '"rows_in": null, "rows_out": %s, "bytes_read": %s, "bytes_written": %s}' \
+    "${3:-null}" "${4:-null}" "${5:-null}")"
+  printf '%s\n' "$line" >> "$METRICS_FILE"
+}
+
 ensure_dirs() {
   # Création si besoin des repertoires de travail utilisé (log et data/raw)
   mkdir -p "$RAW_DIR" "$LOG_DIR"
@@ -62,26 +158,99 @@ ensure_dirs() {
   touch "$LOG_FILE"
 }
 
+json_field() {
+  # json_field <ligne JSON> <champ> : valeur d'un champ simple (chaîne ou nombre)
+  sed -n 's/.*"'"$2"'": "\{0,1\}\([^",}]*\).*/\1/p' <<< "$1"
+}
+
+catalog_latest() {
+  # Dernier fichier inscrit au catalogue, si celui-ci est à jour (aucun
+  # fichier créé ou supprimé dans le dossier depuis sa dernière écriture)
+  local path
+  [[ -s "$CATALOG" && ! "$RAW_DIR" -nt "$CATALOG" ]] || return 0
+  path="$(json_field "$(tail -n 1 "$CATALOG")" path)"
+  if [[ -n "$path" && "$path" == sales_*.csv && -f "${RAW_DIR}/${path}" ]]; then
+    echo "${RAW_DIR}/${path}"
+  fi
+}
+
 copy_or_init_csv() {
-  # Trouve le plus récent sales_*.csv ; sinon en crée un nouveau avec entête
-  local latest
-  # nullglob pour éviter que le pattern littéral ne sorte si aucun match
-  shopt -s nullglob
-  # tri par date décroissante ; prendre le premier si dispo
-  latest=$(ls -1t "${RAW_DIR}"/sales_*.csv 2>/dev/null | head -n1 || true)
-  shopt -u nullglob
+  # Trouve le plus récent sales_*.csv (catalogue, sinon parcours du dossier) ;
+  # sinon en crée un nouveau avec entête
+  local latest="" candidates
+  latest="$(catalog_latest)"
+  if [[ -z "$latest" ]]; then
+    # nullglob pour éviter que le pattern littéral ne sorte si aucun match
+    shopt -s nullglob
+    candidates=("${RAW_DIR}"/sales_*.csv)
+    shopt -u nullglob
+    # tri par date décroissante ; prendre le premier si dispo
+    # (ls sans argument listerait le dossier courant : on teste le glob avant)
+    if (( ${#candidates[@]} > 0 )); then
+      latest=$(ls -1t "${candidates[@]}" | head -n1 || true)
+    fi
+  fi
 
   if [[ -n "${latest:-}" ]]; then
     if [[ ! -f "$OUTPUT_CSV" ]]; then
-        cp "$latest" "$OUTPUT_CSV"
+        # Copie avec la date de modification (-p) : les compteurs de la source,
+        # copiés aussi, décrivent la copie (pas de relecture par l'écrivain)
+        cp -p "$latest" "$OUTPUT_CSV"
+        if [[ -f "${latest}.counters.json" ]]; then
+          cp "${latest}.counters.json" "${OUTPUT_CSV}.counters.json"
+        fi
+        SOURCE_CSV="$latest"
         log "Copie du CSV source ${latest} vers ${OUTPUT_CSV}"
     else
         log "Fichier cible ${OUTPUT_CSV} déjà présent, copie ignorée"
     fi
   else
 	# fallback si aucun fichier trouvé
-    local new_file="${RAW_DIR}/sales_${OUT_STAMP}.csv"
-    log "Aucune fichier sales trouvé. Initialisation d'un nouveau avec entête : ${new_file}."
+    echo "$CSV_HEADER" > "$OUTPUT_CSV"
+    log "Aucune fichier sales trouvé. Initialisation d'un nouveau avec entête : ${OUTPUT_CSV}."
+  fi
+}
+
+init_store() {
+  # Stock en ajout seul : initialisé une seule fois (à partir du dernier
+  # instantané historique s'il existe), jamais recopié ensuite
+  if [[ -f "$STORE_CSV" ]]; then
+    log "Stock en ajout seul : ${STORE_CSV}"
+    return 0
+  fi
+  copy_or_init_csv
+}
+
+publish_manifest() {
+  # Publie le manifeste de l'exécution : l'instantané « latest » est le
+  # préfixe du stock de longueur 'bytes' (aucune copie de données)
+  local n_bytes n_lines manifest tmp
+  stage_begin
+  # Taille et lignes lues dans les compteurs de l'écrivain (sans relecture)
+  n_bytes="$(json_field "$WRITE_SUMMARY" bytes)"
+  n_lines="$(json_field "$WRITE_SUMMARY" lines)"
+  manifest="${MANIFEST_DIR}/sales_${OUT_STAMP}.json"
+  tmp="${LATEST_MANIFEST}.tmp"
+
+  mkdir -p "$MANIFEST_DIR"
+  printf '{"path": "%s", "bytes": %s, "lines": %s, "collected_at": "%s"}\n' \
+    "$STORE_CSV" "$n_bytes" "$n_lines" "$NOW_UTC" > "$manifest"
+  # Remplacement atomique du pointeur (mv sur le même système de fichiers)
+  cp "$manifest" "$tmp"
+  mv -f "$tmp" "$LATEST_MANIFEST"
+  stage_end manifest ok "" "$n_bytes" "$(wc -c < "$manifest" | tr -d ' ')"
+  log "Manifeste publié : ${manifest} | octets=${n_bytes} lignes=${n_lines}"
+  prune_manifests
+}
+
+prune_manifests() {
+  # Ne garde que les MANIFEST_KEEP derniers manifestes horodatés : le glob
+  # est trié par nom, donc par date (sales_YYYYMMDD_HHMM.json)
+  local manifests=("$MANIFEST_DIR"/sales_*.json)
+  local n_old=$(( ${#manifests[@]} - MANIFEST_KEEP ))
+  if [[ -e "${manifests[0]}" ]] && (( n_old > 0 )); then
+    rm -f -- "${manifests[@]:0:n_old}"
+    log "Manifestes supprimés : ${n_old} (conservés : ${MANIFEST_KEEP})"
   fi
 }
 
@@ -110,47 +279,127 @@ fetch_sales() {
   echo "$resp"
 }
 
+fetch_all() {
+  # Lance les requêtes de tous les modèles en parallèle (au plus FETCH_PARALLEL
+  # à la fois) ; la réponse de chaque modèle est écrite dans "$1/<modèle>"
+  local out_dir="$1" model running=0
+  for model in "${MODELS[@]}"; do
+    fetch_sales "$model" > "${out_dir}/${model}" &
+    running=$((running + 1))
+    if (( running >= FETCH_PARALLEL )); then
+      wait -n || true
+      running=$((running - 1))
+    fi
+  done
+  wait
+}
+
 append_batch() {
   log "Début de la collecte."
   log "Fichier cible (append) : ${OUTPUT_CSV}"
   log "Horodatage (UTC) : ${NOW_UTC}"
   log "Modèles interrogés : ${MODELS[*]}"
 
-  # Début avec une nouvelle ligne
-  echo "" >> "$OUTPUT_CSV"
+  # Requêtes concurrentes : la durée du lot est celle de la requête la plus lente
+  local fetch_dir start_ms batch="" model sales n_ok=0 n_read=0
+  fetch_dir="$(mktemp -d)"
+  start_ms="$(date +%s%3N)"
+  stage_begin
+  fetch_all "$fetch_dir"
+  log "Requêtes API terminées en $(( $(date +%s%3N) - start_ms )) ms"
+
   for model in "${MODELS[@]}"; do
-    sales="$(fetch_sales "$model" || true)"
+    sales="$(cat "${fetch_dir}/${model}" 2>/dev/null || true)"
     if [[ -z "$sales" ]]; then
       sales=0
       log "Avertissement | ${model} -> fallback à 0 (échec API)"
+    else
+      n_ok=$((n_ok + 1))
+      n_read=$((n_read + ${#sales}))
     fi
-    echo "${NOW_UTC},${model},${sales}" >> "$OUTPUT_CSV"
+    batch+="${NOW_UTC},${model},${sales}"$'\n'
     log "Résultat | ${model} -> ${sales}"
   done
+  rm -rf "$fetch_dir"
+  stage_end fetch "$([[ $n_ok -eq ${#MODELS[@]} ]] && echo ok || echo error)" "$n_ok" "$n_read"
+
+  # Début avec une nouvelle ligne si le fichier ne se termine pas par un saut de ligne
+  stage_begin
+  if [[ -s "$OUTPUT_CSV" && -n "$(tail -c1 "$OUTPUT_CSV")" ]]; then
+    batch=$'\n'"$batch"
+  fi
+  # Écriture du lot complet en un seul ajout + fsync (pas de lot partiel
+  # visible) ; l'écrivain renvoie les compteurs cumulés du fichier
+  BATCH="$batch"
+  WRITE_SUMMARY="$(printf '%s' "$batch" | "$PY" "$WRITER" "$OUTPUT_CSV")"
+  BATCH_BASE_BYTES="$(json_field "$WRITE_SUMMARY" base_bytes)"
+  stage_end append ok "${#MODELS[@]}" "" "$(json_field "$WRITE_SUMMARY" batch_bytes)"
+  if [[ "$(json_field "$WRITE_SUMMARY" rebuilt)" == "true" ]]; then
+    log "Compteurs reconstruits par relecture de ${OUTPUT_CSV}"
+  fi
+  # Rapport de validation du CSV brut ('<csv>.validation.json'), tenu par l'écrivain
+  if [[ "$(json_field "$WRITE_SUMMARY" valid)" != "true" ]]; then
+    log "Avertissement | validation du CSV brut en échec (voir ${OUTPUT_CSV}.validation.json)"
+  fi
 
-  # petit récap
-  local n_lines n_cols
-  n_lines="$(wc -l < "$OUTPUT_CSV" | tr -d ' ')"
-  n_cols="$(head -n1 "$OUTPUT_CSV" | awk -F',' '{print NF}')"
-  log "Résumé fichier : ${OUTPUT_CSV} | lignes=${n_lines} colonnes=${n_cols}"
+  # petit récap (compteurs cumulés, temps constant)
+  log "Résumé fichier : ${OUTPUT_CSV} | lignes=$(json_field "$WRITE_SUMMARY" lines)" \
+    "colonnes=$(json_field "$WRITE_SUMMARY" columns)" \
+    "dernier timestamp=$(json_field "$WRITE_SUMMARY" t_max)"
   log "Fin de la collecte."
 }
 
-summary_counts() {
-  # Compte lignes/colonnes pour vérification rapide
-  local n_lines n_cols
-  n_lines="$(wc -l < "$OUTPUT_CSV" | tr -d ' ')"
-  # Nombre de colonnes d'après l'entête
-  n_cols="$(head -n1 "$OUTPUT_CSV" | awk -F',' '{print NF}')"
-  log "Résumé fichier : ${OUTPUT_CSV} | lignes=${n_lines} colonnes=${n_cols}"
+index_output() {
+  # Inscrit le fichier écrit au catalogue (dernière écriture de l'exécution).
+  # Si la dernière entrée décrit exactement le fichier avant l'ajout (lui-même
+  # ou sa source copiée), elle est prolongée : lignes + lot, même t_min,
+  # empreinte chaînée. Sinon l'empreinte est recalculée sur tout le fichier
+  # (lignes et t_min sont lus dans les compteurs de l'écrivain).
+  local prev="" prev_path prev_bytes name source n_bytes rows t_min hash line
+  stage_begin
+  [[ -s "$CATALOG" ]] && prev="$(tail -n 1 "$CATALOG")"
+  prev_path="$(json_field "$prev" path)"
+  prev_bytes="$(json_field "$prev" bytes)"
+  name="$(basename "$OUTPUT_CSV")"
+  source="$(basename "${SOURCE_CSV:-/}")"
+  n_bytes="$(json_field "$WRITE_SUMMARY" bytes)"
+
+  if [[ -n "$prev" && "$prev_bytes" == "$BATCH_BASE_BYTES" \
+        && ( "$prev_path" == "$name" || "$prev_path" == "$source" ) ]]; then
+    rows=$(( $(json_field "$prev" rows) + ${#MODELS[@]} ))
+    t_min="$(json_field "$prev" t_min)"
+    hash="$(printf '%s%s' "$(json_field "$prev" sha256)" "$BATCH" | sha256sum | cut -d' ' -f1)"
+  else
+    rows="$(json_field "$WRITE_SUMMARY" rows)"
+    t_min="$(json_field "$WRITE_SUMMARY" t_min)"
+    hash="$(sha256sum "$OUTPUT_CSV" | cut -d' ' -f1)"
+  fi
+
+  line="$(printf '{"path": "%s", "bytes": %s, "rows": %s, "t_min": "%s", "t_max": "%s", ' \
+    "$name" "$n_bytes" "$rows" "$t_min" "$NOW_UTC")"
+  line+="$(printf '"sha256": "%s", "written_at": "%s"}' \
+    "$hash" "$(date -u +"%Y-%m-%dT%H:%M:%S+00:00")")"
+  # Ajout en une seule écriture (aucune entrée partielle visible)
+  printf '%s\n' "$line" >> "$CATALOG"
+  stage_end catalog ok "$rows" "" "$n_bytes"
+  log "Catalogue : ${name} | lignes=${rows} t_min=${t_min} t_max=${NOW_UTC}"
 }
 
 # --- Procédure principale ---
 main() {
   ensure_dirs
   log "=== Début de la tâche de collecte ==="
-  copy_or_init_csv
-  append_batch
+  if [[ "$COLLECT_MODE" == "append" ]]; then
+    init_store
+    append_batch
+    publish_manifest
+  else
+    # Le stock n'est plus l'instantané le plus récent : on retire le pointeur
+    rm -f "$LATEST_MANIFEST"
+    copy_or_init_csv
+    append_batch
+  fi
+  index_output
   log "=== Fin de la tâche de collecte ==="
 }
 
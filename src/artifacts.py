@@ -0,0 +1,189 @@
+"""
+-------------------------------------------------------------------------------
+Artefacts de modèles du dossier 'model/' (écriture, lecture, rétention).
+
+Formats (--model-format de train.py) :
+  - pkl  : pickle joblib du XGBRegressor (format historique, model.pkl)
+  - ubj  : format natif XGBoost UBJSON (binaire compact, lisible par toute
+           version récente d'XGBoost sans dépendre de la version de sklearn)
+  - json : format natif XGBoost JSON (lisible, plus volumineux)
+Avec une compression N > 0 : niveau zlib de joblib pour pkl, fichier gzip
+'.ubj.gz' / '.json.gz' pour les formats natifs.
+
+Chaque artefact est écrit dans un fichier temporaire puis renommé
+(os.replace) : un lecteur (serve.py, mode continue) ne voit jamais de fichier
+partiel. Il est accompagné d'un fichier annexe '<artefact>.meta.json'
+(métriques, empreinte des données d'entrée, colonnes, hyperparamètres...) qui
+évite de charger le modèle pour le décrire, et le lien symbolique
+'model/latest' désigne le dernier artefact (remplacé atomiquement).
+
+Rétention (apply_retention) : parmi les artefacts horodatés model_*, sont
+conservés les N plus récents et les K meilleurs (RMSE des métadonnées), ainsi
+que les artefacts protégés (model.pkl, modèle courant) ; les autres sont
+supprimés avec leur fichier annexe.
+
+joblib et xgboost ne sont importés qu'à l'écriture ou au chargement.
+-------------------------------------------------------------------------------
+"""
+
+import gzip
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+
+# --------------------------------------------------------------------------- #
+# Constantes
+# --------------------------------------------------------------------------- #
+MODEL_FORMATS = {"pkl": ".pkl", "ubj": ".ubj", "json": ".json"}
+GZIP_SUFFIX = ".gz"
+META_SUFFIX = ".meta.json"
+LATEST_NAME = "latest"
+ARTIFACT_RE = re.compile(r"^model(_.+)?\.(pkl|ubj|json)(\.gz)?$")
+
+
+def artifact_suffix(fmt: str, compress: int = 0) -> str:
+    suffix = MODEL_FORMATS[fmt]
+    return suffix + GZIP_SUFFIX if compress and fmt != "pkl" else suffix
+
+
+def is_artifact(path: Path) -> bool:
+    return bool(ARTIFACT_RE.match(path.name)) and not path.name.endswith(META_SUFFIX)
+
+
+def metadata_path(path: Path) -> Path:
+    return path.with_name(path.name + META_SUFFIX)
+
+
+# --------------------------------------------------------------------------- #
+# Écriture / lecture
+# --------------------------------------------------------------------------- #
+def dump_model(model: object, path: Path, compress: int = 0) -> Path:
+    """
+    Écrit le modèle au format donné par l'extension de 'path' (remplacement
+    atomique).
+    """
+    tmp = path.with_name(f".{path.name}.tmp")
+    if path.suffix == ".pkl":
+        import joblib
+
+        joblib.dump(model, tmp, compress=compress)
+    else:
+        # XGBoost choisit le format natif d'après l'extension du fichier
+        native = path.name.removesuffix(GZIP_SUFFIX)
+        raw = path.with_name(f".{path.name}.tmp{Path(native).suffix}")
+        model.save_model(raw)  # type: ignore
+        if path.name.endswith(GZIP_SUFFIX):
+            with open(raw, "rb") as src, gzip.open(tmp, "wb", compresslevel=compress) as dst:
+                shutil.copyfileobj(src, dst)
+            raw.unlink()
+        else:
+            os.replace(raw, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def load_model(path: Path) -> object:
+    """
+    Charge un artefact quel que soit son format (lien 'latest' suivi). Les
+    formats natifs restituent le booster (prédiction, poursuite du boosting) ;
+    les hyperparamètres d'origine sont dans le fichier annexe.
+    """
+    path = Path(path).resolve()
+    if path.suffix == ".pkl":
+        import joblib
+
+        return joblib.load(path)
+    from xgboost import XGBRegressor
+
+    model = XGBRegressor()
+    if path.name.endswith(GZIP_SUFFIX):
+        with gzip.open(path, "rb") as fh:
+            model.load_model(bytearray(fh.read()))
+    else:
+        model.load_model(path)
+    return model
+
+
+def write_metadata(path: Path, metadata: dict) -> Path:
+    meta_path = metadata_path(path)
+    tmp = meta_path.with_name(f".{meta_path.name}.tmp")
+    tmp.write_text(json.dumps(metadata, indent=2, default=str), encoding="utf-8")
+    os.replace(tmp, meta_path)
+    return meta_path
+
+
+def read_metadata(path: Path) -> dict | None:
+    try:
+        return json.loads(metadata_path(Path(path)).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def remove_artifact(path: Path) -> None:
+    path.unlink(missing_ok=True)
+    metadata_path(path).unlink(missing_ok=True)
+
+
+# --------------------------------------------------------------------------- #
+# Pointeur 'latest'
+# --------------------------------------------------------------------------- #
+def swap_latest(model_dir: Path, target: Path) -> Path:
+    """
+    Fait pointer 'model_dir/latest' vers 'target' (lien relatif créé à côté
+    puis renommé par-dessus l'ancien : remplacement atomique).
+    """
+    link = model_dir / LATEST_NAME
+    tmp = model_dir / f".{LATEST_NAME}.tmp"
+    tmp.unlink(missing_ok=True)
+    os.symlink(os.path.relpath(Path(target).resolve(), model_dir.resolve()), tmp)
+    os.replace(tmp, link)
+    return link
+
+
+def resolve_latest(model_dir: Path) -> Path | None:
+    link = model_dir / LATEST_NAME
+    return link.resolve() if link.is_symlink() and link.exists() else None
+
+
+# --------------------------------------------------------------------------- #
+# Rétention
+# --------------------------------------------------------------------------- #
+def _created(path: Path, meta: dict | None) -> str:
+    if meta and meta.get("created"):
+        return str(meta["created"])
+    return datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds")
+
+
+def apply_retention(model_dir: Path, keep_last: int, keep_best: int,
+                    protected: set[Path]) -> list[Path]:
+    """
+    Supprime les artefacts horodatés hors des 'keep_last' plus récents et des
+    'keep_best' meilleurs RMSE ; sans effet si les deux valent 0.
+    """
+    if keep_last <= 0 and keep_best <= 0:
+        return []
+    candidates = [p for p in model_dir.iterdir()
+                  if p.name.startswith("model_") and is_artifact(p) and not p.is_symlink()]
+    metas = {p: read_metadata(p) for p in candidates}
+
+    recent = sorted(candidates, key=lambda p: _created(p, metas[p]), reverse=True)
+    scored = [p for p in candidates
+              if (metas[p] or {}).get("metrics", {}).get("rmse") is not None]
+    best = sorted(scored, key=lambda p: metas[p]["metrics"]["rmse"])
+    keep = set(recent[:max(keep_last, 0)]) | set(best[:max(keep_best, 0)])
+    keep |= {p.resolve() for p in protected}
+    latest = resolve_latest(model_dir)
+    if latest is not None:
+        keep.add(latest)
+
+    removed = []
+    for path in candidates:
+        if path in keep or path.resolve() in keep:
+            continue
+        remove_artifact(path)
+        removed.append(path)
+    return removed
@@ -0,0 +1,267 @@
+"""
+-------------------------------------------------------------------------------
+Catalogue des fichiers d'un dossier de données (data/raw, data/processed).
+
+Chaque étape qui écrit un fichier ajoute une ligne JSON à '<dossier>/catalog.jsonl' :
+
+  {"path": "sales_processed_20250827_1520.csv", "bytes": 1234, "rows": 42,
+   "t_min": "2025-08-27T14:00:00Z", "t_max": "2025-08-27T15:20:00Z",
+   "sha256": "...", "written_at": "2025-08-27T15:20:03+00:00"}
+
+  - path         : nom du fichier dans le dossier du catalogue
+  - rows         : lignes de données (hors entête)
+  - t_min/t_max  : intervalle des instants contenus (UTC)
+  - sha256       : empreinte du contenu ; pour un fichier prolongé par ajout
+                   (stock brut de collect.sh), empreinte chaînée
+                   sha256(empreinte précédente + octets ajoutés)
+
+Chaque ligne est écrite en un seul ajout (O_APPEND) : aucun lecteur ne voit
+d'entrée partielle et une ligne illisible (écriture interrompue) est ignorée.
+Le catalogue est écrit par scripts/collect.sh (data/raw) et src/preprocessed.py
+(data/processed), et lu par preprocessed._find_latest_raw_csv,
+train.find_latest_processed_csv et collect.sh à la place d'un glob + stat de
+tout le dossier :
+  - latest_entry   : lecture de la fin du fichier, O(1)
+  - entries_since  : recherche dichotomique sur t_max (entrées ajoutées dans
+                     l'ordre de collecte), O(log n) + entrées renvoyées
+Un fichier renommé par son auteur (sortie CSV glissante de preprocessed.py)
+voit ses entrées retirées par remove_entries.
+
+Le catalogue est écrit après tous les autres fichiers de l'exécution : si le
+dossier a été modifié depuis (date de modification du dossier postérieure à
+celle du catalogue, ex. fichier déposé à la main), le catalogue est considéré
+périmé et les appelants reviennent au parcours du dossier.
+
+Usage :
+    python src/catalog.py data/processed [--since 2025-08-27T15:00:00Z]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+# --------------------------------------------------------------------------- #
+# Constantes
+# --------------------------------------------------------------------------- #
+CATALOG_NAME = "catalog.jsonl"
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def catalog_path(directory: Path) -> Path:
+    return Path(directory) / CATALOG_NAME
+
+
+def utc_iso(value: datetime | str | None) -> str | None:
+    """
+    Instant normalisé en texte UTC 'YYYY-MM-DDTHH:MM:SSZ' (comparable
+    lexicographiquement) ; un instant naïf est supposé UTC.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+
+def file_sha256(path: Path) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+# --------------------------------------------------------------------------- #
+# Écriture
+# --------------------------------------------------------------------------- #
+def append_entry(path: Path, rows: int, t_min: datetime | str | None,
+                 t_max: datetime | str | None, sha256: str) -> dict:
+    """
+    Ajoute l'entrée de 'path' au catalogue de son dossier. Une erreur
+    d'écriture est loguée : les lecteurs reviennent alors au parcours du dossier.
+    """
+    record = {
+        "path": path.name,
+        "bytes": path.stat().st_size,
+        "rows": int(rows),
+        "t_min": utc_iso(t_min),
+        "t_max": utc_iso(t_max),
+        "sha256": sha256,
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    line = json.dumps(record) + "\n"
+    try:
+        with open(catalog_path(path.parent), "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        logging.warning(f"Catalogue non mis à jour ({path.parent}) : {e}")
+    return record
+
+
+def remove_entries(directory: Path, names: set[str]) -> int:
+    """
+    Retire du catalogue les entrées des fichiers 'names' (fichier renommé ou
+    remplacé par un autre). Réécriture atomique (fichier temporaire + rename) ;
+    renvoie le nombre d'entrées retirées.
+    """
+    path = catalog_path(directory)
+    if not path.exists():
+        return 0
+    kept, removed = [], 0
+    with open(path, "rb") as fh:
+        for line in fh:
+            record = _parse(line)
+            if record is not None and record["path"] in names:
+                removed += 1
+            elif line.strip():
+                kept.append(line if line.endswith(b"\n") else line + b"\n")
+    if removed:
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_bytes(b"".join(kept))
+            os.replace(tmp, path)
+            # Le rename modifie le dossier : le catalogue reste à jour
+            os.utime(path)
+        except OSError as e:
+            logging.warning(f"Catalogue non élagué ({directory}) : {e}")
+            return 0
+    return removed
+
+
+# --------------------------------------------------------------------------- #
+# Lecture
+# --------------------------------------------------------------------------- #
+def _parse(line: bytes) -> dict | None:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) and "path" in record else None
+
+
+def _reverse_lines(path: Path, block: int = 8192) -> Iterator[bytes]:
+    """
+    Lignes du fichier de la dernière à la première, lues par blocs depuis la fin.
+    """
+    with open(path, "rb") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        rest = b""
+        while pos > 0:
+            step = min(block, pos)
+            pos -= step
+            fh.seek(pos)
+            lines = (fh.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if rest.strip():
+            yield rest
+
+
+def is_fresh(directory: Path) -> bool:
+    """
+    Vrai si le catalogue existe et qu'aucun fichier n'a été créé, renommé ou
+    supprimé dans le dossier depuis sa dernière écriture.
+    """
+    try:
+        cat_mtime = catalog_path(directory).stat().st_mtime_ns
+        return Path(directory).stat().st_mtime_ns <= cat_mtime
+    except OSError:
+        return False
+
+
+def latest_entry(directory: Path,
+                 accept: Callable[[Path], bool] | None = None) -> dict | None:
+    """
+    Dernière entrée (acceptée par 'accept') dont le fichier existe encore ;
+    son 'path' est le chemin complet. None si le catalogue est absent ou périmé.
+    """
+    directory = Path(directory)
+    if not is_fresh(directory):
+        return None
+    for line in _reverse_lines(catalog_path(directory)):
+        record = _parse(line)
+        if record is None:
+            continue
+        path = directory / record["path"]
+        if (accept is None or accept(path)) and path.exists():
+            record["path"] = path
+            return record
+    return None
+
+
+def _record_from(fh, offset: int) -> tuple[int, dict | None]:
+    """
+    Première entrée lisible commençant à 'offset' ou après ; (position, entrée).
+    """
+    fh.seek(max(0, offset - 1))
+    if offset > 0:
+        fh.readline()  # fin de la ligne en cours (ou simple '\n' si début de ligne)
+    while True:
+        start = fh.tell()
+        line = fh.readline()
+        if not line:
+            return start, None
+        record = _parse(line)
+        if record is not None:
+            return start, record
+
+
+def entries_since(directory: Path, since: datetime | str) -> list[dict] | None:
+    """
+    Entrées dont l'intervalle se termine à 'since' ou après (t_max >= since)
+    et dont le fichier existe encore, par recherche dichotomique sur les
+    positions du fichier. None si le catalogue est absent ou périmé.
+    """
+    directory = Path(directory)
+    if not is_fresh(directory):
+        return None
+    path = catalog_path(directory)
+    since = utc_iso(since)
+    with open(path, "rb") as fh:
+        lo, hi = 0, fh.seek(0, os.SEEK_END)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            _, record = _record_from(fh, mid)
+            if record is None or (record.get("t_max") or "") >= since:
+                hi = mid
+            else:
+                lo = mid + 1
+        start, _ = _record_from(fh, lo)
+        fh.seek(start)
+        return [r for r in map(_parse, fh)
+                if r is not None and (directory / r["path"]).exists()]
+
+
+# --------------------------------------------------------------------------- #
+# Main
+# --------------------------------------------------------------------------- #
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Consultation du catalogue d'un dossier.")
+    parser.add_argument("directory", type=str, help="Dossier (ex: data/raw, data/processed).")
+    parser.add_argument("--since", type=str, default=None,
+                        help="Entrées dont t_max >= cet instant ISO (défaut: dernière entrée).")
+    args = parser.parse_args(argv)
+
+    if args.since:
+        records = entries_since(Path(args.directory), args.since)
+    else:
+        latest = latest_entry(Path(args.directory))
+        records = [] if latest is None else [dict(latest, path=latest["path"].name)]
+    if not records:
+        print(f"Aucune entrée (catalogue absent ou périmé) dans {args.directory}")
+        return 1
+    for record in records:
+        print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
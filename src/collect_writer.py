@@ -0,0 +1,275 @@
+"""
+-------------------------------------------------------------------------------
+Écriture des lots de collecte (scripts/collect.sh) dans le CSV brut.
+
+Le lot complet (lignes 'timestamp,model,sales', lu sur l'entrée standard)
+est ajouté au fichier en une seule écriture O_APPEND suivie d'un fsync : un
+lecteur ne voit jamais de lot partiel et le lot est sur disque quand la
+commande se termine.
+
+Des compteurs cumulés sont tenus dans un petit fichier annexe
+'<csv>.counters.json' :
+
+  {"bytes": 123456, "mtime_ns": ..., "lines": 4321, "columns": 3,
+   "header": ["timestamp", "model", "sales"], "rows": 4320,
+   "t_min": "2025-08-27T14:00:00Z", "t_max": "2025-08-27T15:20:00Z",
+   "invalid": {"non_numeric": 0, "nan": 0, "non_integer": 0, "negative": 0},
+   "models": {"rtx3060": {"rows": 864, "sales": 10368}, ...}}
+
+  - lines        : sauts de ligne du fichier (valeur de 'wc -l')
+  - rows         : lignes de données non vides (hors entête)
+  - t_min/t_max  : premier et dernier timestamp écrits
+  - invalid      : valeurs 'sales' non numériques, manquantes, non entières
+                   et négatives
+  - models       : lignes et ventes cumulées par modèle
+
+Les compteurs sont prolongés par le seul contenu du lot : le résumé d'une
+exécution (lignes, colonnes, dernier timestamp) est renvoyé en temps
+constant, quelle que soit la taille de l'historique, au lieu des 'wc -l' et
+'head | awk' sur tout le fichier. Ils ne sont réutilisés que s'ils décrivent
+toujours le fichier (même taille et même date de modification) ; sinon
+(première exécution, copie du mode snapshot, fichier modifié à la main) le
+fichier est relu une fois pour les reconstruire.
+
+Le rapport de validation du CSV brut ('<csv>.validation.json', format et
+règles de src/reports.py partagés avec src/validation.py, kind "raw",
+source "counters" : schéma exact et 'sales' numérique, sans NaN, entière et
+positive) est réécrit à partir de ces compteurs à chaque ajout, sans relire
+le fichier.
+
+Bibliothèque standard uniquement (src/reports.py compris) : démarrage
+rapide, compatible avec une collecte toutes les 10 s.
+
+Usage :
+    printf '%s' "$batch" | python src/collect_writer.py data/raw/sales_store.csv
+    python src/collect_writer.py data/raw/sales_store.csv --summary
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Rapport de src/reports.py (src/validation.py n'est pas importé : pandas)
+import reports
+
+# --------------------------------------------------------------------------- #
+# Constantes
+# --------------------------------------------------------------------------- #
+COUNTERS_SUFFIX = ".counters.json"
+# Taille des blocs lus lors d'une reconstruction des compteurs
+SCAN_BLOCK = 1 << 20
+
+
+def counters_path(path: Path) -> Path:
+    return path.with_name(path.name + COUNTERS_SUFFIX)
+
+
+# --------------------------------------------------------------------------- #
+# Compteurs
+# --------------------------------------------------------------------------- #
+def _empty_counters() -> dict:
+    return {"lines": 0, "columns": 0, "header": [], "rows": 0, "t_min": None, "t_max": None,
+            "invalid": {"non_numeric": 0, "nan": 0, "non_integer": 0, "negative": 0},
+            "models": {}}
+
+
+def _sales_value(text: str, invalid: dict) -> int | float:
+    """
+    Valeur de 'sales' (0 si inexploitable) ; les valeurs invalides sont
+    comptées dans 'invalid' avec les règles de src/reports.py.
+    """
+    try:
+        value: int | float = int(text)
+    except ValueError:
+        try:
+            value = float(text) if text else float("nan")
+        except ValueError:
+            invalid["non_numeric"] += 1
+            return 0
+    if value != value:
+        invalid["nan"] += 1
+        return 0
+    if isinstance(value, float) and not value.is_integer():
+        invalid["non_integer"] += 1
+    if value < 0:
+        invalid["negative"] += 1
+    return value
+
+
+def _count_lines(counters: dict, lines: list[bytes]) -> None:
+    """
+    Prolonge les compteurs par des lignes de données complètes.
+    """
+    models, invalid = counters["models"], counters["invalid"]
+    for raw in lines:
+        line = raw.decode("utf-8", "replace").strip()
+        if not line:
+            continue
+        fields = line.split(",")
+        counters["rows"] += 1
+        counters["t_min"] = counters["t_min"] or fields[0]
+        counters["t_max"] = fields[0]
+        if len(fields) < 3:
+            invalid["nan"] += 1
+            continue
+        model = models.setdefault(fields[1].strip(), {"rows": 0, "sales": 0})
+        model["rows"] += 1
+        model["sales"] += _sales_value(fields[2].strip(), invalid)
+
+
+def scan_counters(path: Path) -> dict:
+    """
+    Compteurs reconstruits par une lecture complète du fichier (par blocs).
+    """
+    counters = _empty_counters()
+    header = None
+    rest = b""
+    with open(path, "rb") as fh:
+        while block := fh.read(SCAN_BLOCK):
+            counters["lines"] += block.count(b"\n")
+            lines = (rest + block).split(b"\n")
+            rest = lines.pop()
+            if header is None and lines:
+                header = lines.pop(0)
+            _count_lines(counters, lines)
+    if header is None:
+        header, rest = rest, b""
+    _count_lines(counters, [rest])
+    if header.strip():
+        counters["header"] = header.decode("utf-8", "replace").strip().split(",")
+    counters["columns"] = len(counters["header"])
+    return counters
+
+
+def read_counters(path: Path) -> dict | None:
+    """
+    Compteurs de 'path' s'ils décrivent toujours le fichier (même taille et
+    même date de modification), sinon None.
+    """
+    try:
+        counters = json.loads(counters_path(path).read_text(encoding="utf-8"))
+        st = path.stat()
+    except (OSError, ValueError):
+        return None
+    if counters.get("bytes") != st.st_size or counters.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    if "invalid" not in counters:
+        # Compteurs antérieurs aux contrôles de validation : reconstruits
+        return None
+    return counters
+
+
+def write_counters(counters: dict, path: Path) -> Path:
+    st = path.stat()
+    counters.update(bytes=st.st_size, mtime_ns=st.st_mtime_ns)
+    out = counters_path(path)
+    tmp = out.with_name(f".{out.name}.tmp")
+    tmp.write_text(json.dumps(counters), encoding="utf-8")
+    os.replace(tmp, out)
+    return out
+
+
+def load_counters(path: Path) -> tuple[dict, bool]:
+    """
+    Compteurs à jour de 'path' et indicateur de reconstruction (relecture).
+    """
+    counters = read_counters(path)
+    if counters is not None:
+        return counters, False
+    counters = scan_counters(path) if path.exists() else _empty_counters()
+    return counters, True
+
+
+# --------------------------------------------------------------------------- #
+# Rapport de validation
+# --------------------------------------------------------------------------- #
+def validation_report(counters: dict, path: Path) -> dict:
+    """
+    Rapport de validation du CSV brut calculé à partir des compteurs ; comme
+    pour pandas, 'numeric' compte les colonnes ('sales') non numériques.
+    """
+    invalid = counters["invalid"]
+    checks = reports.raw_checks(counters["header"],
+                                ["sales"] if invalid["non_numeric"] else [],
+                                invalid["nan"], invalid["non_integer"], invalid["negative"])
+    report = reports.build_report("raw", counters["rows"], counters["header"], "counters",
+                                  checks)
+    return reports.describe_file(report, path)
+
+
+def write_report(counters: dict, path: Path) -> dict:
+    report = validation_report(counters, path)
+    reports.write_report(report, path)
+    return report
+
+
+# --------------------------------------------------------------------------- #
+# Écriture
+# --------------------------------------------------------------------------- #
+def append_batch(path: Path, batch: bytes) -> dict:
+    """
+    Ajoute 'batch' à 'path' (un ajout, puis fsync) et met à jour les
+    compteurs. Renvoie le résumé de l'exécution.
+    """
+    counters, rebuilt = load_counters(path)
+    base_bytes = path.stat().st_size if path.exists() else 0
+
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(batch)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    counters["lines"] += batch.count(b"\n")
+    _count_lines(counters, batch.split(b"\n"))
+    write_counters(counters, path)
+    report = write_report(counters, path)
+    return summary(counters, base_bytes=base_bytes, batch_bytes=len(batch), rebuilt=rebuilt,
+                   valid=report["ok"])
+
+
+def summary(counters: dict, **extra) -> dict:
+    """
+    Résumé à plat (lu par collect.sh champ par champ).
+    """
+    keys = ("bytes", "lines", "columns", "rows", "t_min", "t_max")
+    return {**{k: counters.get(k) for k in keys}, **extra}
+
+
+# --------------------------------------------------------------------------- #
+# Main
+# --------------------------------------------------------------------------- #
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Ajout d'un lot de collecte (entrée standard) et compteurs cumulés."
+    )
+    parser.add_argument("output", type=str, help="CSV brut (ex: data/raw/sales_store.csv).")
+    parser.add_argument("--summary", action="store_true",
+                        help="Affiche le résumé des compteurs sans rien ajouter.")
+    args = parser.parse_args(argv)
+
+    path = Path(args.output)
+    try:
+        if args.summary:
+            counters, rebuilt = load_counters(path)
+            if rebuilt and path.exists():
+                write_counters(counters, path)
+                write_report(counters, path)
+            result = summary(counters, rebuilt=rebuilt, models=counters["models"])
+        else:
+            result = append_batch(path, sys.stdin.buffer.read())
+    except OSError as e:
+        print(f"[collect_writer.py] Erreur: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
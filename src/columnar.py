@@ -0,0 +1,47 @@
+"""
+-------------------------------------------------------------------------------
+Dépendance optionnelle pyarrow pour les formats colonnaires (Parquet, Feather).
+
+pyarrow est déclaré dans l'extra 'columnar' de pyproject.toml :
+    uv sync --extra columnar        (ou pip install '.[columnar]')
+
+Sans lui, le pipeline CSV fonctionne entièrement ; les chemins colonnaires
+(--format parquet|feather de preprocessed.py et forecast.py, lecture d'un
+fichier prétraité .parquet/.feather par train.py, validation.py...) échouent
+tôt avec un message explicite au lieu d'une ImportError au milieu d'un run.
+La présence de pyarrow est testée sans l'importer (démarrage inchangé).
+-------------------------------------------------------------------------------
+"""
+
+import importlib.util
+from pathlib import Path
+
+COLUMNAR_SUFFIXES = (".parquet", ".feather")
+INSTALL_HINT = "uv sync --extra columnar (ou pip install 'pyarrow')"
+
+
+def has_pyarrow() -> bool:
+    try:
+        return importlib.util.find_spec("pyarrow") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def missing_message(what: str) -> str:
+    return f"{what} requiert pyarrow (extra 'columnar'), non installé : {INSTALL_HINT}"
+
+
+def require_pyarrow(what: str) -> None:
+    """
+    Lève ImportError avec un message explicite si pyarrow est absent.
+    """
+    if not has_pyarrow():
+        raise ImportError(missing_message(what))
+
+
+def require_for(path: Path) -> None:
+    """
+    Vérifie pyarrow avant de lire ou d'écrire 'path' s'il est colonnaire.
+    """
+    if Path(path).suffix in COLUMNAR_SUFFIXES:
+        require_pyarrow(f"Le fichier {Path(path).name}")
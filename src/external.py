@@ -0,0 +1,287 @@
+"""
+-------------------------------------------------------------------------------
+Entraînement hors mémoire (train.py --external-memory).
+
+Les fichiers prétraités (le dernier, ou plusieurs partitions consécutives en
+ordre chronologique) ne sont jamais chargés entièrement : ils sont lus par
+lots de 'batch_rows' lignes (CSV par blocs pandas, Parquet par lots pyarrow,
+Feather par lots d'un fichier projeté en mémoire), avec le fichier annexe des
+instants '.ts' lu au même rythme. Chaque lot reçoit les mêmes transformations
+que l'entraînement en mémoire (variables temporelles, infer_X_y) : les
+dernières lignes du lot précédent servent de contexte, si bien que décalages
+et moyennes glissantes sont continus d'un lot à l'autre et que les colonnes
+du modèle sont identiques.
+
+XGBoost consomme les lots via un xgboost.DataIter : ExtMemQuantileDMatrix
+quantifie les lots (tree_method 'hist') et écrit ses pages dans un dossier
+de cache sur disque ; seul le lot courant (et la page en cours) réside en
+mémoire, quelle que soit la taille de l'historique.
+
+Évaluation : comme en mémoire, les TEST_FRACTION dernières lignes sont
+exclues de l'entraînement. Elles sont prédites lot par lot et RMSE, MAE et R²
+sont accumulés (StreamingMetrics : sommes des erreurs, moyenne et somme des
+carrés des écarts de la cible combinées par lot) sans conserver les
+prédictions.
+-------------------------------------------------------------------------------
+"""
+
+import os
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+import xgboost
+
+from columnar import require_for
+from features import CONTEXT_ROWS, time_features
+
+# Paramètres sklearn sans équivalent direct dans xgboost.train
+SKLEARN_ONLY = ("n_estimators", "random_state", "n_jobs")
+
+Prepare = Callable[[pd.DataFrame, pd.DataFrame | None], tuple[pd.DataFrame, pd.Series]]
+
+
+# --------------------------------------------------------------------------- #
+# Lecture par lots
+# --------------------------------------------------------------------------- #
+def count_lines(path: Path, block: int = 1 << 20) -> int:
+    """
+    Nombre de lignes d'un fichier texte, lu par blocs (mémoire constante).
+    """
+    n, last = 0, b"\n"
+    with open(path, "rb") as fh:
+        while chunk := fh.read(block):
+            n += chunk.count(b"\n")
+            last = chunk[-1:]
+    return n + (last != b"\n")
+
+
+def count_rows(path: Path) -> int:
+    """
+    Nombre de lignes de données d'un fichier prétraité, sans le charger.
+    """
+    require_for(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    if path.suffix == ".feather":
+        import pyarrow as pa
+
+        with pa.memory_map(str(path)) as src:
+            reader = pa.ipc.open_file(src)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    return max(count_lines(path) - 1, 0)  # en-tête
+
+
+def _rebatch(frames: Iterator[pd.DataFrame], batch_rows: int) -> Iterator[pd.DataFrame]:
+    # Lots d'exactement 'batch_rows' lignes (sauf le dernier), alignés sur le '.ts'
+    pending: list[pd.DataFrame] = []
+    size = 0
+    for frame in frames:
+        pending.append(frame)
+        size += len(frame)
+        while size >= batch_rows:
+            merged = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+            yield merged.iloc[:batch_rows]
+            rest = merged.iloc[batch_rows:]
+            pending, size = ([rest], len(rest)) if len(rest) else ([], 0)
+    if size:
+        yield pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+
+
+def read_batches(path: Path, batch_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Lots successifs de 'batch_rows' lignes d'un fichier prétraité.
+    """
+    require_for(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_rows)
+        yield from _rebatch((b.to_pandas() for b in batches), batch_rows)
+    elif path.suffix == ".feather":
+        import pyarrow as pa
+
+        with pa.memory_map(str(path)) as src:
+            reader = pa.ipc.open_file(src)
+            frames = (reader.get_batch(i).to_pandas() for i in range(reader.num_record_batches))
+            yield from _rebatch(frames, batch_rows)
+    else:
+        with pd.read_csv(path, chunksize=batch_rows) as reader:
+            yield from reader
+
+
+def read_timestamps(ts_path: Path, batch_rows: int) -> Iterator[pd.DatetimeIndex]:
+    with pd.read_csv(ts_path, header=None, dtype="int64", chunksize=batch_rows) as reader:
+        for chunk in reader:
+            yield pd.DatetimeIndex(pd.to_datetime(chunk[0].to_numpy(), unit="s", utc=True))
+
+
+class BatchStream:
+    """
+    Lots (X, y) float32 des lignes [start, stop) de 'sources' lues bout à bout.
+    'timestamps' donne, par source, son fichier annexe '.ts' (ou None pour
+    tous : pas de variables calendaires). Réitérable (une relecture par passe).
+    """
+
+    def __init__(self, sources: list[Path], batch_rows: int, prepare: Prepare,
+                 time_feats: bool = True, timestamps: list[Path] | None = None,
+                 start: int = 0, stop: int | None = None) -> None:
+        self.sources = sources
+        self.batch_rows = batch_rows
+        self.prepare = prepare
+        self.time_feats = time_feats
+        self.timestamps = timestamps
+        self.start = start
+        self.stop = stop
+
+    def __iter__(self) -> Iterator[tuple[pd.DataFrame, pd.Series]]:
+        columns = None
+        context: tuple[pd.DataFrame, pd.DatetimeIndex | None] | None = None
+        offset = 0
+        for i, path in enumerate(self.sources):
+            ts_iter = (read_timestamps(self.timestamps[i], self.batch_rows)
+                       if self.timestamps else None)
+            for wide in read_batches(path, self.batch_rows):
+                if columns is None:
+                    columns = list(wide.columns)
+                elif list(wide.columns) != columns:
+                    raise ValueError(f"Colonnes de {path.name} différentes de la première "
+                                     f"partition : {list(wide.columns)} != {columns}")
+                ts = next(ts_iter) if ts_iter is not None else None
+                lo, hi = offset, offset + len(wide)
+                offset = hi
+                if self.stop is not None and lo >= self.stop:
+                    return
+                batch = self._prepare(wide, ts, context) if hi > self.start else None
+                if self.time_feats:
+                    context = (wide.iloc[-CONTEXT_ROWS:],
+                               ts[-CONTEXT_ROWS:] if ts is not None else None)
+                if batch is None:
+                    continue
+                X, y = batch
+                first = max(self.start - lo, 0)
+                last = len(wide) - max(hi - self.stop, 0) if self.stop is not None else len(wide)
+                yield X.iloc[first:last], y.iloc[first:last]
+
+    def _prepare(self, wide: pd.DataFrame, ts: pd.DatetimeIndex | None,
+                 context: tuple[pd.DataFrame, pd.DatetimeIndex | None] | None
+                 ) -> tuple[pd.DataFrame, pd.Series]:
+        if not self.time_feats:
+            return self.prepare(wide, None)
+        n_ctx = 0
+        if context is not None:
+            n_ctx = len(context[0])
+            wide = pd.concat([context[0], wide], ignore_index=True)
+            if ts is not None and context[1] is not None:
+                ts = context[1].append(ts)
+        feats = time_features(wide, ts)
+        X, y = self.prepare(wide, feats)
+        return X.iloc[n_ctx:], y.iloc[n_ctx:]
+
+
+# --------------------------------------------------------------------------- #
+# XGBoost
+# --------------------------------------------------------------------------- #
+class BatchIter(xgboost.DataIter):
+    """
+    Itérateur XGBoost sur un BatchStream ; pages du cache écrites sous
+    'cache_prefix' (sur disque).
+    """
+
+    def __init__(self, stream: BatchStream, cache_prefix: str) -> None:
+        self._stream = stream
+        self._it: Iterator[tuple[pd.DataFrame, pd.Series]] | None = None
+        super().__init__(cache_prefix=cache_prefix, on_host=False)
+
+    def next(self, input_data: Callable) -> bool:
+        if self._it is None:
+            self._it = iter(self._stream)
+        batch = next(self._it, None)
+        if batch is None:
+            return False
+        X, y = batch
+        input_data(data=X.to_numpy(dtype=np.float32), label=y.to_numpy(dtype=np.float32),
+                   feature_names=[str(c) for c in X.columns])
+        return True
+
+    def reset(self) -> None:
+        self._it = None
+
+
+def native_params(params: dict) -> dict:
+    """
+    Paramètres de model_params() (noms sklearn) pour xgboost.train.
+    """
+    native = {k: v for k, v in params.items() if k not in SKLEARN_ONLY}
+    native["seed"] = params.get("random_state", 0)
+    if params.get("n_jobs"):
+        native["nthread"] = params["n_jobs"]
+    return native
+
+
+class StreamingMetrics:
+    """
+    RMSE, MAE et R² accumulés lot par lot (mêmes valeurs que
+    train.compute_metrics sur l'ensemble des lots).
+    """
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.sse = 0.0
+        self.sae = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        y = np.asarray(y_true, dtype=np.float64)
+        if not len(y):
+            return
+        err = y - np.asarray(y_pred, dtype=np.float64)
+        self.sse += float(err @ err)
+        self.sae += float(np.abs(err).sum())
+        # Combinaison de la moyenne et de la somme des carrés des écarts (Chan)
+        n_b, mean_b = len(y), float(y.mean())
+        m2_b = float(((y - mean_b) ** 2).sum())
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.mean += delta * n_b / n
+        self.n = n
+
+    def result(self) -> dict:
+        if self.n == 0:
+            return {"rmse": float("nan"), "mae": float("nan"), "r2": float("nan")}
+        if self.n == 1:
+            r2 = float("nan")
+        elif self.m2 == 0:
+            r2 = 1.0 if self.sse == 0 else 0.0
+        else:
+            r2 = 1.0 - self.sse / self.m2
+        return {"rmse": float(np.sqrt(self.sse / self.n)), "mae": self.sae / self.n, "r2": r2}
+
+
+def train_external(train_stream: BatchStream, test_stream: BatchStream, params: dict,
+                   cache_dir: Path) -> tuple[object, dict, list[str]]:
+    """
+    Entraîne sur 'train_stream' via le cache disque 'cache_dir' puis évalue
+    sur 'test_stream'. Renvoie (XGBRegressor, métriques, colonnes).
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    it = BatchIter(train_stream, os.path.join(cache_dir, "xgb"))
+    dtrain = xgboost.ExtMemQuantileDMatrix(it, max_bin=params.get("max_bin"))
+    features = list(dtrain.feature_names or [])
+    booster = xgboost.train(native_params(params), dtrain,
+                            num_boost_round=params["n_estimators"])
+    del dtrain, it
+
+    metrics = StreamingMetrics()
+    for X, y in test_stream:
+        metrics.update(y.to_numpy(), booster.inplace_predict(X.to_numpy(dtype=np.float32)))
+
+    # Estimateur sklearn (sauvegarde, serve.py et mode continue inchangés)
+    model = xgboost.XGBRegressor(**params)
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    return model, metrics.result(), features
@@ -0,0 +1,78 @@
+"""
+-------------------------------------------------------------------------------
+Variables temporelles pour l'entraînement (src/train.py).
+
+Le fichier prétraité ne contient pas de colonne 'timestamp' (contrat des
+tests) : l'ordre chronologique des lignes est celui du pivot et les instants
+correspondants sont conservés dans un fichier annexe (voir
+preprocessed._timestamps_path), une ligne par ligne prétraitée.
+
+Pour chaque modèle GPU (colonne de la table large) :
+  - <gpu>_lag<k>   : ventes k lignes plus tôt
+  - <gpu>_roll<w>  : moyenne des ventes des w lignes précédentes (la ligne
+                     courante est exclue : aucune fuite de la cible)
+et, si les instants sont disponibles, des variables calendaires : heure,
+minute de la journée, jour de la semaine, jour du mois.
+
+Les décalages et moyennes glissantes sont des opérations fenêtrées
+vectorisées de pandas (shift, rolling) : coût O(n) par variable, aucune
+boucle Python sur les lignes. Les valeurs sont écrites dans un unique bloc
+float32 (type d'XGBoost) et les premières lignes sans historique restent
+NaN (gérées par XGBoost).
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_LAGS = (1, 2, 3, 6, 12)
+DEFAULT_WINDOWS = (3, 12, 60)
+# Lignes d'historique nécessaires aux décalages et moyennes glissantes
+CONTEXT_ROWS = max(DEFAULT_LAGS + DEFAULT_WINDOWS)
+
+
+def lag_features(wide: pd.DataFrame, lags: tuple[int, ...] = DEFAULT_LAGS,
+                 windows: tuple[int, ...] = DEFAULT_WINDOWS) -> pd.DataFrame:
+    """
+    Décalages et moyennes glissantes (sur le passé strict) de chaque colonne.
+    """
+    values = wide.to_numpy(dtype=np.float32)
+    n_rows, n_cols = values.shape
+    names = [f"{c}_lag{k}" for k in lags for c in wide.columns]
+    names += [f"{c}_roll{w}" for w in windows for c in wide.columns]
+
+    # Un seul bloc float32 rempli par tranches (pas de concaténation ni de
+    # conversion finale) : transmis sans copie à train.infer_X_y
+    out = np.full((n_rows, len(names)), np.nan, dtype=np.float32)
+    for i, k in enumerate(lags):
+        if k < n_rows:
+            out[k:, i * n_cols:(i + 1) * n_cols] = values[:n_rows - k]
+    past = pd.DataFrame(values, index=wide.index, copy=False).shift(1)
+    for i, w in enumerate(windows, start=len(lags)):
+        out[:, i * n_cols:(i + 1) * n_cols] = past.rolling(w, min_periods=1).mean().to_numpy()
+    return pd.DataFrame(out, columns=names, index=wide.index, copy=False)
+
+
+def calendar_features(timestamps: pd.DatetimeIndex, index: pd.Index) -> pd.DataFrame:
+    """
+    Variables calendaires des instants (alignées sur 'index').
+    """
+    return pd.DataFrame({
+        "hour": timestamps.hour.to_numpy(np.float32),
+        "minute_of_day": (timestamps.hour * 60 + timestamps.minute).to_numpy(np.float32),
+        "dayofweek": timestamps.dayofweek.to_numpy(np.float32),
+        "day": timestamps.day.to_numpy(np.float32),
+    }, index=index)
+
+
+def time_features(wide: pd.DataFrame, timestamps: pd.DatetimeIndex | None = None,
+                  lags: tuple[int, ...] = DEFAULT_LAGS,
+                  windows: tuple[int, ...] = DEFAULT_WINDOWS) -> pd.DataFrame:
+    """
+    Toutes les variables temporelles de la table large 'wide' (colonnes
+    numériques, lignes en ordre chronologique).
+    """
+    feats = lag_features(wide.select_dtypes(include=[np.number]), lags, windows)
+    if timestamps is not None:
+        feats = pd.concat([feats, calendar_features(timestamps, wide.index)], axis=1)
+    return feats
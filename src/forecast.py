@@ -0,0 +1,453 @@
+"""
+-------------------------------------------------------------------------------
+Ce script forecast.py produit les prévisions des ventes de chaque modèle GPU
+(colonnes de la table large) sur un horizon de --horizon pas, pour une ou
+plusieurs séries (historiques indépendants de mêmes colonnes GPU).
+
+1. L'historique récent est relu au format large de _clean_dataframe : fin du
+   dernier fichier prétraité (catalogue de 'data/processed/', lu par lots ;
+   seules les dernières lignes utiles aux variables temporelles sont gardées)
+   avec son fichier annexe des instants, ou --raw : un ou plusieurs CSV bruts
+   longs (timestamp, model, sales), une série chacun, nettoyés et pivotés par
+   les fonctions de preprocessed.py puis alignés sur l'union des colonnes
+   (ventes absentes = 0).
+2. Les modèles sont chargés une seule fois : un modèle par colonne GPU dans
+   'model/targets/' (train.py --targets) et le modèle principal ('model/latest',
+   sinon 'model/model.pkl') pour sa cible (première colonne). Les colonnes sans
+   modèle sont prolongées par persistance (dernière valeur).
+3. Prévision récursive : à chaque pas, les variables explicatives de toutes
+   les séries (colonnes GPU contemporaines estimées par la valeur du pas
+   précédent, décalages, moyennes glissantes, calendrier) sont calculées en
+   une seule matrice NumPy (séries x variables), avec les mêmes noms que
+   src/features.py, sur un tampon historique + prévisions (séries x lignes x
+   colonnes). Chaque modèle est appelé une seule fois par pas sur toute la
+   matrice (Booster.inplace_predict, sans DataFrame ni DMatrix) :
+   n_modèles x horizon appels au total, quel que soit le nombre de séries
+   (le minimum pour une récursion où le pas h dépend des prévisions du pas
+   h - 1). Les historiques de longueurs différentes sont alignés à droite.
+4. Les prévisions sont écrites au format long (CSV par défaut ; Parquet ou
+   Feather, typés, avec pyarrow : extra 'columnar') dans 'data/forecasts/' :
+     series (category), timestamp (datetime UTC), step (int16),
+     model (category), forecast (float32),
+     method (category : model | persistence)
+
+Usage :
+    python src/forecast.py [--horizon 60] [--processed-dir data/processed]
+                           [--raw data/raw/a.csv [b.csv ...]] [--model-dir model]
+                           [--freq-seconds 60] [--format csv|parquet|feather]
+                           [--output data/forecasts/forecast_X.csv]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# xgboost n'est importé qu'au chargement des modèles (src/artifacts.py)
+import catalog
+from columnar import has_pyarrow, missing_message
+from artifacts import is_artifact, load_model, resolve_latest
+from features import CONTEXT_ROWS, DEFAULT_LAGS, DEFAULT_WINDOWS, calendar_features
+from instrumentation import file_size, stage
+
+
+# --------------------------------------------------------------------------- #
+# Constantes de chemins
+# --------------------------------------------------------------------------- #
+ROOT = Path(__file__).resolve().parents[1]
+DATA_PROCESSED = ROOT / "data" / "processed"
+FORECAST_DIR = ROOT / "data" / "forecasts"
+MODEL_DIR = ROOT / "model"
+LOGS_DIR = ROOT / "logs"
+FORECAST_LOG = LOGS_DIR / "forecast.logs"
+
+# Nom du script dans les métriques d'instrumentation
+SCRIPT = "forecast"
+
+# Horizon par défaut : l'heure suivante au pas de collecte (une minute)
+DEFAULT_HORIZON = 60
+DEFAULT_FREQ_SECONDS = 60
+OUTPUT_FORMATS = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+# Taille des lots de lecture du fichier prétraité (mémoire constante)
+READ_BATCH_ROWS = 100_000
+
+
+# --------------------------------------------------------------------------- #
+# Logging
+# --------------------------------------------------------------------------- #
+def setup_logging() -> None:
+    """
+    Mise en place du logger en niveau INFO
+    """
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        filename=FORECAST_LOG,
+        level=logging.INFO,
+        format="[%(asctime)s] | %(levelname)s | %(message)s",
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Historique récent
+# --------------------------------------------------------------------------- #
+def _is_processed_file(path: Path) -> bool:
+    return path.name.startswith("sales_processed_") and path.suffix in OUTPUT_FORMATS.values()
+
+
+def find_latest_processed(processed_dir: Path) -> Path:
+    """
+    Dernier fichier prétraité : catalogue du dossier, sinon date de modification.
+    """
+    entry = catalog.latest_entry(processed_dir, _is_processed_file)
+    if entry is not None:
+        return entry["path"]
+    candidates = [p for p in processed_dir.glob("sales_processed_*") if _is_processed_file(p)]
+    if not candidates:
+        raise FileNotFoundError(f"Aucun fichier prétraité trouvé dans {processed_dir}")
+    return max(candidates, key=lambda p: p.stat().st_mtime)
+
+
+def _tail(frames, n_rows: int) -> tuple[pd.DataFrame | pd.Index | None, int]:
+    """
+    'n_rows' derniers éléments d'une suite de lots et nombre total d'éléments.
+    """
+    kept: deque = deque()
+    size = total = 0
+    for frame in frames:
+        kept.append(frame)
+        size += len(frame)
+        total += len(frame)
+        while size - len(kept[0]) >= n_rows:
+            size -= len(kept.popleft())
+    if not kept:
+        return None, 0
+    if isinstance(kept[0], pd.Index):
+        return kept[0].append(list(kept)[1:])[-n_rows:], total
+    return pd.concat(kept, ignore_index=True).iloc[-n_rows:], total
+
+
+def load_processed_history(path: Path, n_rows: int = CONTEXT_ROWS
+                           ) -> tuple[pd.DataFrame, pd.DatetimeIndex | None]:
+    """
+    'n_rows' dernières lignes du fichier prétraité (lu par lots) et leurs
+    instants (fichier annexe '.ts'), ou None si celui-ci est absent ou désaligné.
+    """
+    from external import read_batches, read_timestamps
+
+    wide, total = _tail(read_batches(path, READ_BATCH_ROWS), n_rows)
+    if wide is None or wide.empty:
+        raise ValueError(f"Fichier prétraité vide : {path}")
+    ts_path = path.with_name(path.name + ".ts")
+    timestamps = None
+    if ts_path.exists() and ts_path.stat().st_size:
+        timestamps, n_ts = _tail(read_timestamps(ts_path, READ_BATCH_ROWS), n_rows)
+        if n_ts != total:
+            logging.warning(f"Fichier des instants désaligné ({n_ts} != {total}) : ignoré")
+            timestamps = None
+    return wide.reset_index(drop=True), timestamps
+
+
+def load_raw_history(path: Path, n_rows: int = CONTEXT_ROWS
+                     ) -> tuple[pd.DataFrame, pd.DatetimeIndex]:
+    """
+    CSV brut long remis au format large de _clean_dataframe (mêmes étapes :
+    agrégation, pivot, entiers) ; instants conservés depuis l'index du pivot.
+    """
+    from preprocessed import _aggregate_long, _finalize_wide, _pivot_wide
+
+    wide = _pivot_wide(_aggregate_long(pd.read_csv(path))).iloc[-n_rows:]
+    if wide.empty:
+        raise ValueError(f"Aucune donnée exploitable dans {path}")
+    timestamps = pd.DatetimeIndex(wide.index)
+    if timestamps.tz is None:
+        timestamps = timestamps.tz_localize("UTC")
+    return _finalize_wide(wide), timestamps
+
+
+def future_timestamps(timestamps: pd.DatetimeIndex | None, horizon: int,
+                      freq_seconds: float | None = None) -> pd.DatetimeIndex | None:
+    """
+    Instants des pas de prévision : dernier instant + k x pas (médiane des
+    écarts de l'historique, sinon DEFAULT_FREQ_SECONDS).
+    """
+    if timestamps is None or len(timestamps) == 0:
+        return None
+    if freq_seconds is None:
+        diffs = (timestamps[1:] - timestamps[:-1]).total_seconds()
+        freq_seconds = float(np.median(diffs)) if len(diffs) else DEFAULT_FREQ_SECONDS
+    steps = pd.to_timedelta(np.arange(1, horizon + 1) * freq_seconds, unit="s")
+    return pd.DatetimeIndex(timestamps[-1] + steps)
+
+
+# --------------------------------------------------------------------------- #
+# Modèles
+# --------------------------------------------------------------------------- #
+def feature_layout(columns: list[str]) -> dict[str, int]:
+    """
+    Position de chaque variable explicative possible (noms de src/features.py)
+    dans le vecteur calculé à chaque pas.
+    """
+    names = list(columns)
+    names += [f"{c}_lag{k}" for k in DEFAULT_LAGS for c in columns]
+    names += [f"{c}_roll{w}" for w in DEFAULT_WINDOWS for c in columns]
+    names += list(calendar_features(pd.DatetimeIndex([], tz="UTC"), pd.RangeIndex(0)).columns)
+    return {name: i for i, name in enumerate(names)}
+
+
+def main_model_path(model_dir: Path) -> Path | None:
+    latest = resolve_latest(model_dir)
+    if latest is not None:
+        return latest
+    standard = model_dir / "model.pkl"
+    return standard if standard.exists() else None
+
+
+def load_models(model_dir: Path, columns: list[str]) -> dict[str, tuple[object, Path]]:
+    """
+    Cible -> (booster, artefact) : modèles de 'model/targets/' puis modèle
+    principal pour sa cible (première colonne) si elle n'a pas le sien.
+    """
+    models = {}
+    targets_dir = model_dir / "targets"
+    if targets_dir.is_dir():
+        for path in sorted(targets_dir.iterdir()):
+            target = path.name.split(".", 1)[0].removeprefix("model_")
+            if is_artifact(path) and target in columns:
+                models[target] = (load_model(path).get_booster(), path)  # type: ignore
+    main_path = main_model_path(model_dir)
+    if main_path is not None and columns and columns[0] not in models:
+        models[columns[0]] = (load_model(main_path).get_booster(), main_path)  # type: ignore
+    return models
+
+
+def feature_index(booster: object, layout: dict[str, int]) -> np.ndarray:
+    names = booster.feature_names  # type: ignore
+    if not names:
+        raise ValueError("Modèle sans noms de variables : impossible d'aligner les colonnes")
+    unknown = [n for n in names if n not in layout]
+    if unknown:
+        raise ValueError(f"Variables du modèle absentes de l'historique : {unknown[:5]}")
+    return np.array([layout[n] for n in names], dtype=np.intp)
+
+
+# --------------------------------------------------------------------------- #
+# Prévision récursive
+# --------------------------------------------------------------------------- #
+def forecast_batch(histories: list[pd.DataFrame], models: dict[str, object], horizon: int,
+                   futures: list[pd.DatetimeIndex | None] | None = None
+                   ) -> tuple[np.ndarray, int]:
+    """
+    Prévisions (séries x horizon x colonnes, float32) de toutes les colonnes
+    de chaque historique de 'histories' (mêmes colonnes, longueurs libres) ;
+    'models' associe une cible à son booster. Renvoie aussi le nombre
+    d'appels à predict (indépendant du nombre de séries).
+    """
+    columns = list(histories[0].columns)
+    if any(list(h.columns) != columns for h in histories):
+        raise ValueError("Les historiques doivent avoir les mêmes colonnes")
+    n_series, n_cols = len(histories), len(columns)
+    lengths = np.array([len(h) for h in histories])
+    n_hist = int(lengths.max())
+    # Historiques alignés à droite : 'start' est la première ligne de chacun
+    start = n_hist - lengths
+    rows = np.arange(n_series)
+    layout = feature_layout(columns)
+    plan = [(columns.index(t), b, feature_index(b, layout)) for t, b in models.items()]
+    lags = np.array(DEFAULT_LAGS)
+
+    # Tampon historique + prévisions, et sommes cumulées (moyennes glissantes)
+    buf = np.full((n_series, n_hist + horizon, n_cols), np.nan, dtype=np.float32)
+    for i, history in enumerate(histories):
+        buf[i, start[i]:n_hist] = history.to_numpy(dtype=np.float32)
+    csum = np.zeros((n_series, n_hist + horizon + 1, n_cols), dtype=np.float64)
+    np.cumsum(np.nan_to_num(buf[:, :n_hist]), axis=1, out=csum[:, 1:n_hist + 1])
+
+    n_cal = len(layout) - n_cols * (1 + len(DEFAULT_LAGS) + len(DEFAULT_WINDOWS))
+    calendar = np.full((n_series, horizon, n_cal), np.nan, dtype=np.float32)
+    for i, future in enumerate(futures or []):
+        if future is not None:
+            calendar[i] = calendar_features(future, pd.RangeIndex(horizon)).to_numpy(np.float32)
+
+    X = np.empty((n_series, len(layout)), dtype=np.float32)
+    n_calls = 0
+    for h in range(horizon):
+        r = n_hist + h
+        # Colonnes contemporaines : persistance du pas précédent
+        buf[:, r] = buf[:, r - 1]
+        X[:, :n_cols] = buf[:, r]
+        past = r - lags
+        lagged = buf[:, np.maximum(past, 0)]
+        lagged[past[None, :] < start[:, None]] = np.nan
+        X[:, n_cols:n_cols * (1 + len(lags))] = lagged.reshape(n_series, -1)
+        offset = n_cols * (1 + len(lags))
+        for w in DEFAULT_WINDOWS:
+            lo = np.maximum(r - w, start)
+            X[:, offset:offset + n_cols] = (csum[:, r] - csum[rows, lo]) / (r - lo)[:, None]
+            offset += n_cols
+        X[:, offset:] = calendar[:, h]
+
+        # Un appel par modèle et par pas pour toutes les séries ; ventes
+        # négatives ramenées à 0
+        for col, booster, idx in plan:
+            buf[:, r, col] = np.maximum(booster.inplace_predict(X[:, idx]), 0.0)  # type: ignore
+            n_calls += 1
+        csum[:, r + 1] = csum[:, r] + buf[:, r]
+    return buf[:, n_hist:], n_calls
+
+
+def forecast(history: pd.DataFrame, models: dict[str, object], horizon: int,
+             future: pd.DatetimeIndex | None = None) -> tuple[np.ndarray, int]:
+    """
+    Prévisions (horizon x colonnes) d'un seul historique (voir forecast_batch).
+    """
+    values, n_calls = forecast_batch([history], models, horizon, [future])
+    return values[0], n_calls
+
+
+def to_long(values: np.ndarray, columns: list[str], modeled: set[str],
+            futures: list[pd.DatetimeIndex | None], series: list[str]) -> pd.DataFrame:
+    """
+    Prévisions au format long typé (une ligne par série, pas et colonne GPU).
+    """
+    n_series, horizon, n_cols = values.shape
+    nat = pd.DatetimeIndex([pd.NaT] * horizon, tz="UTC")
+    timestamps = pd.DatetimeIndex(np.concatenate([
+        (future if future is not None else nat).tz_convert(None).repeat(n_cols).to_numpy()
+        for future in futures])).tz_localize("UTC")
+    per_series = horizon * n_cols
+    return pd.DataFrame({
+        "series": pd.Categorical(np.repeat(series, per_series), categories=series),
+        "timestamp": timestamps,
+        "step": np.tile(np.repeat(np.arange(1, horizon + 1, dtype=np.int16), n_cols), n_series),
+        "model": pd.Categorical(np.tile(columns, horizon * n_series), categories=columns),
+        "forecast": values.ravel(),
+        "method": pd.Categorical(
+            np.tile(["model" if c in modeled else "persistence" for c in columns],
+                    horizon * n_series),
+            categories=["model", "persistence"]),
+    })
+
+
+def save_forecast(df: pd.DataFrame, path: Path, fmt: str) -> Path:
+    """
+    Écrit les prévisions (fichier temporaire puis renommage atomique).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False)
+    elif fmt == "feather":
+        df.to_feather(tmp)
+    else:
+        df.to_csv(tmp, index=False, date_format="%Y-%m-%dT%H:%M:%SZ")
+    os.replace(tmp, path)
+    return path
+
+
+# --------------------------------------------------------------------------- #
+# Main
+# --------------------------------------------------------------------------- #
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Prévisions multi-pas des ventes de chaque modèle GPU."
+    )
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON,
+                        help="Nombre de pas de prévision (défaut: 60, l'heure suivante).")
+    parser.add_argument("--processed-dir", type=str, default=str(DATA_PROCESSED),
+                        help="Dossier des fichiers prétraités (défaut: data/processed).")
+    parser.add_argument("--raw", type=str, nargs="+", default=None,
+                        help="CSV brut(s) long(s) (timestamp, model, sales) à utiliser comme "
+                             "historique(s) à la place du dernier fichier prétraité ; "
+                             "une série par fichier.")
+    parser.add_argument("--model-dir", type=str, default=str(MODEL_DIR),
+                        help="Dossier des modèles (défaut: model).")
+    parser.add_argument("--freq-seconds", type=float, default=None,
+                        help="Pas de temps des prévisions (défaut: médiane de l'historique).")
+    parser.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default=None,
+                        help="Format du fichier de sortie (défaut: extension de --output, "
+                             "sinon csv ; parquet et feather, typés, requièrent pyarrow).")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Fichier de sortie (défaut: data/forecasts/forecast_<date>.<ext>).")
+    args = parser.parse_args(argv)
+    fmt = args.format or next((f for f, ext in OUTPUT_FORMATS.items()
+                               if args.output and args.output.endswith(ext)), "csv")
+    if fmt != "csv" and not has_pyarrow():
+        parser.error(missing_message(f"Le format {fmt}"))
+
+    setup_logging()
+    logging.info("=== Début des prévisions ===")
+    try:
+        if args.horizon < 1:
+            raise ValueError(f"--horizon doit être positif ({args.horizon})")
+
+        # Historiques récents au format large (une série par source)
+        sources = ([Path(p) for p in args.raw] if args.raw
+                   else [find_latest_processed(Path(args.processed_dir))])
+        with stage(SCRIPT, "load_history",
+                   bytes_read=sum(file_size(p) for p in sources)) as st:
+            loaded_history = [load_raw_history(p) if args.raw else load_processed_history(p)
+                              for p in sources]
+            st.rows_out = sum(len(h) for h, _ in loaded_history)
+        columns = sorted({str(c) for h, _ in loaded_history for c in h.columns})
+        histories, futures_ts = [], []
+        for history, timestamps in loaded_history:
+            history.columns = [str(c) for c in history.columns]
+            histories.append(history.reindex(columns=columns, fill_value=0))
+            futures_ts.append(timestamps)
+        for source, history in zip(sources, histories):
+            logging.info(f"Historique : {source.name} | {len(history)} lignes | "
+                         f"{len(columns)} colonnes GPU")
+
+        # Modèles chargés une seule fois
+        with stage(SCRIPT, "load_models") as st:
+            loaded = load_models(Path(args.model_dir), columns)
+            st.set(n_models=len(loaded))
+        for target, (_, path) in sorted(loaded.items()):
+            logging.info(f"Modèle {target} : {path}")
+        missing = [c for c in columns if c not in loaded]
+        if missing:
+            logging.warning(f"Colonnes sans modèle (persistance) : {missing}")
+
+        # Prévision récursive de toutes les séries à la fois
+        futures = [future_timestamps(ts, args.horizon, args.freq_seconds) for ts in futures_ts]
+        with stage(SCRIPT, "forecast",
+                   rows_in=len(histories) * len(columns) * args.horizon) as st:
+            values, n_calls = forecast_batch(histories, {t: b for t, (b, _) in loaded.items()},
+                                             args.horizon, futures)
+            st.set(predict_calls=n_calls, n_series=len(histories))
+        logging.info(f"Prévisions : {len(histories)} série(s) x {len(columns)} colonnes x "
+                     f"{args.horizon} pas ({n_calls} appels à predict)")
+
+        # Sortie typée
+        out = Path(args.output) if args.output else (
+            FORECAST_DIR / f"forecast_{datetime.now():%Y%m%d_%H%M}{OUTPUT_FORMATS[fmt]}")
+        with stage(SCRIPT, "save") as st:
+            series = [p.name.split(".", 1)[0] for p in sources]
+            if len(set(series)) < len(series):
+                series = [str(p) for p in sources]
+            save_forecast(to_long(values, columns, set(loaded), futures, series), out, fmt)
+            st.bytes_written = file_size(out)
+        logging.info(f"Prévisions enregistrées : {out}")
+        print(f"[forecast.py] {out}")
+        logging.info("=== Fin des prévisions ===")
+        return 0
+
+    except FileNotFoundError as e:
+        logging.error(str(e))
+        print(str(e))
+        return 2
+    except Exception as e:
+        logging.exception("Erreur lors des prévisions")
+        print(f"Erreur lors des prévisions: {e}")
+        return 1
+
+
+# Pour l'appel par script avec code retour SystemExit
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,290 @@
+"""
+-------------------------------------------------------------------------------
+Instrumentation commune du pipeline (preprocessed.py, train.py, collect.sh).
+
+Chaque étape instrumentée produit une ligne JSON dans 'logs/metrics.jsonl'
+(ou le fichier désigné par PIPELINE_METRICS_FILE) :
+
+  {"ts": "...", "run_id": "...", "script": "train", "stage": "fit",
+   "status": "ok", "wall_s": 1.23, "cpu_s": 1.20, "peak_rss_mib": 312.4,
+   "rows_in": 2986, "rows_out": null, "bytes_read": null, "bytes_written": null}
+
+  - wall_s / cpu_s : temps écoulé et temps CPU du processus pendant l'étape
+  - peak_rss_mib   : pic de RSS du processus atteint à la fin de l'étape
+  - rows_* / bytes_* : renseignés par l'étape quand ils ont un sens
+  - run_id         : PIPELINE_RUN_ID s'il est défini (pour regrouper collecte,
+                     prétraitement et entraînement d'une même exécution),
+                     sinon un identifiant propre au processus
+
+Chaque ligne est écrite en un seul ajout (O_APPEND) : des exécutions cron
+concurrentes n'entrelacent pas leurs enregistrements. Une erreur d'écriture
+des métriques est loguée mais n'interrompt jamais le pipeline.
+
+Profilage à la demande (PIPELINE_PROFILE=cprofile,tracemalloc) :
+  - cprofile    : profil de l'étape dans logs/profiles/<script>_<étape>_<run>.prof
+                  (lisible avec python -m pstats ou snakeviz)
+  - tracemalloc : pic des allocations Python/NumPy de l'étape (py_peak_mib) et
+                  principaux sites d'allocation (py_top)
+
+Rapport agrégé sur l'ensemble des exécutions :
+    python src/instrumentation.py [--file logs/metrics.jsonl] [--script train]
+                                  [--last-runs 50] [--json]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import cProfile
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+
+# --------------------------------------------------------------------------- #
+# Constantes
+# --------------------------------------------------------------------------- #
+ROOT = Path(__file__).resolve().parents[1]
+LOGS_DIR = ROOT / "logs"
+METRICS_FILE = Path(os.environ.get("PIPELINE_METRICS_FILE", LOGS_DIR / "metrics.jsonl"))
+PROFILE_DIR = LOGS_DIR / "profiles"
+PROFILE_ENV = "PIPELINE_PROFILE"
+RUN_ID = os.environ.get("PIPELINE_RUN_ID") or f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+# Champs renseignables par une étape
+COUNTERS = ("rows_in", "rows_out", "bytes_read", "bytes_written")
+
+
+# --------------------------------------------------------------------------- #
+# Mesures
+# --------------------------------------------------------------------------- #
+def peak_rss_mib() -> float:
+    """
+    Pic de RSS du processus (ru_maxrss : Kio sous Linux, octets sous macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def file_size(path: Path | str | None) -> int | None:
+    try:
+        return Path(path).stat().st_size if path is not None else None
+    except OSError:
+        return None
+
+
+def profile_modes() -> set[str]:
+    return {m.strip().lower() for m in os.environ.get(PROFILE_ENV, "").split(",") if m.strip()}
+
+
+class Stage:
+    """
+    Enregistrement d'une étape en cours ; l'appelant complète les compteurs
+    (st.rows_out = ..., st.set(mode="full")).
+    """
+
+    def __init__(self, script: str, name: str, **fields) -> None:
+        self.script = script
+        self.name = name
+        self.rows_in: int | None = None
+        self.rows_out: int | None = None
+        self.bytes_read: int | None = None
+        self.bytes_written: int | None = None
+        self.extra: dict = {}
+        self.set(**fields)
+
+    def set(self, **fields) -> None:
+        for key, value in fields.items():
+            if key in COUNTERS:
+                setattr(self, key, value)
+            else:
+                self.extra[key] = value
+
+
+def emit(record: dict) -> None:
+    """
+    Ajoute une ligne JSON au fichier de métriques (une seule écriture).
+    """
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    try:
+        METRICS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(METRICS_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        logging.warning(f"Métriques non enregistrées ({METRICS_FILE}) : {e}")
+
+
+@contextmanager
+def stage(script: str, name: str, **fields) -> Iterator[Stage]:
+    """
+    Chronomètre le bloc et émet son enregistrement (status 'error' si une
+    exception le traverse ; l'exception est propagée).
+    """
+    st = Stage(script, name, **fields)
+    modes = profile_modes()
+
+    profiler = None
+    if "cprofile" in modes:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Un autre profileur est actif (étape imbriquée) : on s'abstient
+            profiler = None
+    own_trace = "tracemalloc" in modes and not tracemalloc.is_tracing()
+    if own_trace:
+        tracemalloc.start()
+    elif "tracemalloc" in modes:
+        tracemalloc.reset_peak()
+
+    status = "ok"
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield st
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "run_id": RUN_ID,
+            "script": script,
+            "stage": name,
+            "status": status,
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "peak_rss_mib": round(peak_rss_mib(), 1),
+        }
+        record.update({key: getattr(st, key) for key in COUNTERS})
+        record.update(st.extra)
+
+        if profiler is not None:
+            profiler.disable()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            prof_path = PROFILE_DIR / f"{script}_{name}_{RUN_ID}.prof"
+            profiler.dump_stats(prof_path)
+            record["profile"] = str(prof_path)
+        if "tracemalloc" in modes and tracemalloc.is_tracing():
+            record["py_peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+            top = tracemalloc.take_snapshot().statistics("lineno")[:5]
+            record["py_top"] = [f"{s.traceback[0].filename}:{s.traceback[0].lineno} "
+                                f"{s.size / 1024:.0f} KiB" for s in top]
+            if own_trace:
+                tracemalloc.stop()
+        emit(record)
+
+
+# --------------------------------------------------------------------------- #
+# Rapport
+# --------------------------------------------------------------------------- #
+def load_metrics(path: Path) -> list[dict]:
+    """
+    Relit le fichier JSON-lines en ignorant les lignes illisibles
+    (ex. écriture interrompue).
+    """
+    records = []
+    if not path.exists():
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def summarize(records: list[dict], last_runs: int | None = None) -> list[dict]:
+    """
+    Agrège par (script, étape) : nombre d'exécutions, erreurs, temps
+    (moyenne, p50, p95, max), CPU moyen, pic de RSS et derniers compteurs.
+    Une pseudo-étape '(total)' somme les étapes de chaque exécution.
+    """
+    if last_runs:
+        runs = list(dict.fromkeys(r["run_id"] for r in records))[-last_runs:]
+        keep = set(runs)
+        records = [r for r in records if r["run_id"] in keep]
+
+    groups: dict[tuple[str, str], list[dict]] = {}
+    totals: dict[tuple[str, str], dict] = {}
+    for r in records:
+        groups.setdefault((r["script"], r["stage"]), []).append(r)
+        run = totals.setdefault((r["script"], r["run_id"]), {
+            "script": r["script"], "stage": "(total)", "run_id": r["run_id"],
+            "status": "ok", "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mib": 0.0,
+        })
+        run["wall_s"] += r.get("wall_s") or 0.0
+        run["cpu_s"] += r.get("cpu_s") or 0.0
+        run["peak_rss_mib"] = max(run["peak_rss_mib"], r.get("peak_rss_mib") or 0.0)
+        if r.get("status") != "ok":
+            run["status"] = "error"
+    for run in totals.values():
+        groups.setdefault((run["script"], "(total)"), []).append(run)
+
+    summary = []
+    for (script, name), rows in groups.items():
+        wall = np.asarray([r.get("wall_s") or 0.0 for r in rows])
+        last = rows[-1]
+        summary.append({
+            "script": script,
+            "stage": name,
+            "runs": len(rows),
+            "errors": sum(r.get("status") != "ok" for r in rows),
+            "wall_mean_s": float(wall.mean()),
+            "wall_p50_s": float(np.percentile(wall, 50)),
+            "wall_p95_s": float(np.percentile(wall, 95)),
+            "wall_max_s": float(wall.max()),
+            "cpu_mean_s": float(np.mean([r.get("cpu_s") or 0.0 for r in rows])),
+            "peak_rss_mib": max((r.get("peak_rss_mib") or 0.0) for r in rows),
+            **{f"last_{key}": last.get(key) for key in COUNTERS},
+        })
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Rapport agrégé des métriques par étape du pipeline."
+    )
+    parser.add_argument("--file", type=str, default=str(METRICS_FILE),
+                        help="Fichier de métriques JSON-lines (défaut: logs/metrics.jsonl).")
+    parser.add_argument("--script", type=str, default=None,
+                        help="Restreint le rapport à un script (collect, preprocessed, train).")
+    parser.add_argument("--last-runs", type=int, default=None,
+                        help="Ne considère que les N dernières exécutions.")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON.")
+    args = parser.parse_args(argv)
+
+    records = load_metrics(Path(args.file))
+    if args.script:
+        records = [r for r in records if r["script"] == args.script]
+    summary = summarize(records, args.last_runs)
+    if not summary:
+        print(f"Aucune métrique dans {args.file}")
+        return 1
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"{'script':<13} {'stage':<16} {'runs':>5} {'err':>4} {'mean s':>9} {'p50 s':>9} "
+          f"{'p95 s':>9} {'max s':>9} {'cpu s':>9} {'rss MiB':>8} {'rows out':>9}")
+    for s in summary:
+        rows_out = "-" if s["last_rows_out"] is None else s["last_rows_out"]
+        print(f"{s['script']:<13} {s['stage']:<16} {s['runs']:>5} {s['errors']:>4} "
+              f"{s['wall_mean_s']:>9.4f} {s['wall_p50_s']:>9.4f} {s['wall_p95_s']:>9.4f} "
+              f"{s['wall_max_s']:>9.4f} {s['cpu_mean_s']:>9.4f} {s['peak_rss_mib']:>8.1f} "
+              f"{rows_out:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,295 @@
+"""
+-------------------------------------------------------------------------------
+Ce script pipeline.py enchaîne collecte -> prétraitement -> entraînement dans
+un processus résident, en remplacement du lancement de 'make bash' par cron
+chaque minute (deux interpréteurs Python par exécution, chacun réimportant
+pandas, xgboost et sklearn).
+
+1. Les modules preprocessed et train (et donc pandas, xgboost, sklearn) sont
+   importés une seule fois ; chaque tick appelle directement leur main().
+   La collecte reste assurée par scripts/collect.sh (bash + curl, écriture
+   des lots par src/collect_writer.py, bibliothèque standard seule), lancé
+   en sous-processus ; son coût ne croît pas avec l'historique brut, ce qui
+   permet un --interval de 10 s.
+2. Un tick démarre toutes les --interval secondes. Un tick plus long que
+   l'intervalle ne se chevauche jamais avec le suivant : les ticks manqués
+   sont sautés et le suivant démarre immédiatement après.
+3. Chaque tick prend un verrou exclusif (flock sur data/.pipeline.lock),
+   également pris par 'make bash' : une exécution manuelle ou cron concurrente
+   fait sauter le tick au lieu de s'exécuter en parallèle.
+4. Une étape est sautée si ses entrées n'ont pas changé depuis sa dernière
+   exécution réussie : le prétraitement si l'instantané brut (fichier, taille
+   publiée, date de modification) est identique, l'entraînement si le dernier
+   fichier prétraité est identique.
+5. La latence de chaque étape et du tick complet est loguée dans
+   'logs/pipeline.logs' et émise dans 'logs/metrics.jsonl' (script 'pipeline').
+   Les logs de preprocessed.py et train.py restent écrits dans leurs fichiers
+   habituels pendant leur étape.
+
+Usage :
+    python src/pipeline.py [--interval 60] [--once | --ticks N] [--no-collect]
+                           [--preprocess-args "..."] [--train-args "..."]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import fcntl
+import logging
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import instrumentation
+import preprocessed
+import train
+from instrumentation import stage
+
+
+# --------------------------------------------------------------------------- #
+# Constantes de chemins
+# --------------------------------------------------------------------------- #
+ROOT = Path(__file__).resolve().parents[1]
+LOGS_DIR = ROOT / "logs"
+PIPELINE_LOG = LOGS_DIR / "pipeline.logs"
+COLLECT_SCRIPT = ROOT / "scripts" / "collect.sh"
+LOCK_FILE = ROOT / "data" / ".pipeline.lock"
+# Nom du script dans les métriques (logs/metrics.jsonl)
+SCRIPT = "pipeline"
+LOG_FORMAT = "[%(asctime)s] | %(levelname)s | %(message)s"
+
+
+# --------------------------------------------------------------------------- #
+# Logging
+# --------------------------------------------------------------------------- #
+def _file_handler(path: Path) -> logging.Handler:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def setup_logging() -> None:
+    """
+    Mise en place du logger en niveau INFO (logs/pipeline.logs)
+    """
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(_file_handler(PIPELINE_LOG))
+
+
+@contextmanager
+def stage_logging(path: Path) -> Iterator[None]:
+    """
+    Redirige temporairement le logger racine vers le fichier de log de l'étape
+    (le logging.basicConfig des modules est sans effet une fois configuré).
+    """
+    root = logging.getLogger()
+    saved, level = root.handlers[:], root.level
+    handler = _file_handler(path)
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    try:
+        yield
+    finally:
+        root.handlers = saved
+        root.setLevel(level)
+        handler.close()
+
+
+# --------------------------------------------------------------------------- #
+# Verrou et détection de changements
+# --------------------------------------------------------------------------- #
+@contextmanager
+def pipeline_lock(path: Path) -> Iterator[bool]:
+    """
+    Verrou exclusif non bloquant ; renvoie False si déjà détenu ailleurs
+    (autre démon, 'make bash' lancé par cron ou à la main).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _file_signature(path: Path, size: int | None = None) -> tuple:
+    st = path.stat()
+    return (str(path.resolve()), st.st_size if size is None else size, st.st_mtime_ns)
+
+
+def raw_signature() -> tuple | None:
+    """
+    Instantané brut que traiterait preprocessed.py (taille publiée par le
+    manifeste en mode append).
+    """
+    try:
+        path = preprocessed._find_latest_raw_csv()
+        return _file_signature(path, preprocessed._raw_snapshot_size(path))
+    except FileNotFoundError:
+        return None
+
+
+def processed_signature() -> tuple | None:
+    try:
+        return _file_signature(train.find_latest_processed_csv(train.DATA_PROCESSED))
+    except FileNotFoundError:
+        return None
+
+
+# --------------------------------------------------------------------------- #
+# Tick
+# --------------------------------------------------------------------------- #
+class Pipeline:
+    """
+    État résident entre les ticks : signatures des entrées déjà traitées.
+    """
+
+    def __init__(self, collect: bool = True, preprocess_args: list[str] | None = None,
+                 train_args: list[str] | None = None) -> None:
+        self.collect = collect
+        self.preprocess_args = preprocess_args or []
+        self.train_args = train_args or []
+        self.last_raw: tuple | None = None
+        self.last_processed: tuple | None = None
+        self.n_ticks = 0
+
+    def _collect(self) -> int:
+        env = dict(os.environ, PIPELINE_RUN_ID=self.run_id)
+        proc = subprocess.run(["bash", str(COLLECT_SCRIPT)], cwd=ROOT, env=env,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            logging.error(f"collect.sh (code {proc.returncode}) : {proc.stderr.strip()}")
+        return proc.returncode
+
+    def _preprocess(self) -> int | None:
+        signature = raw_signature()
+        if signature is not None and signature == self.last_raw:
+            return None
+        with stage_logging(preprocessed.LOG_FILE):
+            rc = preprocessed.main(self.preprocess_args)
+        if rc == 0:
+            self.last_raw = signature
+        return rc
+
+    def _train(self) -> int | None:
+        signature = processed_signature()
+        if signature is not None and signature == self.last_processed:
+            return None
+        with stage_logging(train.TRAIN_LOG):
+            rc = train.main(self.train_args)
+        if rc == 0:
+            self.last_processed = signature
+        return rc
+
+    def tick(self) -> dict:
+        """
+        Une exécution collecte -> prétraitement -> entraînement. Renvoie les
+        durées par étape (None si sautée) et le code retour global.
+        """
+        self.n_ticks += 1
+        # Un run_id par tick : regroupe les métriques des trois étapes
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-tick{self.n_ticks}"
+        instrumentation.RUN_ID = self.run_id
+        steps = [("preprocess", self._preprocess), ("train", self._train)]
+        if self.collect:
+            steps.insert(0, ("collect", self._collect))
+
+        report: dict = {"tick": self.n_ticks, "stages": {}, "rc": 0}
+        start = time.perf_counter()
+        with stage(SCRIPT, "tick", tick=self.n_ticks) as st:
+            with pipeline_lock(LOCK_FILE) as acquired:
+                if not acquired:
+                    logging.warning("Tick sauté : verrou détenu par une autre exécution")
+                    report.update(rc=None, seconds=time.perf_counter() - start)
+                    st.set(skipped="lock")
+                    return report
+                for name, func in steps:
+                    step_start = time.perf_counter()
+                    rc = func()
+                    elapsed = time.perf_counter() - step_start
+                    if rc is None:
+                        logging.info(f"{name} : sauté (entrées inchangées)")
+                        report["stages"][name] = None
+                        continue
+                    report["stages"][name] = elapsed
+                    logging.info(f"{name} : {elapsed:.3f} s (code {rc})")
+                    if rc != 0:
+                        report["rc"] = rc
+                        break
+            report["seconds"] = time.perf_counter() - start
+            st.set(rc=report["rc"], stages=report["stages"])
+        logging.info(f"Tick {self.n_ticks} terminé en {report['seconds']:.3f} s "
+                     f"(code {report['rc']})")
+        return report
+
+
+def run_forever(pipeline: Pipeline, interval: float, stop: threading.Event,
+                max_ticks: int | None = None) -> None:
+    """
+    Ticks à cadence fixe ; un tick en retard démarre dès la fin du précédent
+    et les échéances manquées sont sautées (jamais de rattrapage en rafale).
+    """
+    next_start = time.monotonic()
+    while not stop.is_set():
+        pipeline.tick()
+        if max_ticks is not None and pipeline.n_ticks >= max_ticks:
+            return
+        next_start += interval
+        now = time.monotonic()
+        if now > next_start:
+            missed = int((now - next_start) // interval) + 1
+            logging.warning(f"Tick plus long que l'intervalle : {missed} échéance(s) sautée(s)")
+            next_start += missed * interval
+        stop.wait(max(0.0, next_start - time.monotonic()))
+
+
+# --------------------------------------------------------------------------- #
+# Main
+# --------------------------------------------------------------------------- #
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Démon du pipeline : collecte -> prétraitement -> entraînement en résident."
+    )
+    parser.add_argument("--interval", type=float, default=60.0,
+                        help="Période entre deux ticks en secondes (défaut: 60).")
+    parser.add_argument("--once", action="store_true", help="Un seul tick puis sortie.")
+    parser.add_argument("--ticks", type=int, default=None, help="Nombre de ticks puis sortie.")
+    parser.add_argument("--no-collect", action="store_true",
+                        help="N'appelle pas collect.sh (données brutes alimentées ailleurs).")
+    parser.add_argument("--preprocess-args", type=str, default="",
+                        help="Arguments passés à preprocessed.py (ex: \"--format parquet\").")
+    parser.add_argument("--train-args", type=str, default="",
+                        help="Arguments passés à train.py (ex: \"--train-mode continue\").")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    logging.info(f"=== Démarrage du démon du pipeline (pid {os.getpid()}, "
+                 f"intervalle {args.interval} s) ===")
+    pipeline = Pipeline(collect=not args.no_collect,
+                        preprocess_args=shlex.split(args.preprocess_args),
+                        train_args=shlex.split(args.train_args))
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    max_ticks = 1 if args.once else args.ticks
+    run_forever(pipeline, args.interval, stop, max_ticks)
+    logging.info("=== Arrêt du démon du pipeline ===")
+    return 0
+
+
+# Pour l'appel par script avec code retour SystemExit
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,27 +3,96 @@
 Ce script preprocessed.py récupère les données du dernier fichier CSV créé
 dans le dossier 'data/raw/'.
 
+   En mode append de collect.sh, l'instantané le plus récent est décrit par
+   le manifeste 'data/raw/manifests/latest.json' (stock en ajout seul et
+   taille publiée) au lieu d'un fichier copié.
+
 1. Il applique un prétraitement aux données
 
 2. Les résultats du prétraitement sont enregistrés dans un nouveau fichier CSV
    dans le dossier 'data/processed/', avec un nom au format
-   'sales_processed_YYYYMMDD_HHMM.csv'.
+   'sales_processed_YYYYMMDD_HHMM.csv'. L'option --format parquet|feather
+   produit à la place un fichier colonnaire typé (int64 conservés),
+   'sales_processed_YYYYMMDD_HHMM.parquet' ou '.feather' (requiert pyarrow,
+   extra 'columnar' de pyproject.toml).
 
 3. Toutes les étapes du prétraitement sont enregistrées dans le fichier
    'logs/preprocessed.logs' afin de garantir un suivi détaillé du processus.
 
+4. Par défaut le prétraitement est incrémental : un point de reprise
+   (data/processed/.preprocessed_checkpoint.json) mémorise la position déjà
+   traitée dans le CSV brut ainsi que l'état de la table large. Seules les
+   lignes ajoutées depuis sont relues, nettoyées, pivotées puis ajoutées à la
+   sortie précédente. En CSV, celle-ci est renommée en la nouvelle sortie
+   (sortie unique glissante, avec son fichier '.ts') puis prolongée sur
+   place : le coût d'une exécution suit le nombre de lignes ajoutées, sans
+   copie de l'historique ni accumulation de sorties dépassées ; l'entrée de
+   l'ancien nom est retirée du catalogue. Un fichier colonnaire ne se
+   prolonge pas sur place (réécriture complète) : la sortie précédente est
+   alors conservée telle quelle et la nouvelle écrite à côté. L'option
+   --full-rebuild force un recalcul complet.
+
+5. L'ordre chronologique est conservé hors de la sortie (qui n'a pas de
+   colonne 'timestamp') : le fichier annexe '<sortie>.ts' contient l'instant
+   (epoch UTC en secondes) de chaque ligne prétraitée, pour les variables
+   temporelles et la validation chronologique de train.py.
+
+6. L'option --chunksize N active un mode streaming pour les historiques
+   bruts plus gros que la mémoire : le CSV est lu par blocs de N lignes
+   (modèles en dtype catégoriel, format de date deviné une seule fois),
+   chaque bloc est agrégé/pivoté puis les tables partielles sont fusionnées.
+   Le résultat est identique au traitement en mémoire.
+
+7. Chaque étape (lecture, agrégation, pivot, écriture...) émet ses métriques
+   (temps, CPU, RSS, lignes et octets) dans 'logs/metrics.jsonl' via
+   src/instrumentation.py.
+
+8. --check (ou --dry-run) vérifie l'entrée brute (entête), l'état du point
+   de reprise (octets nouveaux à traiter) et le dossier de sortie, puis sort
+   sans lire les données ni rien écrire.
+
+9. Les contrôles exigés par les tests (pas de 'timestamp', entiers, sans NaN,
+   positifs) sont calculés en une passe par src/validation.py sur la table
+   en mémoire ; le rapport est écrit à côté de la sortie
+   ('<sortie>.validation.json') et prolongé par les seules lignes ajoutées en
+   mode incrémental.
+
+10. Chaque sortie est inscrite dans le catalogue de son dossier
+   ('catalog.jsonl', voir src/catalog.py : lignes, intervalle de temps,
+   empreinte). Le dernier fichier brut est lu dans le catalogue de 'data/raw/'
+   (tenu par collect.sh) ; le parcours du dossier ne sert plus que de repli.
+
+11. L'option --workers N répartit le recalcul complet sur N processus : le
+   brut est découpé en partitions de temps disjointes (coupées aux
+   frontières de jour par défaut, --partition-freq 6h par exemple ; environ
+   4 partitions de tailles voisines par processus), chacune nettoyée et
+   pivotée dans un pool de processus, puis les tables sont concaténées dans
+   l'ordre chronologique sur l'union des modèles. La sortie, son fichier
+   '.ts', son rapport de validation et son entrée au catalogue sont
+   identiques au traitement mono-processus.
+
 Les erreurs ou anomalies éventuelles sont également loguées pour assurer la traçabilité.
 -------------------------------------------------------------------------------
 """
 
 import argparse
 import glob
+import io
+import json
 import logging
 import os
-from datetime import datetime
+import shutil
+from datetime import datetime, timezone
 from pathlib import Path
 import sys
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+import catalog
+import validation
+from columnar import has_pyarrow, missing_message, require_for
+from instrumentation import file_size, stage
 
 # --------------------------------------------------------------------------- #
 # Constantes de chemins
@@ -33,6 +102,21 @@ RAW_DIR = ROOT / "data" / "raw"
 PROC_DIR = ROOT / "data" / "processed"
 LOG_DIR = ROOT / "logs"
 LOG_FILE = LOG_DIR / "preprocessed.logs"
+RAW_MANIFEST = RAW_DIR / "manifests" / "latest.json"
+CHECKPOINT_FILE = PROC_DIR / ".preprocessed_checkpoint.json"
+# Nom du script dans les métriques (logs/metrics.jsonl)
+SCRIPT = "preprocessed"
+
+# Fichier annexe des instants (epoch en secondes UTC, une ligne par ligne
+# prétraitée) : la sortie ne contient pas de colonne 'timestamp'
+TIMESTAMPS_SUFFIX = ".ts"
+
+# Formats de sortie supportés -> extension du fichier prétraité
+PROCESSED_FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+# Nombre d'octets mémorisés avant la position de reprise pour vérifier que le
+# CSV brut courant prolonge bien celui déjà traité
+CHECKPOINT_TAIL_BYTES = 64
 
 
 # --------------------------------------------------------------------------- #
@@ -53,10 +137,27 @@ def _setup_logging() -> None:
 # --------------------------------------------------------------------------- #
 # Utilitaires
 # --------------------------------------------------------------------------- #
+def _read_raw_manifest() -> dict | None:
+    """
+    Manifeste du dernier instantané publié par collect.sh en mode append
+    (stock en ajout seul), ou None s'il est absent ou illisible.
+    """
+    if not RAW_MANIFEST.exists():
+        return None
+    try:
+        manifest = json.loads(RAW_MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    path = Path(manifest.get("path", ""))
+    manifest["path"] = path if path.is_absolute() else ROOT / path
+    return manifest if manifest["path"].exists() else None
+
+
 def _find_latest_raw_csv(explicit_path: Path | None = None) -> Path:
     """
     Trouve le dernier CSV créé/modifié dans data/raw/
     (ou le chemin explicite s'il est fourni).
+    Le manifeste 'latest.json' du stock en ajout seul est prioritaire.
     """
     if explicit_path:
         p = explicit_path if explicit_path.is_absolute() else ROOT / explicit_path
@@ -64,6 +165,15 @@ def _find_latest_raw_csv(explicit_path: Path | None = None) -> Path:
             raise FileNotFoundError(f"Fichier explicite introuvable: {p}")
         return p
 
+    manifest = _read_raw_manifest()
+    if manifest is not None:
+        return manifest["path"]
+
+    entry = catalog.latest_entry(RAW_DIR, lambda p: p.suffix == ".csv")
+    if entry is not None:
+        return entry["path"]
+
+    # Repli (catalogue absent ou périmé) : parcours du dossier
     RAW_DIR.mkdir(parents=True, exist_ok=True)
     candidates = sorted(glob.glob(str(RAW_DIR / "*.csv")))
     if not candidates:
@@ -76,16 +186,23 @@ def _find_latest_raw_csv(explicit_path: Path | None = None) -> Path:
     return Path(latest)
 
 
-def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def _raw_snapshot_size(input_csv: Path) -> int:
     """
-    Données d'entrée au format long: ['timestamp','model','sales'].
-    Étapes:
-      - Valide les colonnes attendues
-      - Convertit 'sales' en numérique, remplace NaN par 0, clippe les négatifs à 0
-      - Agrège par (timestamp, model) via somme (pas obligatoire en extraction à la minute)
-      - Pivot en large (colonnes=modèles), remplace NaN par 0
-      - Force toutes les colonnes en entiers non négatifs (int64)
-      - Supprime 'timestamp' dans la sortie
+    Taille (octets) de l'instantané à traiter : celle publiée dans le manifeste
+    pour le stock en ajout seul (ignore un lot en cours d'écriture), sinon la
+    taille du fichier.
+    """
+    size = input_csv.stat().st_size
+    manifest = _read_raw_manifest()
+    if manifest is not None and manifest["path"].resolve() == input_csv.resolve():
+        return min(size, int(manifest.get("bytes", size)))
+    return size
+
+
+def _aggregate_long(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valide les colonnes attendues puis agrège le format long par
+    (timestamp, model) en sommant des ventes nettoyées (numériques, >= 0).
     """
     # Verification des colonnes
     expected = {"timestamp", "model", "sales"}
@@ -97,11 +214,12 @@ def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     sales = pd.to_numeric(df["sales"], errors="coerce").fillna(0)
     sales = sales.clip(lower=0)
 
-    # Normalisation des modèles (sécurité contre espaces/upper)
-    models = df["model"].astype(str).str.strip().str.lower()
+    # Normalisation des modèles (sécurité contre espaces/upper) ; le dtype
+    # 'string' garde les modèles manquants en NA pour qu'ils soient écartés
+    models = df["model"].astype("string").str.strip().str.lower()
 
     # Agrégation par timestamp & model (si doublons)
-    tmp = (
+    return (
         pd.DataFrame({
             "timestamp": pd.to_datetime(df["timestamp"], errors="coerce"),
             "model": models,
@@ -112,39 +230,606 @@ def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         .sum()
     )
 
-    # Pivot long -> large : une colonne par modèle
+
+def _pivot_wide(tmp: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pivot long -> large (une colonne par modèle, index 'timestamp').
+    Les valeurs restent flottantes (non arrondies) pour pouvoir être
+    complétées par un lot ultérieur portant le même timestamp.
+    """
     wide = tmp.pivot_table(index="timestamp", columns="model", values="sales", aggfunc="sum")
+    if wide is None or wide.empty:
+        return pd.DataFrame()
+
+    # Remplace NaN par 0, s'assure non-négatif
+    return wide.fillna(0).clip(lower=0)
+
+
+def _finalize_wide(wide: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast en int64 (après arrondi sécurisé) et suppression de l'index
+    'timestamp' pour l'export (les tests exigent 'timestamp' absent).
+    """
+    return wide.round(0).astype("int64").reset_index(drop=True)
+
+
+def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Données d'entrée au format long: ['timestamp','model','sales'].
+    Étapes:
+      - Valide les colonnes attendues
+      - Convertit 'sales' en numérique, remplace NaN par 0, clippe les négatifs à 0
+      - Agrège par (timestamp, model) via somme (pas obligatoire en extraction à la minute)
+      - Pivot en large (colonnes=modèles), remplace NaN par 0
+      - Force toutes les colonnes en entiers non négatifs (int64)
+      - Supprime 'timestamp' dans la sortie
+    """
+    wide = _pivot_wide(_aggregate_long(df))
 
     # On veut uniquement des colonnes entières, pas de timestamp dans la sortie
-    if wide is None or wide.empty:
+    if wide.empty:
         # Si aucune donnée exploitable, df vide
         return pd.DataFrame()
 
-    # Remplace NaN par 0, s'assure non-négatif, conversion en int
-    wide = wide.fillna(0).clip(lower=0)
+    return _finalize_wide(wide)
 
-    # cast en int64 (après arrondi sécurisé)
-    wide = wide.round(0).astype("int64")
 
-    # Supprime la dimension d'index 'timestamp' pour l'export (les tests exigent 'timestamp' absent)
-    wide = wide.reset_index(drop=True)
+def _default_output_path(fmt: str = "csv") -> Path:
+    stamp = datetime.now().strftime("%Y%m%d_%H%M")
+    return PROC_DIR / f"sales_processed_{stamp}{PROCESSED_FORMATS[fmt]}"
 
-    return wide
 
+def _output_format(output_path: Path) -> str:
+    """
+    Format déduit de l'extension du fichier prétraité (csv par défaut).
+    """
+    for fmt, suffix in PROCESSED_FORMATS.items():
+        if output_path.suffix == suffix:
+            return fmt
+    return "csv"
 
-def _save_processed(df: pd.DataFrame, output_path: Path | None = None) -> Path:
+
+def _load_processed(path: Path) -> pd.DataFrame:
+    require_for(path)
+    fmt = _output_format(path)
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    if fmt == "feather":
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+def _save_processed(df: pd.DataFrame, output_path: Path | None = None,
+                    fmt: str = "csv") -> Path:
+    """
+    Enregistre la table large au format demandé. Les formats colonnaires
+    (parquet, feather) conservent les dtypes int64 sans réinférence au chargement.
+    """
     PROC_DIR.mkdir(parents=True, exist_ok=True)
     if output_path is None:
-        stamp = datetime.now().strftime("%Y%m%d_%H%M")
-        output_path = PROC_DIR / f"sales_processed_{stamp}.csv"
-    df.to_csv(output_path, index=False)
+        output_path = _default_output_path(fmt)
+    if fmt == "parquet":
+        df.to_parquet(output_path, index=False)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(output_path)
+    else:
+        df.to_csv(output_path, index=False)
     return output_path
 
 
+def _timestamps_path(output_path: Path) -> Path:
+    """
+    Fichier annexe des instants d'un fichier prétraité (ex.
+    'sales_processed_X.csv.ts' : extension ignorée par train.py et les tests).
+    """
+    return output_path.with_name(output_path.name + TIMESTAMPS_SUFFIX)
+
+
+def _epoch_lines(index: pd.Index) -> bytes:
+    """
+    Instants de l'index en secondes epoch UTC, une ligne chacun.
+    """
+    if len(index) == 0:
+        return b""
+    seconds = pd.DatetimeIndex(index).as_unit("s").asi8
+    return ("\n".join(seconds.astype(str)) + "\n").encode("ascii")
+
+
+def _save_timestamps(index: pd.Index, output_path: Path) -> Path:
+    """
+    Écrit le fichier annexe des instants, aligné ligne à ligne sur la sortie.
+    """
+    path = _timestamps_path(output_path)
+    path.write_bytes(_epoch_lines(index))
+    return path
+
+
+def _index_output(output_path: Path) -> dict:
+    """
+    Inscrit la sortie au catalogue de son dossier (après le point de reprise :
+    dernière écriture de l'exécution). Lignes et intervalle de temps sont lus
+    dans le fichier annexe des instants.
+    """
+    seconds = _timestamps_path(output_path).read_bytes().split()
+    t_min, t_max = ((datetime.fromtimestamp(int(seconds[i]), timezone.utc) for i in (0, -1))
+                    if seconds else (None, None))
+    return catalog.append_entry(output_path, len(seconds), t_min, t_max,
+                                catalog.file_sha256(output_path))
+
+
+# --------------------------------------------------------------------------- #
+# Prétraitement en streaming (par blocs)
+# --------------------------------------------------------------------------- #
+class _BoundedReader(io.RawIOBase):
+    """
+    Lecture binaire limitée aux 'size' premiers octets d'un fichier
+    (instantané publié par le manifeste).
+    """
+
+    def __init__(self, fh, size: int) -> None:
+        self._fh = fh
+        self._left = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer)[:max(0, min(len(buffer), self._left))]
+        n = self._fh.readinto(view) if len(view) else 0
+        self._left -= n
+        return n
+
+
+def _normalize_models(models: pd.Series) -> pd.Categorical:
+    """
+    Normalisation (strip/lower) appliquée aux seules catégories puis
+    redistribuée via les codes : coût proportionnel au nombre de modèles.
+    """
+    cat = models.astype("category").cat
+    normalized = pd.Series(cat.categories).astype("string").str.strip().str.lower()
+    categories = pd.Index(normalized.dropna().unique())
+    remap = np.append(categories.get_indexer(normalized), -1)
+    # Le code -1 (modèle manquant) pointe sur la dernière entrée (-1) de remap
+    return pd.Categorical.from_codes(remap[cat.codes.to_numpy()], categories=categories)
+
+
+def _pivot_chunk(chunk: pd.DataFrame, ts_format: str | None) -> pd.DataFrame:
+    """
+    Même nettoyage que _aggregate_long + _pivot_wide sur un bloc, sans
+    fillna/clip (appliqués après fusion) : table large partielle (float).
+    """
+    sales = pd.to_numeric(chunk["sales"], errors="coerce").fillna(0).clip(lower=0)
+    tmp = pd.DataFrame({
+        "timestamp": pd.to_datetime(chunk["timestamp"], errors="coerce", format=ts_format),
+        "model": _normalize_models(chunk["model"]),
+        "sales": sales,
+    }).dropna(subset=["timestamp", "model"])
+    wide = tmp.pivot_table(index="timestamp", columns="model", values="sales",
+                           aggfunc="sum", observed=True)
+    wide.columns = wide.columns.astype("string")
+    return wide
+
+
+def _guess_ts_format(timestamps: pd.Series) -> str | None:
+    """
+    Format deviné sur la première date non vide, comme le fait pd.to_datetime
+    sur la colonne complète : garantit un parsing identique pour tous les blocs.
+    'mixed' (parsing élément par élément) si le format n'est pas devinable,
+    None si le bloc ne contient aucune date.
+    """
+    for value in timestamps.dropna():
+        if isinstance(value, str) and value.strip():
+            return guess_datetime_format(value) or "mixed"
+    return None
+
+
+def _clean_streaming(input_csv: Path, size: int, chunksize: int) -> tuple[pd.DataFrame, int]:
+    """
+    Lit les 'size' premiers octets du CSV brut par blocs de 'chunksize' lignes
+    et renvoie (table large flottante indexée par timestamp, nb lignes lues).
+    La mémoire crête est bornée par un bloc plus les tables partielles,
+    dont la taille cumulée est celle de la sortie.
+    """
+    with open(input_csv, "rb") as fh:
+        header = fh.readline().decode("utf-8").strip().split(",")
+    missing = {"timestamp", "model", "sales"} - set(header)
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le CSV brut: {sorted(missing)}")
+
+    partials = []
+    n_rows = 0
+    ts_format = None
+    with open(input_csv, "rb") as fh:
+        reader = io.BufferedReader(_BoundedReader(fh, size))
+        for chunk in pd.read_csv(reader, usecols=["timestamp", "model", "sales"],
+                                 dtype={"model": "category"}, chunksize=chunksize):
+            n_rows += len(chunk)
+            if ts_format is None:
+                ts_format = _guess_ts_format(chunk["timestamp"])
+            wide = _pivot_chunk(chunk, ts_format)
+            if not wide.empty:
+                partials.append(wide)
+
+    if not partials:
+        return pd.DataFrame(), n_rows
+
+    # Fusion : un même timestamp peut être réparti sur deux blocs consécutifs
+    wide = pd.concat(partials).groupby(level=0, sort=True).sum()
+    wide = wide.reindex(columns=sorted(wide.columns))
+    wide.columns.name = "model"
+    return wide.fillna(0).clip(lower=0), n_rows
+
+
+# --------------------------------------------------------------------------- #
+# Prétraitement partitionné multi-processus (--workers)
+# --------------------------------------------------------------------------- #
+def _partition_freq(value: str) -> str:
+    """
+    Type argparse de --partition-freq : fréquence fixe pandas ('D', '6h'...).
+    """
+    try:
+        pd.Timestamp(0).floor(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"fréquence de partition invalide : {value} ({e})")
+    return value
+
+
+def _parse_timestamps(values: pd.Series, ts_format: str | None) -> pd.Series:
+    """
+    Conversion des dates d'un bloc de lignes (exécutée dans le pool).
+    """
+    return pd.to_datetime(values, errors="coerce", format=ts_format)
+
+
+def _time_partitions(long: pd.DataFrame, freq: str, n_parts: int) -> list[pd.DataFrame]:
+    """
+    Découpe la table longue (timestamps déjà convertis) en au plus 'n_parts'
+    partitions de lignes de tailles voisines, dans l'ordre chronologique,
+    coupées uniquement aux frontières des intervalles 'freq' (UTC) : deux
+    partitions n'ont aucun timestamp commun.
+    """
+    ts = long["timestamp"]
+    if not pd.api.types.is_datetime64_any_dtype(ts):
+        # Fuseaux mélangés (dtype objet) : pas de découpage possible
+        return [long]
+    keep = ts.notna().to_numpy()
+    if not keep.all():
+        long, ts = long[keep], ts[keep]
+    naive = ts.dt.tz_convert(None) if ts.dt.tz is not None else ts
+    bucket = naive.dt.floor(freq).to_numpy()
+    if not (bucket[1:] >= bucket[:-1]).all():
+        # Tri stable : l'ordre des lignes d'un même intervalle est conservé
+        order = np.argsort(bucket, kind="stable")
+        long, bucket = long.iloc[order], bucket[order]
+
+    # Coupes au début d'intervalle le plus proche de chaque quantile de lignes
+    starts = np.flatnonzero(bucket[1:] != bucket[:-1]) + 1
+    if not len(starts):
+        return [long]
+    targets = np.arange(1, n_parts) * len(bucket) / n_parts
+    nearest = np.clip(np.searchsorted(starts, targets), 0, len(starts) - 1)
+    bounds = [0, *np.unique(starts[nearest]).tolist(), len(bucket)]
+    return [long.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _pivot_partition(part: pd.DataFrame) -> pd.DataFrame:
+    """
+    Nettoyage et pivot d'une partition (exécuté dans le pool).
+    """
+    return _pivot_wide(_aggregate_long(part))
+
+
+def _clean_partitioned(df: pd.DataFrame, workers: int,
+                       freq: str = "D") -> tuple[pd.DataFrame, int]:
+    """
+    Équivalent de _pivot_wide(_aggregate_long(df)) réparti sur 'workers'
+    processus, en deux passes sur le même pool (environ 4 tâches par
+    processus pour l'équilibrage de charge) :
+      - conversion des dates par blocs de lignes, au format deviné une seule
+        fois sur la colonne (comme --chunksize : parsing identique) ;
+      - nettoyage et pivot des partitions de temps (_time_partitions).
+    Les tables sont concaténées dans l'ordre chronologique sur l'union triée
+    des modèles (0 pour un modèle absent d'une partition).
+    Renvoie (table large flottante indexée par timestamp, nb partitions).
+    """
+    missing = {"timestamp", "model", "sales"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le CSV brut: {sorted(missing)}")
+    n_tasks = min(1 if workers == 1 else workers * 4, len(df))
+    if n_tasks <= 1:
+        return _pivot_partition(df), 1
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Processus issus d'un serveur dédié (forkserver) : pas de fork() d'un
+    # parent dont des threads natifs sont actifs (pyarrow, BLAS...)
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        ts_format = _guess_ts_format(df["timestamp"])
+        bounds = np.linspace(0, len(df), n_tasks + 1).astype(int)
+        blocks = [df["timestamp"].iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+        ts = pd.concat(list(pool.map(_parse_timestamps, blocks, [ts_format] * n_tasks)))
+        long = pd.DataFrame({"timestamp": ts, "model": df["model"], "sales": df["sales"]})
+        parts = _time_partitions(long, freq, n_tasks)
+        wides = list(pool.map(_pivot_partition, parts))
+
+    wides = [w for w in wides if not w.empty]
+    if not wides:
+        return pd.DataFrame(), len(parts)
+    columns = wides[0].columns.append([w.columns for w in wides[1:]]).unique().sort_values()
+    wide = pd.concat([w.reindex(columns=columns, fill_value=0.0) for w in wides])
+    wide.columns.name = "model"
+    return wide, len(parts)
+
+
+# --------------------------------------------------------------------------- #
+# Prétraitement incrémental (point de reprise)
+# --------------------------------------------------------------------------- #
+def _last_line_offset(path: Path) -> int:
+    """
+    Position (en octets) du début de la dernière ligne d'un fichier texte.
+    """
+    size = path.stat().st_size
+    with open(path, "rb") as fh:
+        start = max(0, size - 4096)
+        fh.seek(start)
+        block = fh.read().rstrip(b"\r\n")
+    idx = block.rfind(b"\n")
+    return start + idx + 1 if idx >= 0 else start
+
+
+def _load_checkpoint() -> dict | None:
+    if not CHECKPOINT_FILE.exists():
+        return None
+    try:
+        return json.loads(CHECKPOINT_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_checkpoint(input_csv: Path, raw_offset: int, wide: pd.DataFrame,
+                      output_csv: Path) -> None:
+    """
+    Enregistre (atomiquement) le point de reprise : position lue dans le CSV
+    brut, empreinte des derniers octets lus, colonnes de la table large,
+    dernière ligne (sommes non arrondies) et position de celle-ci en sortie.
+    """
+    if wide.empty:
+        # Rien d'exploitable : le prochain passage refera un calcul complet
+        CHECKPOINT_FILE.unlink(missing_ok=True)
+        return
+
+    with open(input_csv, "rb") as fh:
+        header = fh.readline().decode("utf-8").strip()
+        tail_start = max(0, raw_offset - CHECKPOINT_TAIL_BYTES)
+        fh.seek(tail_start)
+        tail = fh.read(raw_offset - tail_start)
+
+    state = {
+        "raw_header": header,
+        "raw_offset": raw_offset,
+        "raw_tail": tail.hex(),
+        "columns": [str(c) for c in wide.columns],
+        "last_timestamp": wide.index[-1].isoformat(),
+        "last_row": [float(v) for v in wide.iloc[-1].to_numpy()],
+        "output": str(output_csv),
+        "output_size": output_csv.stat().st_size,
+        "last_row_offset": (_last_line_offset(output_csv)
+                            if _output_format(output_csv) == "csv" else None),
+        "timestamps_size": _timestamps_path(output_csv).stat().st_size,
+    }
+    CHECKPOINT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CHECKPOINT_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+def _checkpoint_wide(state: dict) -> pd.DataFrame:
+    """
+    Reconstruit la dernière ligne (non arrondie) mémorisée dans le point de reprise.
+    """
+    return pd.DataFrame(
+        [state["last_row"]],
+        index=pd.Index([pd.Timestamp(state["last_timestamp"])], name="timestamp"),
+        columns=state["columns"],
+    )
+
+
+def _increment_range(input_csv: Path, state: dict) -> tuple[int, int] | None:
+    """
+    Plage (début, fin) en octets des lignes brutes ajoutées depuis le point de
+    reprise, ou None si le fichier ne prolonge pas celui du point de reprise
+    (entête différente, fichier tronqué ou réécrit).
+    """
+    offset = int(state["raw_offset"])
+    tail = bytes.fromhex(state["raw_tail"])
+    size = _raw_snapshot_size(input_csv)
+    if size < offset:
+        return None
+
+    with open(input_csv, "rb") as fh:
+        header = fh.readline().decode("utf-8").strip()
+        if header != state["raw_header"]:
+            return None
+        fh.seek(offset - len(tail))
+        if fh.read(len(tail)) != tail:
+            return None
+    return offset, size
+
+
+def _read_raw_increment(input_csv: Path, state: dict) -> tuple[pd.DataFrame, int] | None:
+    """
+    Lit uniquement les lignes ajoutées au CSV brut après la position mémorisée.
+    Renvoie None si le fichier ne prolonge pas celui du point de reprise.
+    """
+    span = _increment_range(input_csv, state)
+    if span is None:
+        return None
+    offset, size = span
+    with open(input_csv, "rb") as fh:
+        fh.seek(offset)
+        chunk = fh.read(size - offset)
+
+    columns = state["raw_header"].split(",")
+    if not chunk.strip():
+        return pd.DataFrame(columns=columns), size
+    return pd.read_csv(io.BytesIO(chunk), header=None, names=columns), size
+
+
+def _preprocess_incremental(input_csv: Path, state: dict, output_path: Path | None = None,
+                            fmt: str = "csv") -> tuple[Path, int] | None:
+    """
+    Traite uniquement les nouvelles lignes brutes et les ajoute à la sortie
+    précédente. Renvoie (fichier de sortie, nb lignes ajoutées), ou None si un
+    recalcul complet est nécessaire (fichier brut réécrit, lignes hors ordre
+    chronologique, nouveau modèle, sortie précédente modifiée...).
+    """
+    increment = _read_raw_increment(input_csv, state)
+    if increment is None:
+        logging.info("Point de reprise incompatible avec %s", input_csv)
+        return None
+    df_new, raw_size = increment
+    logging.info("Lignes brutes nouvelles depuis le point de reprise : %d", len(df_new))
+
+    prev_out = Path(state["output"])
+    if not prev_out.exists() or prev_out.stat().st_size != state["output_size"]:
+        logging.info("Sortie précédente absente ou modifiée : %s", prev_out)
+        return None
+    if _output_format(prev_out) != fmt:
+        logging.info("Format de sortie modifié (%s -> %s)", _output_format(prev_out), fmt)
+        return None
+    # Rapport de la sortie précédente (lu avant qu'elle ne soit prolongée)
+    prev_report = validation.read_report(prev_out)
+    prev_ts = _timestamps_path(prev_out)
+    if not prev_ts.exists() or prev_ts.stat().st_size != state.get("timestamps_size"):
+        logging.info("Fichier des instants absent ou modifié : %s", prev_ts)
+        return None
+
+    last = _checkpoint_wide(state)
+    columns = state["columns"]
+    last_ts = last.index[0]
+    wide_new = _pivot_wide(_aggregate_long(df_new))
+
+    merge_last = False
+    if not wide_new.empty:
+        if wide_new.index[0] < last_ts:
+            logging.info("Lignes antérieures au dernier timestamp traité (%s)", last_ts)
+            return None
+        unknown = set(map(str, wide_new.columns)) - set(columns)
+        if unknown:
+            logging.info("Nouveaux modèles détectés : %s", sorted(unknown))
+            return None
+        wide_new = wide_new.reindex(columns=columns, fill_value=0.0)
+        # Même timestamp que la dernière ligne traitée : on complète ses sommes
+        merge_last = wide_new.index[0] == last_ts
+        if merge_last:
+            wide_new.iloc[0] = wide_new.iloc[0].to_numpy() + last.iloc[0].to_numpy()
+
+    PROC_DIR.mkdir(parents=True, exist_ok=True)
+    if output_path is None:
+        output_path = _default_output_path(fmt)
+    new_rows = _finalize_wide(wide_new) if not wide_new.empty else pd.DataFrame()
+
+    # CSV : sortie glissante, la sortie précédente (et ses fichiers annexes)
+    # est renommée en la nouvelle, jamais copiée, et son entrée retirée du
+    # catalogue. Colonnaire : réécriture complète, la sortie précédente reste
+    moved = output_path.resolve() != prev_out.resolve()
+    rolling = moved and fmt == "csv"
+    if rolling:
+        validation.report_path(prev_out).unlink(missing_ok=True)
+        shutil.move(prev_out, output_path)
+        catalog.remove_entries(prev_out.parent, {prev_out.name})
+    if fmt == "csv":
+        # Ajout en fin de la sortie (renommée sans être reparsée)
+        with open(output_path, "r+b") as fh:
+            pos = int(state["last_row_offset"]) if merge_last else int(state["output_size"])
+            fh.truncate(pos)
+            fh.seek(pos)
+            if not wide_new.empty:
+                fh.write(new_rows.to_csv(header=False, index=False).encode("utf-8"))
+    else:
+        # Format colonnaire : relecture typée de la sortie précédente, ajout, réécriture
+        df_out = _load_processed(prev_out)
+        if merge_last:
+            df_out = df_out.iloc[:-1]
+        if not wide_new.empty:
+            df_out = pd.concat([df_out, new_rows], ignore_index=True)
+        _save_processed(df_out, output_path, fmt)
+
+    # Fichier des instants : même principe (renommage, ou copie si la sortie
+    # précédente est conservée, retrait de la dernière ligne si elle est
+    # complétée, ajout des nouveaux instants)
+    ts_path = _timestamps_path(output_path)
+    if rolling:
+        shutil.move(prev_ts, ts_path)
+    elif moved:
+        shutil.copyfile(prev_ts, ts_path)
+    pos = _last_line_offset(ts_path) if merge_last else int(state["timestamps_size"])
+    with open(ts_path, "r+b") as fh:
+        fh.truncate(pos)
+        fh.seek(pos)
+        fh.write(_epoch_lines(wide_new.index))
+
+    # Rapport de validation : celui de la sortie précédente prolongé par les
+    # lignes ajoutées (validées en mémoire), sinon validation de la sortie
+    added = len(wide_new) - int(merge_last)
+    if prev_report is not None and prev_report["ok"]:
+        report = validation.combine(prev_report, validation.validate_frame(new_rows),
+                                    prev_report["rows"] + added)
+        report = validation.describe_file(report, output_path)
+    else:
+        report = validation.validate_file(output_path)
+    validation.write_report(report, output_path)
+
+    # Sans nouvelle ligne exploitable, seule la position brute avance
+    _write_checkpoint(input_csv, raw_size,
+                      _checkpoint_wide(state) if wide_new.empty else wide_new,
+                      output_path)
+    return output_path, added
+
+
+# --------------------------------------------------------------------------- #
+# Vérification rapide des entrées (--check / --dry-run)
+# --------------------------------------------------------------------------- #
+def _check_inputs(input_csv: Path, output_path: Path | None, fmt: str,
+                  full_rebuild: bool) -> list[str]:
+    """
+    Vérifie l'entrée brute (entête), le point de reprise et le dossier de
+    sortie sans lire les données. Renvoie la liste des problèmes (vide si OK).
+    """
+    problems = []
+    size = _raw_snapshot_size(input_csv)
+    with open(input_csv, "rb") as fh:
+        header = fh.readline().decode("utf-8").strip().split(",")
+    missing = {"timestamp", "model", "sales"} - set(header)
+    if missing:
+        problems.append(f"Colonnes manquantes dans le CSV brut: {sorted(missing)}")
+    logging.info("Vérification : entrée brute %s (%d octets)", input_csv, size)
+
+    state = None if full_rebuild else _load_checkpoint()
+    if state is None:
+        logging.info("Vérification : recalcul complet (%d octets à traiter)", size)
+    else:
+        span = _increment_range(input_csv, state)
+        if span is None:
+            logging.info("Vérification : point de reprise incompatible, recalcul complet")
+        elif span[1] == span[0]:
+            logging.info("Vérification : aucune nouvelle donnée brute depuis le point de reprise")
+        else:
+            logging.info("Vérification : %d octets bruts nouveaux (incrémental)", span[1] - span[0])
+
+    out_dir = (output_path or _default_output_path(fmt)).parent
+    target = out_dir if out_dir.exists() else out_dir.parent
+    if not os.access(target, os.W_OK):
+        problems.append(f"Dossier de sortie non inscriptible : {out_dir}")
+    return problems
+
+
 # --------------------------------------------------------------------------- #
 # Main
 # --------------------------------------------------------------------------- #
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     # Ajout d'un parser d'argument pour fichier de sortie et d'entree explicite
     parser = argparse.ArgumentParser(
         description="Prétraitement ventes GPU: long (timestamp,model,sales) -> large (modèles)."
@@ -153,36 +838,151 @@ def main() -> int:
                         help="Chemin d'entrée explicite (optionnel).")
     parser.add_argument("--output", type=str, default=None,
                         help="Chemin de sortie explicite (optionnel).")
-    args = parser.parse_args()
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="Ignore le point de reprise et retraite tout l'historique brut.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Mode streaming : nombre de lignes brutes lues par bloc "
+                             "(défaut: lecture complète en mémoire).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Recalcul complet réparti sur N processus, une tâche par "
+                             "partition de temps (défaut: un seul processus).")
+    parser.add_argument("--partition-freq", type=_partition_freq, default="D",
+                        help="Intervalle des partitions de --workers, fréquence pandas "
+                             "fixe (défaut: D, un jour).")
+    parser.add_argument("--format", choices=sorted(PROCESSED_FORMATS), default=None,
+                        help="Format du fichier prétraité (défaut: extension de --output, "
+                             "sinon csv).")
+    parser.add_argument("--check", "--dry-run", dest="check", action="store_true",
+                        help="Vérifie l'entrée brute, le point de reprise et la sortie puis "
+                             "sort sans rien écrire (code 0 si OK, 2 sinon).")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers doit être >= 1")
+    if args.workers and args.chunksize:
+        parser.error("--workers et --chunksize sont exclusifs")
+    requested = args.format or (_output_format(Path(args.output)) if args.output else "csv")
+    if requested != "csv" and not has_pyarrow():
+        parser.error(missing_message(f"Le format {requested}"))
 
     # Configuration de la log
     _setup_logging()
 
+    # Chemin rapide : vérification des entrées sans lecture des données
+    if args.check:
+        out_path = Path(args.output) if args.output else None
+        fmt = args.format or (_output_format(out_path) if out_path else "csv")
+        try:
+            input_csv = _find_latest_raw_csv(Path(args.input) if args.input else None)
+            problems = _check_inputs(input_csv, out_path, fmt, args.full_rebuild)
+        except (OSError, ValueError) as e:
+            problems = [str(e)]
+        for problem in problems:
+            logging.info("ERREUR de vérification : %s", problem)
+            print(f"[preprocessed.py] {problem}", file=sys.stderr)
+        if problems:
+            return 2
+        logging.info("Vérification : entrées OK")
+        print("[preprocessed.py] Entrées OK")
+        return 0
+
     # Corps du prétraitement
     logging.info("=== Début du prétraitement ===")
     try:
         # Récupération du fichier CSF le plus récent
         input_csv = _find_latest_raw_csv(Path(args.input) if args.input else None)
-        logging.info("Chargement du fichier brut : %s", input_csv)
-        df = pd.read_csv(input_csv)
-        logging.info("Fichier brut chargé avec %d lignes et %d colonnes", df.shape[0], df.shape[1])
+        out_path = Path(args.output) if args.output else None
+        fmt = args.format or (_output_format(out_path) if out_path else "csv")
+
+        # Mode incrémental : seules les lignes ajoutées depuis le point de reprise
+        state = None if args.full_rebuild else _load_checkpoint()
+        if state is not None:
+            logging.info("Prétraitement incrémental de : %s", input_csv)
+            with stage(SCRIPT, "incremental") as st:
+                result = _preprocess_incremental(input_csv, state, out_path, fmt)
+                if result is not None:
+                    st.set(bytes_read=_raw_snapshot_size(input_csv) - int(state["raw_offset"]),
+                           rows_out=result[1], bytes_written=file_size(result[0]))
+            if result is not None:
+                out_csv, n_added = result
+                with stage(SCRIPT, "catalog"):
+                    _index_output(out_csv)
+                logging.info("Lignes ajoutées à la sortie : %d", n_added)
+                logging.info("Fichier prétraité enregistré : %s", out_csv)
+                logging.info("=== Fin du prétraitement ===")
+                return 0
+            logging.info("Bascule en recalcul complet")
+        elif args.full_rebuild:
+            logging.info("Recalcul complet demandé (--full-rebuild)")
 
-        # Nettoyage du dataframe
-        df_clean = _clean_dataframe(df)
+        logging.info("Chargement du fichier brut : %s", input_csv)
+        raw_size = _raw_snapshot_size(input_csv)
+        if args.chunksize:
+            # Lecture par blocs : mémoire crête bornée par la taille de bloc
+            logging.info("Mode streaming : blocs de %d lignes", args.chunksize)
+            with stage(SCRIPT, "stream_pivot", bytes_read=raw_size,
+                       chunksize=args.chunksize) as st:
+                wide, n_raw = _clean_streaming(input_csv, raw_size, args.chunksize)
+                st.set(rows_in=n_raw, rows_out=len(wide))
+            logging.info("Fichier brut lu en streaming : %d lignes", n_raw)
+        else:
+            # Lecture d'un instantané en octets : la position de reprise correspond
+            # exactement à ce qui a été traité même si le fichier grossit entre-temps
+            with stage(SCRIPT, "read_raw") as st:
+                with open(input_csv, "rb") as fh:
+                    raw_bytes = fh.read(raw_size)
+                raw_size = len(raw_bytes)
+                df = pd.read_csv(io.BytesIO(raw_bytes))
+                st.set(bytes_read=raw_size, rows_out=len(df))
+            logging.info("Fichier brut chargé avec %d lignes et %d colonnes",
+                         df.shape[0], df.shape[1])
+
+            # Nettoyage du dataframe
+            if args.workers:
+                # Partitions de temps nettoyées/pivotées dans un pool de processus
+                logging.info("Mode partitionné : %d processus, partitions '%s'",
+                             args.workers, args.partition_freq)
+                with stage(SCRIPT, "partition_pivot", rows_in=len(df), workers=args.workers,
+                           partition_freq=args.partition_freq) as st:
+                    wide, n_parts = _clean_partitioned(df, args.workers, args.partition_freq)
+                    st.set(rows_out=len(wide), partitions=n_parts)
+                logging.info("Partitions traitées : %d", n_parts)
+            else:
+                with stage(SCRIPT, "aggregate", rows_in=len(df)) as st:
+                    tmp = _aggregate_long(df)
+                    st.rows_out = len(tmp)
+                with stage(SCRIPT, "pivot", rows_in=len(tmp)) as st:
+                    wide = _pivot_wide(tmp)
+                    st.rows_out = len(wide)
+        with stage(SCRIPT, "finalize", rows_in=len(wide)) as st:
+            df_clean = pd.DataFrame() if wide.empty else _finalize_wide(wide)
+            st.rows_out = len(df_clean)
         logging.info("Après pivot & nettoyage : %d lignes et %d colonnes",
                      df_clean.shape[0], df_clean.shape[1])
 
-        # Vérification exigée pour passer les tests
-        has_timestamp = "timestamp" in df_clean.columns
-        all_int = all(pd.api.types.is_integer_dtype(t) for t in df_clean.dtypes)
+        # Vérification exigée pour passer les tests : tous les contrôles en une
+        # passe sur la table en mémoire (rapport écrit à côté de la sortie)
+        with stage(SCRIPT, "validate", rows_in=len(df_clean)) as st:
+            report = validation.validate_frame(df_clean)
+            st.set(ok=report["ok"])
+        checks = report["checks"]
         logging.info("Vérification colonne 'timestamp' : %s", "OK (non présente)"
-                     if not has_timestamp else "NON OK (présente)")
+                     if checks["no_timestamp"]["ok"] else "NON OK (présente)")
         logging.info("Vérification types entiers : %s", "OK (toutes les colonnes sont des entiers)"
-                     if all_int else "NON OK")
-
-        # Enregistrement du fichier
-        out_path = Path(args.output) if args.output else None
-        out_csv = _save_processed(df_clean, out_path)
+                     if checks["integer_dtype"]["ok"] else "NON OK")
+        logging.info("Vérification NaN / valeurs négatives : %d / %d",
+                     checks["no_nan"]["count"], checks["non_negative"]["count"])
+
+        # Enregistrement du fichier et du point de reprise
+        with stage(SCRIPT, "save", rows_in=len(df_clean), format=fmt) as st:
+            out_csv = _save_processed(df_clean, out_path, fmt)
+            ts_path = _save_timestamps(wide.index, out_csv)
+            validation.write_report(validation.describe_file(report, out_csv), out_csv)
+            st.bytes_written = file_size(out_csv)
+            st.set(timestamps_bytes=file_size(ts_path))
+        with stage(SCRIPT, "checkpoint"):
+            _write_checkpoint(input_csv, raw_size, wide, out_csv)
+        with stage(SCRIPT, "catalog"):
+            _index_output(out_csv)
         logging.info("Fichier prétraité enregistré : %s", out_csv)
         logging.info("=== Fin du prétraitement ===")
 
@@ -0,0 +1,114 @@
+"""
+-------------------------------------------------------------------------------
+Rapports de validation '<fichier>.validation.json' : format, règles du CSV
+brut et lecture/écriture à côté du fichier validé.
+
+Partagé par src/validation.py (contrôles pandas des fichiers bruts et
+prétraités) et src/collect_writer.py (contrôles du CSV brut à partir de ses
+compteurs) : un même fichier reçoit le même rapport quel que soit l'outil.
+
+Bibliothèque standard uniquement : importé par collect_writer.py, lancé
+toutes les 10 s par scripts/collect.sh, sans payer le démarrage de pandas.
+-------------------------------------------------------------------------------
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+
+# --------------------------------------------------------------------------- #
+# Constantes
+# --------------------------------------------------------------------------- #
+RAW_COLUMNS = ["timestamp", "model", "sales"]
+REPORT_SUFFIX = ".validation.json"
+
+
+def report_path(path: Path) -> Path:
+    return path.with_name(path.name + REPORT_SUFFIX)
+
+
+# --------------------------------------------------------------------------- #
+# Contrôles
+# --------------------------------------------------------------------------- #
+def check(count: int = 0, ok: bool | None = None, **detail) -> dict:
+    result = {"ok": count == 0 if ok is None else ok, "count": int(count)}
+    result.update(detail)
+    return result
+
+
+def raw_checks(columns: list[str], non_numeric: list[str], n_nan: int, n_frac: int,
+               n_neg: int) -> dict:
+    """
+    Contrôles du CSV brut : schéma exact, colonnes non numériques ('numeric'
+    compte des colonnes), puis NaN, non-entiers et négatifs de 'sales'.
+    """
+    return {
+        "schema": check(ok=columns == RAW_COLUMNS, columns=columns),
+        "numeric": check(len(non_numeric), columns=non_numeric),
+        "no_nan": check(n_nan),
+        "integer": check(n_frac),
+        "non_negative": check(n_neg),
+    }
+
+
+def build_report(kind: str, rows: int, columns: list[str], source: str, checks: dict) -> dict:
+    return {
+        "kind": kind,
+        "rows": int(rows),
+        "columns": columns,
+        "source": source,
+        "ok": all(c["ok"] for c in checks.values()),
+        "checks": checks,
+    }
+
+
+def combine(previous: dict, part: dict, rows: int) -> dict:
+    """
+    Rapport d'un fichier prolongé : compteurs du rapport précédent et de la
+    partie ajoutée (validée en mémoire) additionnés.
+    """
+    checks = {}
+    for name, result in part["checks"].items():
+        count = result["count"] + previous["checks"].get(name, {}).get("count", 0)
+        ok = result["ok"] and previous["checks"].get(name, {}).get("ok", True)
+        checks[name] = {**result, "ok": ok, "count": count}
+    return build_report(part["kind"], rows, part["columns"] or previous["columns"],
+                        "incremental", checks)
+
+
+# --------------------------------------------------------------------------- #
+# Rapport à côté du fichier
+# --------------------------------------------------------------------------- #
+def describe_file(report: dict, path: Path) -> dict:
+    """
+    Ajoute l'identité du fichier validé (nom, taille, date de modification).
+    """
+    st = Path(path).stat()
+    return {"path": Path(path).name, "bytes": st.st_size, "mtime_ns": st.st_mtime_ns,
+            **report, "validated_at": datetime.now().isoformat(timespec="seconds")}
+
+
+def write_report(report: dict, path: Path) -> Path:
+    out = report_path(path)
+    tmp = out.with_name(f".{out.name}.tmp")
+    tmp.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    os.replace(tmp, out)
+    return out
+
+
+def read_report(path: Path) -> dict | None:
+    """
+    Rapport de 'path' s'il décrit toujours le fichier (même taille et même
+    date de modification), sinon None.
+    """
+    path = Path(path)
+    try:
+        report = json.loads(report_path(path).read_text(encoding="utf-8"))
+        st = path.stat()
+    except (OSError, ValueError):
+        return None
+    if report.get("bytes") != st.st_size or report.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return report
@@ -0,0 +1,401 @@
+"""
+-------------------------------------------------------------------------------
+Ce script serve.py expose le dernier modèle entraîné via une petite API HTTP
+locale (TCP ou socket Unix) pour des prédictions à faible latence.
+
+1. Le modèle le plus récent (lien 'model/latest', sinon celui de
+   model/.train_state.json, sinon l'artefact le plus récent de 'model/', au
+   format pickle ou natif XGBoost) est chargé une seule fois et reste en mémoire.
+2. Un thread de surveillance recharge le modèle à chaud dès que save_model
+   (src/train.py) écrit un nouveau fichier ; les requêtes en cours continuent
+   sur l'ancien modèle jusqu'au remplacement atomique de la référence.
+3. Les requêtes concurrentes sont regroupées (micro-batching) : un thread
+   unique accumule les lignes pendant au plus --max-wait-ms millisecondes
+   (ou --max-batch lignes) puis effectue un seul appel à predict. Chaque
+   requête est validée à l'arrivée contre les colonnes du modèle courant ;
+   si un rechargement a changé ces colonnes avant le batch, la requête est
+   revalidée contre le modèle effectivement utilisé par le batch.
+
+Endpoints :
+  GET  /health   -> modèle chargé, colonnes attendues, statistiques de batching
+  POST /predict  -> {"instances": [[...], ...]} (ordre des colonnes du modèle)
+                    ou {"instances": [{"rtx3070": 4, ...}, ...]}
+                    réponse : {"predictions": [...], "model": "model_....pkl"}
+
+L'activité (chargements, rechargements, erreurs) est enregistrée dans
+'logs/serve.logs'.
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from artifacts import is_artifact, load_model, resolve_latest
+
+
+# --------------------------------------------------------------------------- #
+# Constantes de chemins
+# --------------------------------------------------------------------------- #
+ROOT = Path(__file__).resolve().parents[1]
+MODEL_DIR = ROOT / "model"
+LOGS_DIR = ROOT / "logs"
+SERVE_LOG = LOGS_DIR / "serve.logs"
+TRAIN_STATE = MODEL_DIR / ".train_state.json"
+
+
+# --------------------------------------------------------------------------- #
+# Logging
+# --------------------------------------------------------------------------- #
+def setup_logging() -> None:
+    """
+    Mise en place du logger en niveau INFO
+    """
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        filename=SERVE_LOG,
+        level=logging.INFO,
+        format="[%(asctime)s] | %(levelname)s | %(message)s",
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Modèle résident
+# --------------------------------------------------------------------------- #
+def find_latest_model(model_dir: Path) -> Path:
+    """
+    Modèle produit par le dernier entraînement (lien 'latest' ou état de
+    train.py), sinon l'artefact le plus récemment modifié de 'model_dir'.
+    """
+    latest = resolve_latest(model_dir)
+    if latest is not None:
+        return latest
+
+    state_file = model_dir / TRAIN_STATE.name
+    if state_file.exists():
+        try:
+            path = Path(json.loads(state_file.read_text(encoding="utf-8"))["model_path"])
+            if path.exists():
+                return path
+        except (OSError, ValueError, KeyError):
+            pass
+
+    candidates = sorted((p for p in model_dir.glob("model*") if is_artifact(p)),
+                        key=lambda p: p.stat().st_mtime, reverse=True)
+    if not candidates:
+        raise FileNotFoundError(f"Aucun modèle (.pkl, .ubj, .json) trouvé dans {model_dir}")
+    return candidates[0]
+
+
+class ModelHolder:
+    """
+    Référence vers le modèle chargé, rechargé à chaud quand un nouveau fichier
+    apparaît (ou que le fichier courant est réécrit).
+    """
+
+    def __init__(self, model_dir: Path) -> None:
+        self.model_dir = model_dir
+        self.model: object | None = None
+        self.path: Path | None = None
+        self.features: list[str] = []
+        self.loaded_at = ""
+        self._signature: Tuple[str, float] | None = None
+        self._lock = threading.Lock()
+
+    def reload_if_changed(self) -> bool:
+        path = find_latest_model(self.model_dir)
+        signature = (str(path.resolve()), path.stat().st_mtime)
+        if signature == self._signature:
+            return False
+
+        # Chargement hors verrou : les prédictions continuent sur l'ancien modèle
+        start = time.perf_counter()
+        model = load_model(path)
+        features = list(model.get_booster().feature_names or [])  # type: ignore
+        with self._lock:
+            self.model, self.path, self.features = model, path, features
+            self.loaded_at = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._signature = signature
+        logging.info(f"Modèle chargé : {path} ({time.perf_counter() - start:.3f} s) "
+                     f"| colonnes={features}")
+        return True
+
+    def snapshot(self) -> Tuple[object, Path, list[str]]:
+        with self._lock:
+            if self.model is None or self.path is None:
+                raise RuntimeError("Aucun modèle chargé")
+            return self.model, self.path, self.features
+
+    def watch(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception:
+                logging.exception("Erreur lors du rechargement du modèle")
+
+
+class StaleRequest(ValueError):
+    """
+    Requête invalide pour le modèle rechargé entre son arrivée et son batch.
+    """
+
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes : un seul thread appelle predict sur la
+    concaténation des lignes reçues pendant au plus 'max_wait_s' secondes.
+    """
+
+    def __init__(self, holder: ModelHolder, max_batch_rows: int, max_wait_s: float) -> None:
+        self.holder = holder
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_s = max_wait_s
+        self.n_requests = 0
+        self.n_batches = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: np.ndarray, features: list[str] | None = None,
+               payload: dict | None = None) -> Future:
+        """
+        Soumet 'rows', validées contre 'features' (colonnes du modèle à
+        l'arrivée) ; 'payload' permet de les revalider si le modèle du batch
+        a d'autres colonnes.
+        """
+        future: Future = Future()
+        self._queue.put((rows, future, features, payload))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait_s
+        while n_rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    @staticmethod
+    def _revalidate(batch: list, features: list[str]) -> list:
+        """
+        Lignes du batch dans l'ordre des colonnes du modèle utilisé : les
+        requêtes validées contre un autre modèle (rechargement entre l'arrivée
+        et le batch) sont revalidées si leurs lignes sont nommées, rejetées
+        sinon (lignes positionnelles dans l'ordre de l'ancien modèle).
+        """
+        valid = []
+        for rows, future, submitted, payload in batch:
+            if submitted is not None and submitted != features:
+                instances = payload.get("instances") if isinstance(payload, dict) else None
+                named = isinstance(instances, list) and bool(instances) and all(
+                    isinstance(row, dict) for row in instances)
+                try:
+                    if not named:
+                        raise ValueError(f"Colonnes attendues modifiées : {features}")
+                    rows = parse_instances(payload, features)
+                except (ValueError, TypeError, KeyError) as e:
+                    future.set_exception(StaleRequest(f"Modèle rechargé : {e}"))
+                    continue
+            valid.append((rows, future))
+        return valid
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                model, path, features = self.holder.snapshot()
+            except Exception as e:
+                for _, future, _, _ in batch:
+                    future.set_exception(e)
+                continue
+            items = self._revalidate(batch, features)
+            if not items:
+                continue
+            try:
+                preds = model.predict(np.vstack([rows for rows, _ in items]))  # type: ignore
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            self.n_batches += 1
+            self.n_requests += len(items)
+            offset = 0
+            for rows, future in items:
+                future.set_result((preds[offset:offset + len(rows)], path))
+                offset += len(rows)
+
+
+# --------------------------------------------------------------------------- #
+# API HTTP
+# --------------------------------------------------------------------------- #
+def parse_instances(payload: dict, features: list[str]) -> np.ndarray:
+    """
+    Convertit {"instances": [...]} en matrice float32 dans l'ordre des colonnes
+    du modèle (lignes sous forme de listes ordonnées ou de dictionnaires).
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Le corps doit être un objet JSON {\"instances\": [...]}")
+    instances = payload.get("instances")
+    if not isinstance(instances, list) or not instances:
+        raise ValueError("'instances' doit être une liste non vide")
+    if isinstance(instances[0], dict):
+        missing = set(features) - set(instances[0])
+        if missing:
+            raise ValueError(f"Colonnes manquantes : {sorted(missing)}")
+        instances = [[row[f] for f in features] for row in instances]
+    X = np.asarray(instances, dtype=np.float32)
+    if X.ndim != 2 or (features and X.shape[1] != len(features)):
+        raise ValueError(f"Forme attendue (n, {len(features)}), reçue {X.shape}")
+    return X
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    server_version = "GPUSalesServe/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        holder: ModelHolder = self.server.holder  # type: ignore[attr-defined]
+        batcher: MicroBatcher = self.server.batcher  # type: ignore[attr-defined]
+        self._send_json(200, {
+            "model": str(holder.path),
+            "loaded_at": holder.loaded_at,
+            "features": holder.features,
+            "requests": batcher.n_requests,
+            "batches": batcher.n_batches,
+        })
+
+    def do_POST(self) -> None:
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+        holder: ModelHolder = self.server.holder  # type: ignore[attr-defined]
+        batcher: MicroBatcher = self.server.batcher  # type: ignore[attr-defined]
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            features = holder.features
+            X = parse_instances(payload, features)
+        except (ValueError, TypeError, KeyError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            preds, path = batcher.submit(X, features, payload).result()
+        except StaleRequest as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logging.exception("Erreur de prédiction")
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"predictions": preds.tolist(), "model": path.name})
+
+    def log_message(self, format: str, *args) -> None:
+        # Pas de log par requête (coût en latence) ; les erreurs sont loguées
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # Adresse client factice : BaseHTTPRequestHandler attend un tuple
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(holder: ModelHolder, batcher: MicroBatcher, host: str = "127.0.0.1",
+                port: int = 8000, unix_socket: str | None = None) -> socketserver.BaseServer:
+    if unix_socket:
+        Path(unix_socket).unlink(missing_ok=True)
+        server: socketserver.BaseServer = UnixHTTPServer(unix_socket, PredictionHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), PredictionHandler)
+        server.daemon_threads = True  # type: ignore[attr-defined]
+    server.holder = holder  # type: ignore[attr-defined]
+    server.batcher = batcher  # type: ignore[attr-defined]
+    return server
+
+
+# --------------------------------------------------------------------------- #
+# Main
+# --------------------------------------------------------------------------- #
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Sert les prédictions du dernier modèle (résident, rechargé à chaud)."
+    )
+    parser.add_argument("--model-dir", type=str, default=str(MODEL_DIR),
+                        help="Dossier des modèles (défaut: model).")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--unix-socket", type=str, default=None,
+                        help="Écoute sur un socket Unix au lieu de TCP.")
+    parser.add_argument("--max-batch", type=int, default=4096,
+                        help="Nombre maximal de lignes par appel à predict.")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="Attente maximale pour regrouper des requêtes (ms).")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="Période de vérification d'un nouveau modèle (s).")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    logging.info("=== Démarrage du service de prédiction ===")
+    try:
+        holder = ModelHolder(Path(args.model_dir))
+        holder.reload_if_changed()
+    except FileNotFoundError as e:
+        logging.error(str(e))
+        print(str(e))
+        return 2
+
+    stop = threading.Event()
+    threading.Thread(target=holder.watch, args=(args.reload_interval, stop), daemon=True).start()
+    batcher = MicroBatcher(holder, args.max_batch, args.max_wait_ms / 1000)
+    server = make_server(holder, batcher, args.host, args.port, args.unix_socket)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    logging.info(f"Service à l'écoute : {where}")
+    print(f"Service de prédiction à l'écoute : {where} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        logging.info("=== Arrêt du service de prédiction ===")
+    return 0
+
+
+# Pour l'appel par script avec code retour SystemExit
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,10 +3,11 @@
 Ce script exécute l'entraînement d'un modèle XGBoost pour prédire les ventes de
 cartes graphiques à partir des données prétraitées.
 
-1. Il commence par rechercher le dernier fichier CSV prétraité dans le dossier
-   'data/processed/'.
+1. Il commence par rechercher le dernier fichier prétraité dans le dossier
+   'data/processed/' (CSV, ou Parquet/Feather colonnaire typé), d'après le
+   catalogue du dossier tenu par preprocessed.py (src/catalog.py).
 2. Si un modèle standard (model.pkl) n'existe pas, il charge les données, les
-   divise en ensembles d'entraînement et de test, entraîne un modèle sur ces
+   divise chronologiquement en ensembles d'entraînement et de test, entraîne un modèle sur ces
    données, l'évalue, puis le sauvegarde dans 'model/model.pkl'.
 3. Si un modèle standard existe déjà, il entraîne un nouveau modèle sur les
    données les plus récentes, l'évalue, puis sauvegarde le modèle dans le dossier
@@ -18,13 +19,98 @@ cartes graphiques à partir des données prétraitées.
 Les modèles sont sauvegardés dans le dossier 'model/' avec le nom 'model.pkl' pour
 le modèle standard et avec un horodatage pour les versions ultérieures.
 Les métriques du modèle sont enregistrées dans les logs du script.
+
+Artefacts (src/artifacts.py) : --model-format pkl|ubj|json choisit le format
+des modèles horodatés (pickle joblib ou format natif XGBoost, plus compact et
+plus rapide à charger), --model-compress N les compresse. Chaque artefact est
+écrit atomiquement avec un fichier annexe '<artefact>.meta.json' (métriques,
+empreinte des données, colonnes, hyperparamètres) et 'model/latest' pointe
+vers le dernier. --keep-last N / --keep-best K limitent les modèles
+horodatés conservés (N plus récents et K meilleurs RMSE).
+
+Entraînement incrémental (--train-mode) :
+  - full     : réentraînement complet (défaut).
+  - continue : le modèle précédent (model/.train_state.json) est rechargé et
+               XGBoost poursuit le boosting (xgb_model) sur les seules lignes
+               arrivées depuis ; les métriques sont calculées sur ces lignes
+               avant mise à jour (évaluation « test-then-train »). Sans
+               nouvelle ligne (données identiques ou seule la dernière ligne
+               refusionnée), le modèle précédent est conservé tel quel et
+               l'exécution est notée « noop » dans l'état d'entraînement.
+  - window   : réentraînement sur les --window dernières lignes, dès la
+               première exécution (sans état précédent : la fenêtre ne
+               dépend pas du modèle précédent, aucun repli sur 'full').
+  En mode continue, un réentraînement complet est forcé si l'état est absent
+  ou incohérent, toutes les --full-every exécutions incrémentales, ou en cas
+  de dérive (RMSE du modèle précédent sur les nouvelles lignes > --drift-ratio
+  fois le RMSE de référence). Le temps gagné par rapport à un entraînement complet
+  (estimé à partir du dernier entraînement complet) est loggé.
+
+Variables temporelles (src/features.py, désactivables par --no-time-features) :
+décalages et moyennes glissantes passées de chaque colonne GPU, et variables
+calendaires lues dans le fichier annexe des instants '<fichier prétraité>.ts'
+écrit par preprocessed.py. La validation est chronologique : les 20 %
+dernières lignes servent de test, ou --cv-splits plis TimeSeriesSplit
+(métriques moyennes) ; aucun mélange aléatoire passé/futur.
+
+Matrice d'entraînement : X (colonnes GPU et variables temporelles) est un
+unique bloc float32 alloué une fois par infer_X_y ; les plis chronologiques en
+sont des tranches (vues, sans copie) et XGBoost (tree_method='hist') en
+construit directement un QuantileDMatrix. Le pic de RSS d'un entraînement est
+mesuré par benchmarks/bench_train_memory.py.
+
+Entraînement hors mémoire (--external-memory, src/external.py) : le dernier
+fichier prétraité, ou les --partitions consécutives données, sont lus par lots
+de --batch-rows lignes et transmis à XGBoost par un xgboost.DataIter
+(ExtMemQuantileDMatrix, pages en cache sur disque dans --ext-cache-dir) :
+la mémoire ne dépend que de la taille des lots. Entraînement complet avec la
+même coupure chronologique ; les métriques du test sont accumulées lot par
+lot. Lignes et empreintes des sources viennent du catalogue (clé du cache
+d'entraînement sans relecture des données).
+
+Cache d'entraînement (model/.train_cache.json) : la clé est une empreinte
+SHA-256 du contenu du jeu prétraité (indépendante du nom et du format du
+fichier), des hyperparamètres de model_params(), des variables temporelles
+(et des instants), du mode infer_X_y, du mode d'entraînement demandé et du
+nombre de plis. Si la clé est connue, l'entraînement est sauté et
+l'artefact existant est réutilisé. Seules les --cache-keep entrées les plus
+récemment utilisées sont conservées ; les modèles horodatés des entrées
+évincées sont supprimés de 'model/'.
+
+Recherche multi-cibles (--targets all|col1,col2 --search none|grid|random) :
+un modèle par colonne GPU (cible = la colonne, X = les autres), avec une
+recherche sur max_depth, learning_rate et n_estimators. Les couples
+(cible, configuration) sont répartis sur un pool de --workers processus ;
+chaque XGBoost utilise cpu_count // workers threads pour ne pas surcharger
+les cœurs. Le meilleur modèle (RMSE) de chaque cible est enregistré dans
+'model/targets/model_<cible>.pkl' avec un résumé 'search_summary.json'.
+Sont loggés la durée murale, la somme des durées murales des jobs et leur
+rapport (nombre moyen de jobs simultanés, qui n'est pas une accélération :
+des jobs concurrents ralentissent chacun). --serial-baseline mesure d'abord
+l'exécution série réelle (1 processus, XGBoost sur tous les cœurs, même
+nombre total de threads) et logge l'accélération série / parallèle.
+
+Chaque étape (chargement, empreinte, entraînement, sauvegarde...) émet ses
+métriques dans 'logs/metrics.jsonl' via src/instrumentation.py.
+
+--check (ou --dry-run) vérifie les entrées (dernier fichier prétraité,
+colonnes numériques, cibles, dossier des modèles) à partir du seul schéma du
+fichier et sort sans entraîner. xgboost, sklearn et joblib ne sont importés
+qu'au premier entraînement ou chargement de modèle.
 -------------------------------------------------------------------------------
 """
 
 import argparse
 # import glob
+import hashlib
+import itertools
+import json
 import logging
-# import os
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Tuple
@@ -32,10 +118,16 @@ from typing import Tuple
 import numpy as np
 import pandas as pd
 
-from xgboost import XGBRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
-import joblib
+# xgboost, sklearn et joblib (~2 s d'import) sont importés dans les fonctions
+# qui s'en servent : --help, --check, un cache HIT ou une erreur d'entrée
+# n'en paient pas le coût (garde-fou : tests/test_startup.py)
+import catalog
+from artifacts import (MODEL_FORMATS, apply_retention, artifact_suffix, dump_model,
+                       load_model, read_metadata, remove_artifact, swap_latest,
+                       write_metadata)
+from columnar import require_for
+from features import DEFAULT_LAGS, DEFAULT_WINDOWS, time_features
+from instrumentation import file_size, stage
 
 
 # --------------------------------------------------------------------------- #
@@ -46,6 +138,26 @@ DATA_PROCESSED = ROOT / "data" / "processed"
 MODEL_DIR = ROOT / "model"
 LOGS_DIR = ROOT / "logs"
 TRAIN_LOG = LOGS_DIR / "train.logs"
+TRAIN_STATE = MODEL_DIR / ".train_state.json"
+TRAIN_CACHE = MODEL_DIR / ".train_cache.json"
+TARGETS_DIR = MODEL_DIR / "targets"
+# Nom du script dans les métriques (logs/metrics.jsonl)
+SCRIPT = "train"
+
+# Grille de recherche (mode grid) ; le mode random tire dans des intervalles
+# couvrant ces valeurs
+SEARCH_GRID = {
+    "max_depth": [3, 6, 9],
+    "learning_rate": [0.03, 0.05, 0.1],
+    "n_estimators": [100, 300],
+}
+
+# Extensions des fichiers prétraités reconnus (voir preprocessed.py --format)
+PROCESSED_SUFFIXES = (".csv", ".parquet", ".feather")
+# Fichier annexe des instants écrit par preprocessed.py (<fichier prétraité>.ts)
+TIMESTAMPS_SUFFIX = ".ts"
+# Part finale (chronologique) réservée à l'évaluation
+TEST_FRACTION = 0.2
 
 
 # --------------------------------------------------------------------------- #
@@ -66,47 +178,107 @@ def setup_logging() -> None:
 # --------------------------------------------------------------------------- #
 # Utilitaires
 # --------------------------------------------------------------------------- #
+def _is_processed_file(path: Path) -> bool:
+    return path.name.startswith("sales_processed_") and path.suffix in PROCESSED_SUFFIXES
+
+
 def find_latest_processed_csv(processed_dir: Path) -> Path:
+    """
+    Dernier fichier prétraité (sales_processed_*.csv|.parquet|.feather) :
+    dernière entrée du catalogue du dossier, ou à défaut (catalogue absent ou
+    périmé) le plus récent par date de modification.
+    """
+    entry = catalog.latest_entry(processed_dir, _is_processed_file)
+    if entry is not None:
+        return entry["path"]
     candidates = sorted(
-        processed_dir.glob("sales_processed_*.csv"),
+        (p for p in processed_dir.glob("sales_processed_*") if _is_processed_file(p)),
         key=lambda p: p.stat().st_mtime,
         reverse=True,
     )
     if not candidates:
         raise FileNotFoundError(
             f"Aucun fichier prétraité trouvé dans {processed_dir} "
-            "(attendu: sales_processed_YYYYMMDD_HHMM.csv)"
+            "(attendu: sales_processed_YYYYMMDD_HHMM.csv|.parquet|.feather)"
         )
     return candidates[0]
 
 
-def infer_X_y(df: pd.DataFrame, mode: str = 'first') -> Tuple[pd.DataFrame, pd.Series]:
+def load_processed(path: Path) -> pd.DataFrame:
+    """
+    Charge un fichier prétraité selon son extension ; les formats colonnaires
+    restituent directement les dtypes int64 (pas d'inférence texte).
+    """
+    require_for(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    if path.suffix == ".feather":
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+def _float32_frame(df: pd.DataFrame, columns: list[str],
+                   extra: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Colonnes 'columns' de 'df' puis celles de 'extra' dans un unique bloc
+    float32 alloué une fois (copie colonne par colonne, sans intermédiaire
+    float64) : X.to_numpy() en est une vue, transmise telle quelle à XGBoost.
+    """
+    extra_cols = [] if extra is None else list(extra.columns)
+    out = np.empty((len(df), len(columns) + len(extra_cols)), dtype=np.float32)
+    for i, col in enumerate(columns):
+        out[:, i] = df[col].to_numpy()
+    for i, col in enumerate(extra_cols, start=len(columns)):
+        out[:, i] = extra[col].to_numpy()  # type: ignore[index]
+    return pd.DataFrame(out, columns=list(columns) + extra_cols, index=df.index, copy=False)
+
+
+def infer_X_y(df: pd.DataFrame, mode: str = 'first', target: str | None = None,
+              extra: pd.DataFrame | None = None) -> Tuple[pd.DataFrame, pd.Series]:
     """
     Tente d'inférer une matrice X et une cible y selon deux heuristiques,
     pour être robuste au format 'wide' (plusieurs colonnes numérique déjà prétraitées).
 
     Modes :
-      first) y = première colonne numérique ; X = autres numériques
+      first) y = première colonne numérique (ou 'target' si fournie) ; X = autres numériques
       all)   y = somme des colonnes numériques ; X = colonnes numériques
+
+    X (float32, un seul bloc) est complété par les colonnes de 'extra'
+    (variables temporelles) ; y est en float32.
     """
-    df_num = df.select_dtypes(include=[np.number]).copy()
+    num_cols = list(df.select_dtypes(include=[np.number]).columns)
 
-    # Cas "first" : première colonne numérique comme cible
+    # Cas "first" : première colonne numérique (ou colonne demandée) comme cible
     if mode == 'first':
-        first_num = df_num.columns[0]
-        y = df_num[first_num].astype(float)
-        X = df_num.drop(columns=[first_num]).astype(float)
+        first_num = target if target is not None else num_cols[0]
+        y = pd.Series(df[first_num].to_numpy(dtype=np.float32), index=df.index, name=first_num)
+        X = _float32_frame(df, [c for c in num_cols if c != first_num], extra)
         return X, y
 
     # Cas "all" par défaut : on construit une cible = total (modelisation triviale)
-    y = df_num.sum(axis=1).astype(float)
-    X = df_num.astype(float)
+    y = df[num_cols].sum(axis=1).astype(np.float32)
+    X = _float32_frame(df, num_cols, extra)
     return X, y
 
 
-def build_model() -> object:
-    # Paramètres simples et sûrs (pas de GPU requis)
-    return XGBRegressor(
+def load_timestamps(path: Path, n_rows: int) -> pd.DatetimeIndex | None:
+    """
+    Instants des lignes du fichier prétraité (fichier annexe '.ts'), ou None
+    s'il est absent ou désaligné (ancien fichier prétraité).
+    """
+    ts_path = path.with_name(path.name + TIMESTAMPS_SUFFIX)
+    if not ts_path.exists():
+        return None
+    seconds = pd.read_csv(ts_path, header=None, dtype="int64")[0] if ts_path.stat().st_size else []
+    if len(seconds) != n_rows:
+        logging.warning(f"Fichier des instants désaligné ({len(seconds)} != {n_rows}) : ignoré")
+        return None
+    return pd.DatetimeIndex(pd.to_datetime(np.asarray(seconds), unit="s", utc=True))
+
+
+def model_params(**overrides) -> dict:
+    # Paramètres simples et sûrs (pas de GPU requis) ; surchargés par la recherche
+    params = dict(
         n_estimators=300,
         max_depth=6,
         learning_rate=0.05,
@@ -115,43 +287,611 @@ def build_model() -> object:
         objective="reg:squarederror",
         random_state=42,
         n_jobs=0,
+        # Histogrammes : le wrapper sklearn construit un QuantileDMatrix
+        # (valeurs quantifiées sur 1 octet) directement depuis le bloc float32
+        tree_method="hist",
     )
+    params.update(overrides)
+    return params
 
 
-def train_and_eval(X: pd.DataFrame, y: pd.Series) -> Tuple[object, dict]:
-    # Séparation train test en random ici
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+def build_model(**overrides) -> object:
+    from xgboost import XGBRegressor
+    return XGBRegressor(**model_params(**overrides))
 
-    # Instanciation et entraînement
-    model = build_model()
-    model.fit(X_train, y_train)  # type: ignore
 
-    # Évaluation
-    y_pred = model.predict(X_test)  # type: ignore
+def compute_metrics(y_true: pd.Series, y_pred: np.ndarray) -> dict:
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-    # Calcul des métriques
-    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
-    mae = float(mean_absolute_error(y_test, y_pred))
-    r2 = float(r2_score(y_test, y_pred))
-    metrics = {"rmse": rmse, "mae": mae, "r2": r2}
+    # Métriques en float64 (cibles et prédictions float32)
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    rmse = float(np.sqrt(mean_squared_error(y_true, y_pred)))
+    mae = float(mean_absolute_error(y_true, y_pred))
+    r2 = float(r2_score(y_true, y_pred)) if len(y_true) > 1 else float("nan")
+    return {"rmse": rmse, "mae": mae, "r2": r2}
 
+
+def time_splits(n_rows: int, cv_splits: int = 1) -> list[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Découpages chronologiques (entraînement sur le passé, test sur la suite) :
+    une seule coupure avec les TEST_FRACTION dernières lignes en test, ou
+    'cv_splits' plis TimeSeriesSplit (fenêtre d'entraînement croissante).
+    """
+    if cv_splits <= 1:
+        n_test = max(1, int(n_rows * TEST_FRACTION))
+        return [(np.arange(n_rows - n_test), np.arange(n_rows - n_test, n_rows))]
+    from sklearn.model_selection import TimeSeriesSplit
+    return list(TimeSeriesSplit(n_splits=cv_splits).split(np.arange(n_rows)))
+
+
+def _as_slice(idx: np.ndarray) -> slice | np.ndarray:
+    # Indices contigus (découpages chronologiques) : tranche, donc vue sans copie
+    if len(idx) and idx[-1] - idx[0] == len(idx) - 1:
+        return slice(int(idx[0]), int(idx[-1]) + 1)
+    return idx
+
+
+def train_and_eval(X: pd.DataFrame, y: pd.Series, params: dict | None = None,
+                   cv_splits: int = 1) -> Tuple[object, dict]:
+    # Tableaux float32 (vues si X vient d'infer_X_y) découpés par tranches :
+    # aucune copie des données avant le QuantileDMatrix d'XGBoost
+    data = X.to_numpy(dtype=np.float32)
+    target = y.to_numpy(dtype=np.float32)
+    feature_names = [str(c) for c in X.columns]
+
+    # Validation chronologique (lignes prétraitées en ordre temporel) : le
+    # modèle n'est jamais évalué sur des lignes antérieures à son entraînement
+    folds = []
+    for train_idx, test_idx in time_splits(len(X), cv_splits):
+        train_rows, test_rows = _as_slice(train_idx), _as_slice(test_idx)
+        # Instanciation et entraînement
+        model = build_model(**(params or {}))
+        model.fit(data[train_rows], target[train_rows])  # type: ignore
+        # Noms des colonnes conservés dans le booster (prédiction par nom, serve.py)
+        model.get_booster().feature_names = feature_names  # type: ignore
+
+        # Évaluation
+        y_pred = model.predict(data[test_rows])  # type: ignore
+        folds.append(compute_metrics(target[test_rows], y_pred))
+
+    # Métriques moyennes sur les plis ; modèle du dernier pli (historique le plus long)
+    metrics = {k: float(np.mean([f[k] for f in folds])) for k in folds[0]}
+    if len(folds) > 1:
+        metrics["folds"] = len(folds)
     return model, metrics
 
 
-def save_model(model: object, standard_path: Path) -> Path:
+def continue_training(prev_model: object, X_new: pd.DataFrame, y_new: pd.Series,
+                      n_rounds: int) -> Tuple[object, dict]:
+    """
+    Évalue le modèle précédent sur les nouvelles lignes (jamais vues), puis
+    poursuit le boosting de son booster avec 'n_rounds' arbres sur ces lignes.
+    """
+    metrics = compute_metrics(y_new, prev_model.predict(X_new))  # type: ignore
+
+    model = build_model()
+    model.set_params(n_estimators=n_rounds)  # type: ignore
+    model.fit(X_new, y_new, xgb_model=prev_model.get_booster())  # type: ignore
+    return model, metrics
+
+
+def load_train_state() -> dict | None:
+    if not TRAIN_STATE.exists():
+        return None
+    try:
+        return json.loads(TRAIN_STATE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_train_state(state: dict) -> None:
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = TRAIN_STATE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, TRAIN_STATE)
+
+
+def dataset_hash(df: pd.DataFrame) -> str:
+    """
+    Empreinte du contenu (colonnes, dtypes et valeurs) du jeu prétraité.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def cache_key(df: pd.DataFrame, infer_mode: str, train_mode: str, window: int,
+              timestamps: pd.DatetimeIndex | None = None, time_feats: bool = True,
+              cv_splits: int = 1, data_hash: str | None = None, model_format: str = "pkl",
+              model_compress: int = 0) -> str:
+    params = model_params()
+    payload = {
+        "data": data_hash or dataset_hash(df),
+        "params": {k: params[k] for k in sorted(params)},
+        "infer_mode": infer_mode,
+        "train_mode": train_mode,
+        "window": window if train_mode == "window" else None,
+        "features": {
+            "lags": DEFAULT_LAGS, "windows": DEFAULT_WINDOWS,
+            "timestamps": (hashlib.sha256(timestamps.asi8.tobytes()).hexdigest()
+                           if timestamps is not None else None),
+        } if time_feats else None,
+        "cv_splits": cv_splits,
+        "artifact": {"format": model_format, "compress": model_compress},
+    }
+    return hashlib.sha256(json.dumps(payload, default=str).encode()).hexdigest()
+
+
+def load_train_cache() -> dict:
+    if not TRAIN_CACHE.exists():
+        return {}
+    try:
+        return json.loads(TRAIN_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_train_cache(cache: dict) -> None:
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = TRAIN_CACHE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+    os.replace(tmp, TRAIN_CACHE)
+
+
+def evict_train_cache(cache: dict, keep: int, protected: set[Path]) -> list[Path]:
+    """
+    Conserve les 'keep' entrées les plus récemment utilisées et supprime les
+    artefacts des autres, sauf ceux protégés (model.pkl, modèle de l'état
+    d'entraînement) ou encore référencés par une entrée conservée.
+    """
+    ranked = sorted(cache, key=lambda k: cache[k]["last_used"], reverse=True)
+    evicted = [cache.pop(k) for k in ranked[max(keep, 0):]]
+    kept = {Path(e["model_path"]).resolve() for e in cache.values()}
+    protected = {p.resolve() for p in protected}
+
+    removed = []
+    for entry in evicted:
+        path = Path(entry["model_path"])
+        if path.resolve() in kept | protected or not path.exists():
+            continue
+        remove_artifact(path)
+        removed.append(path)
+    return removed
+
+
+def plan_training(requested: str, state: dict | None, X: pd.DataFrame, y: pd.Series,
+                  full_every: int, drift_ratio: float) -> Tuple[str, str, object | None]:
+    """
+    Choisit le mode effectif d'entraînement. Renvoie (mode, raison, modèle
+    précédent chargé ou None). Repli sur 'full' si l'incrémental est impossible.
+    """
+    if requested == "full":
+        return "full", "demandé", None
+    if requested == "window":
+        # Réentraînement de zéro sur la fenêtre : l'état précédent est inutile
+        return "window", "demandé", None
+    if state is None:
+        return "full", "aucun état d'entraînement précédent", None
+    if state.get("runs_since_full", 0) >= full_every:
+        return "full", f"réentraînement périodique (toutes les {full_every} exécutions)", None
+    if list(X.columns) != state.get("features"):
+        return "full", "colonnes explicatives modifiées", None
+    if len(X) < state.get("n_rows", 0):
+        return "full", "historique prétraité réécrit (moins de lignes)", None
+
+    prev_path = Path(state.get("model_path", ""))
+    if not prev_path.exists():
+        return "full", f"modèle précédent introuvable ({prev_path})", None
+    n_new = len(X) - state["n_rows"]
+    if n_new == 0:
+        return "noop", "aucune nouvelle ligne : modèle précédent conservé", None
+
+    prev_model = load_model(prev_path)
+    X_new, y_new = X.iloc[state["n_rows"]:], y.iloc[state["n_rows"]:]
+    new_rmse = compute_metrics(y_new, prev_model.predict(X_new))["rmse"]
+    ref_rmse = state.get("ref_rmse", 0.0)
+    if ref_rmse > 0 and new_rmse > drift_ratio * ref_rmse:
+        return "full", (f"dérive détectée (RMSE nouvelles lignes {new_rmse:.4f} > "
+                        f"{drift_ratio} x référence {ref_rmse:.4f})"), None
+    return "continue", f"{n_new} nouvelles lignes", prev_model
+
+
+def save_model(model: object, standard_path: Path, fmt: str = "pkl", compress: int = 0,
+               metadata: dict | None = None) -> Path:
+    """
+    Écrit l'artefact (remplacement atomique), son fichier annexe de
+    métadonnées et fait pointer 'model/latest' vers lui.
+    """
     MODEL_DIR.mkdir(parents=True, exist_ok=True)
     if not standard_path.exists():
-        # Première sauvegarde : model.pkl
-        joblib.dump(model, standard_path)
-        return standard_path
+        # Première sauvegarde : model.pkl (toujours un pickle, modèle standard)
+        path, fmt = standard_path, "pkl"
+    else:
+        # Sinon, sauvegarde horodatée au format demandé
+        stamp = datetime.now().strftime("%Y%m%d_%H%M")
+        path = MODEL_DIR / f"model_{stamp}{artifact_suffix(fmt, compress)}"
+    dump_model(model, path, compress)
+
+    write_metadata(path, {
+        **(metadata or {}),
+        "format": fmt,
+        "compress": compress,
+        "bytes": path.stat().st_size,
+        "created": datetime.now().isoformat(timespec="seconds"),
+    })
+    swap_latest(MODEL_DIR, path)
+    return path
+
+
+def reuse_cached_model(cache: dict, entry: dict, standard_model_path: Path) -> None:
+    """
+    Cache HIT : réutilise l'artefact de 'entry' (model.pkl, 'model/latest',
+    état d'entraînement) sans réentraîner.
+    """
+    cached_path = Path(entry["model_path"])
+    logging.info("Entraînement sauté : données et paramètres inchangés")
+    if not standard_model_path.exists() and cached_path.suffix == ".pkl":
+        standard_model_path.symlink_to(cached_path.resolve())
+        logging.info(f"Lien {standard_model_path} -> {cached_path}")
+    elif not standard_model_path.exists():
+        # model.pkl est toujours un pickle : l'artefact natif est rechargé et
+        # réécrit au format pickle plutôt que lié
+        dump_model(load_model(cached_path), standard_model_path)
+        write_metadata(standard_model_path, {
+            **(read_metadata(cached_path) or {}),
+            "format": "pkl",
+            "compress": 0,
+            "bytes": standard_model_path.stat().st_size,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        })
+        logging.info(f"Copie pickle de {cached_path} -> {standard_model_path}")
+    swap_latest(MODEL_DIR, cached_path)
+    entry["last_used"] = datetime.now().isoformat(timespec="seconds")
+    write_train_cache(cache)
+    # L'état d'entraînement (mode continue) repart de l'artefact réutilisé
+    state = load_train_state()
+    if state is not None:
+        state.update({"model_path": str(cached_path), "n_rows": entry["n_rows"]})
+        write_train_state(state)
 
-    # Sinon, sauvegarde horodatée
-    stamp = datetime.now().strftime("%Y%m%d_%H%M")
-    dated = MODEL_DIR / f"model_{stamp}.pkl"
-    joblib.dump(model, dated)
-    return dated
+
+def record_noop(state: dict) -> None:
+    """
+    Mode continue sans nouvelle ligne : le modèle précédent reste en service
+    ('model/latest' inchangé), seule l'exécution est notée dans l'état.
+    """
+    state.update({
+        "mode": "noop",
+        "noop_runs": state.get("noop_runs", 0) + 1,
+        "checked_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    write_train_state(state)
+    logging.info(f"Entraînement sauté : modèle conservé ({state['model_path']})")
+
+
+def record_training(model: object, metrics: dict, args: argparse.Namespace, *, mode: str,
+                    elapsed: float, state: dict | None, cache: dict, key: str, data_hash: str,
+                    source: str, features: list[str], n_rows: int) -> Path:
+    """
+    Sauvegarde le modèle entraîné, met à jour l'état d'entraînement et le
+    cache, puis applique la rétention. Renvoie le chemin de l'artefact.
+    """
+    standard_model_path = MODEL_DIR / "model.pkl"
+    # Sauvegarde du modèle
+    with stage(SCRIPT, "save_model", format=args.model_format) as st:
+        saved_path = save_model(model, standard_model_path, args.model_format,
+                                args.model_compress, {
+                                    "metrics": metrics,
+                                    "input_hash": data_hash,
+                                    "cache_key": key,
+                                    "source": source,
+                                    "features": features,
+                                    "n_rows": n_rows,
+                                    "mode": mode,
+                                    "params": model_params(),
+                                })
+        st.bytes_written = file_size(saved_path)
+    logging.info(f"Modèle sauvegardé : {saved_path} ({saved_path.stat().st_size} octets)")
+
+    # Mise à jour de l'état d'entraînement et temps gagné vs complet
+    if mode == "full" or state is None:
+        # Référence de durée : lignes réellement entraînées (fenêtre en mode
+        # window sans état précédent)
+        state = {
+            "full_seconds": elapsed,
+            "full_rows": min(n_rows, args.window) if mode == "window" else n_rows,
+            "ref_rmse": metrics["rmse"],
+            "runs_since_full": 0,
+        }
+        logging.info(f"Durée d'entraînement {mode} : {elapsed:.3f} s")
+    else:
+        # Estimation linéaire en nombre de lignes à partir du dernier complet
+        estimated = state["full_seconds"] * n_rows / max(state["full_rows"], 1)
+        state["runs_since_full"] += 1
+        logging.info(
+            f"Durée d'entraînement {mode} : {elapsed:.3f} s | complet estimé : "
+            f"{estimated:.3f} s | temps gagné : {estimated - elapsed:.3f} s"
+        )
+    state.update({
+        "model_path": str(saved_path),
+        "n_rows": n_rows,
+        "features": features,
+        "mode": mode,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    write_train_state(state)
+
+    # Enregistrement dans le cache (un fichier horodaté réécrit dans la même
+    # minute invalide les entrées qui le référençaient) puis éviction
+    cache = {k: e for k, e in cache.items()
+             if Path(e["model_path"]).resolve() != saved_path.resolve()}
+    now = datetime.now().isoformat(timespec="seconds")
+    # La clé inclut le format demandé : pas d'entrée si l'artefact est dans un
+    # autre format (première sauvegarde, toujours model.pkl)
+    if saved_path.name.endswith(artifact_suffix(args.model_format, args.model_compress)):
+        cache[key] = {"model_path": str(saved_path), "metrics": metrics,
+                      "n_rows": n_rows, "created": now, "last_used": now}
+    removed = evict_train_cache(cache, args.cache_keep, {standard_model_path, saved_path})
+    if removed:
+        logging.info(f"Cache d'entraînement : {len(removed)} modèle(s) évincé(s)")
+
+    # Rétention : N derniers et K meilleurs modèles horodatés
+    removed = apply_retention(MODEL_DIR, args.keep_last, args.keep_best,
+                              {standard_model_path, saved_path})
+    if removed:
+        cache = {k: e for k, e in cache.items() if Path(e["model_path"]).exists()}
+        logging.info(f"Rétention : {len(removed)} modèle(s) supprimé(s) "
+                     f"({', '.join(p.name for p in removed)})")
+    write_train_cache(cache)
+    return saved_path
+
+
+# --------------------------------------------------------------------------- #
+# Recherche d'hyperparamètres multi-cibles (pool de processus)
+# --------------------------------------------------------------------------- #
+def search_space(search: str, n_iter: int = 20, seed: int = 42) -> list[dict]:
+    if search == "none":
+        return [{}]
+    if search == "grid":
+        return [dict(zip(SEARCH_GRID, values))
+                for values in itertools.product(*SEARCH_GRID.values())]
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "max_depth": int(rng.integers(2, 11)),
+            "learning_rate": float(10 ** rng.uniform(-2, -0.7)),
+            "n_estimators": int(rng.integers(50, 501)),
+        }
+        for _ in range(n_iter)
+    ]
+
+
+# Jeu de données et variables temporelles partagés par les workers
+# (transmis une fois par processus)
+_SEARCH_DF: pd.DataFrame | None = None
+_SEARCH_FEATS: pd.DataFrame | None = None
+
+
+def _init_search_worker(df: pd.DataFrame, feats: pd.DataFrame | None) -> None:
+    global _SEARCH_DF, _SEARCH_FEATS
+    _SEARCH_DF, _SEARCH_FEATS = df, feats
+
+
+def _search_job(target: str, params: dict) -> dict:
+    X, y = infer_X_y(_SEARCH_DF, target=target, extra=_SEARCH_FEATS)  # type: ignore[arg-type]
+    start = time.perf_counter()
+    model, metrics = train_and_eval(X, y, params)
+    return {"target": target, "params": params, "metrics": metrics,
+            "seconds": time.perf_counter() - start, "model": model}
+
+
+def run_search(df: pd.DataFrame, targets: list[str], configs: list[dict],
+               workers: int, feats: pd.DataFrame | None = None
+               ) -> Tuple[dict, list[dict], float]:
+    """
+    Entraîne chaque couple (cible, configuration) dans un pool de processus.
+    Renvoie (meilleur résultat par cible, tous les résultats, durée murale).
+    """
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+    jobs = [(t, {**cfg, "n_jobs": n_threads}) for t in targets for cfg in configs]
+    logging.info(f"Recherche : {len(jobs)} jobs ({len(targets)} cibles x {len(configs)} "
+                 f"configurations) sur {workers} processus x {n_threads} thread(s) XGBoost")
+
+    best: dict = {}
+    results = []
+    start = time.perf_counter()
+    # forkserver : pas de fork() d'un processus multi-threadé (XGBoost, serveur)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                             initargs=(df, feats),
+                             mp_context=multiprocessing.get_context("forkserver")) as pool:
+        futures = [pool.submit(_search_job, t, params) for t, params in jobs]
+        for future in as_completed(futures):
+            res = future.result()
+            model = res.pop("model")
+            results.append(res)
+            current = best.get(res["target"])
+            if current is None or res["metrics"]["rmse"] < current["metrics"]["rmse"]:
+                best[res["target"]] = {**res, "model": model}
+    return best, results, time.perf_counter() - start
+
+
+def search_timings(results: list[dict], wall: float, serial_wall: float | None = None) -> dict:
+    """
+    Durées de la recherche : murale, somme des durées murales des jobs et
+    jobs simultanés en moyenne (leur rapport). L'accélération n'est donnée
+    que si une exécution série de référence a été mesurée ('serial_wall').
+    """
+    job_seconds = sum(r["seconds"] for r in results)
+    return {"wall_seconds": wall, "job_seconds": job_seconds,
+            "concurrency": job_seconds / wall if wall > 0 else None,
+            "serial_wall_seconds": serial_wall,
+            "speedup": serial_wall / wall if serial_wall and wall > 0 else None}
+
+
+def save_search_results(best: dict, results: list[dict], timings: dict) -> Path:
+    import joblib
+
+    TARGETS_DIR.mkdir(parents=True, exist_ok=True)
+    summary = {**timings, "best": {}, "results": results}
+    for target, res in sorted(best.items()):
+        path = TARGETS_DIR / f"model_{target}.pkl"
+        tmp = path.with_suffix(".tmp")
+        joblib.dump(res["model"], tmp)
+        os.replace(tmp, path)
+        summary["best"][target] = {"model_path": str(path), "params": res["params"],
+                                   "metrics": res["metrics"]}
+    summary_path = TARGETS_DIR / "search_summary.json"
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary_path
+
+
+# --------------------------------------------------------------------------- #
+# Vérification rapide des entrées (--check / --dry-run)
+# --------------------------------------------------------------------------- #
+def processed_columns(path: Path) -> dict[str, bool]:
+    """
+    Colonnes du fichier prétraité -> numérique ou non, sans charger les
+    données (schéma pour parquet/feather, quelques lignes pour le CSV).
+    """
+    if path.suffix in (".parquet", ".feather"):
+        require_for(path)
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        import pyarrow.types as pat
+
+        schema = (pq.read_schema(path) if path.suffix == ".parquet"
+                  else feather.read_table(path, memory_map=True).schema)
+        return {f.name: pat.is_integer(f.type) or pat.is_floating(f.type) for f in schema}
+    head = pd.read_csv(path, nrows=100)
+    return {c: pd.api.types.is_numeric_dtype(t) for c, t in head.dtypes.items()}
+
+
+def check_inputs(processed_dir: Path, targets: str | None = None) -> list[str]:
+    """
+    Vérifie que l'entraînement peut démarrer sans charger le jeu complet ni
+    importer xgboost/sklearn. Renvoie la liste des problèmes (vide si OK).
+    """
+    problems = []
+    try:
+        latest = find_latest_processed_csv(processed_dir)
+    except FileNotFoundError as e:
+        return [str(e)]
+    logging.info(f"Vérification : dernier fichier prétraité {latest} "
+                 f"({latest.stat().st_size} octets)")
+
+    try:
+        columns = processed_columns(latest)
+    except Exception as e:
+        return [f"Fichier prétraité illisible ({latest}) : {e}"]
+    numeric = [c for c, is_num in columns.items() if is_num]
+    if len(numeric) < 2:
+        problems.append(f"Au moins 2 colonnes numériques attendues, trouvé : {numeric}")
+    if "timestamp" in columns:
+        problems.append("Colonne 'timestamp' présente dans le fichier prétraité")
+    if targets and targets != "all":
+        unknown = sorted(set(targets.split(",")) - set(numeric))
+        if unknown:
+            problems.append(f"Cibles inconnues : {unknown}")
+
+    model_dir = MODEL_DIR if MODEL_DIR.exists() else MODEL_DIR.parent
+    if not os.access(model_dir, os.W_OK):
+        problems.append(f"Dossier des modèles non inscriptible : {model_dir}")
+    return problems
+
+
+# --------------------------------------------------------------------------- #
+# Entraînement hors mémoire (src/external.py)
+# --------------------------------------------------------------------------- #
+def source_identity(path: Path) -> dict:
+    """
+    Nombre de lignes et empreinte d'un fichier prétraité sans le charger :
+    entrée du catalogue si elle décrit encore le fichier, sinon comptage et
+    hachage par blocs.
+    """
+    entry = catalog.latest_entry(path.parent, lambda p: p.name == path.name)
+    if entry is not None and entry.get("bytes") == path.stat().st_size:
+        return {"rows": int(entry["rows"]), "sha256": entry["sha256"]}
+    from external import count_rows
+    return {"rows": count_rows(path), "sha256": catalog.file_sha256(path)}
+
+
+def run_external(args: argparse.Namespace, sources: list[Path]) -> None:
+    """
+    Entraînement complet par lots (--external-memory) sur 'sources', fichiers
+    prétraités consécutifs en ordre chronologique.
+    """
+    from external import BatchStream, count_lines, train_external
+
+    if args.targets:
+        raise ValueError("--targets n'est pas disponible avec --external-memory")
+    if args.train_mode != "full" or args.cv_splits > 1:
+        logging.warning("--external-memory : entraînement complet avec une coupure "
+                        "chronologique (--train-mode et --cv-splits ignorés)")
+
+    # Identité des sources (catalogue) et clé du cache, sans charger les données
+    time_feats = not args.no_time_features
+    ts_paths = [p.with_name(p.name + TIMESTAMPS_SUFFIX) for p in sources]
+    with stage(SCRIPT, "cache_key", bytes_read=sum(file_size(p) for p in sources)) as st:
+        identities = [source_identity(p) for p in sources]
+        n_rows = sum(i["rows"] for i in identities)
+        calendar = time_feats and all(t.exists() and count_lines(t) == i["rows"]
+                                      for t, i in zip(ts_paths, identities))
+        data_hash = hashlib.sha256(
+            json.dumps([i["sha256"] for i in identities]).encode()).hexdigest()
+        params = model_params()
+        key = hashlib.sha256(json.dumps({
+            "data": data_hash,
+            "params": {k: params[k] for k in sorted(params)},
+            "infer_mode": "first",
+            "train_mode": "external",
+            "batch_rows": args.batch_rows,
+            "features": {
+                "lags": DEFAULT_LAGS, "windows": DEFAULT_WINDOWS,
+                "timestamps": [catalog.file_sha256(t) for t in ts_paths] if calendar else None,
+            } if time_feats else None,
+        }, default=str).encode()).hexdigest()
+        st.rows_out = n_rows
+    if n_rows < 2:
+        raise ValueError(f"Pas assez de lignes pour entraîner et évaluer ({n_rows})")
+    logging.info(f"Entraînement hors mémoire : {len(sources)} fichier(s), {n_rows} lignes, "
+                 f"lots de {args.batch_rows} (calendrier : {'oui' if calendar else 'non'})")
+
+    cache = load_train_cache()
+    entry = cache.get(key)
+    if entry is not None and not args.no_cache and Path(entry["model_path"]).exists():
+        logging.info(f"Cache d'entraînement : HIT (clé {key[:12]}) -> {entry['model_path']}")
+        reuse_cached_model(cache, entry, MODEL_DIR / "model.pkl")
+        return
+    logging.info(f"Cache d'entraînement : MISS (clé {key[:12]})")
+
+    # Coupure chronologique identique à time_splits (TEST_FRACTION dernières lignes)
+    n_train = n_rows - max(1, int(n_rows * TEST_FRACTION))
+
+    def stream(start: int, stop: int | None) -> BatchStream:
+        return BatchStream(sources, args.batch_rows,
+                           lambda wide, feats: infer_X_y(wide, mode="first", extra=feats),
+                           time_feats, ts_paths if calendar else None, start, stop)
+
+    cache_root = Path(args.ext_cache_dir) if args.ext_cache_dir else MODEL_DIR / ".extmem"
+    cache_root.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with stage(SCRIPT, "fit", mode="external", rows_in=n_train, batch_rows=args.batch_rows):
+        with tempfile.TemporaryDirectory(prefix="xgb_", dir=cache_root) as cache_dir:
+            model, metrics, features = train_external(stream(0, n_train), stream(n_train, None),
+                                                      params, Path(cache_dir))
+    elapsed = time.perf_counter() - start
+    logging.info(
+        f"Métriques — RMSE: {metrics['rmse']:.4f} | "
+        f"MAE: {metrics['mae']:.4f} | R²: {metrics['r2']:.4f}"
+    )
+    logging.info(f"Débit hors mémoire : {n_rows / elapsed:.0f} lignes/s ({elapsed:.2f} s)")
+
+    record_training(model, metrics, args, mode="full", elapsed=elapsed, state=None,
+                    cache=cache, key=key, data_hash=data_hash,
+                    source=", ".join(str(p) for p in sources), features=features,
+                    n_rows=n_rows)
 
 
 # --------------------------------------------------------------------------- #
@@ -166,42 +906,220 @@ def main(argv: list[str] | None = None) -> int:
         "--processed-dir",
         type=str,
         default=str(DATA_PROCESSED),
-        help="Dossier contenant les CSV prétraités (défaut: data/processed).",
+        help="Dossier contenant les fichiers prétraités (défaut: data/processed).",
+    )
+    parser.add_argument(
+        "--train-mode",
+        choices=["full", "continue", "window"],
+        default="full",
+        help="full: réentraînement complet ; continue: poursuite du boosting du modèle "
+             "précédent sur les nouvelles lignes ; window: réentraînement sur les "
+             "dernières lignes (défaut: full).",
     )
+    parser.add_argument("--window", type=int, default=10_000,
+                        help="Nombre de lignes récentes pour --train-mode window.")
+    parser.add_argument("--extra-rounds", type=int, default=50,
+                        help="Arbres ajoutés à chaque exécution en mode continue.")
+    parser.add_argument("--full-every", type=int, default=60,
+                        help="Réentraînement complet forcé après N exécutions "
+                             "incrémentales (mode continue).")
+    parser.add_argument("--targets", type=str, default=None,
+                        help="Mode multi-cibles : 'all' (toutes les colonnes GPU) ou liste "
+                             "séparée par des virgules ; un modèle par cible.")
+    parser.add_argument("--search", choices=["none", "grid", "random"], default="none",
+                        help="Recherche d'hyperparamètres du mode multi-cibles.")
+    parser.add_argument("--n-iter", type=int, default=20,
+                        help="Nombre de configurations tirées en recherche random.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processus du pool de recherche (défaut: nombre de cœurs).")
+    parser.add_argument("--serial-baseline", action="store_true",
+                        help="Mesure d'abord la recherche en série (1 processus) pour "
+                             "logger l'accélération réelle du pool.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore le cache d'entraînement et réentraîne systématiquement.")
+    parser.add_argument("--cache-keep", type=int, default=20,
+                        help="Nombre d'entrées (et de modèles horodatés) conservées dans le cache.")
+    parser.add_argument("--drift-ratio", type=float, default=1.5,
+                        help="Réentraînement complet si le RMSE du modèle précédent sur les "
+                             "nouvelles lignes dépasse ce multiple du RMSE de référence.")
+    parser.add_argument("--no-time-features", action="store_true",
+                        help="N'ajoute pas les variables temporelles (décalages, moyennes "
+                             "glissantes, calendrier) aux variables explicatives.")
+    parser.add_argument("--cv-splits", type=int, default=1,
+                        help="Plis de validation chronologique (TimeSeriesSplit) ; 1 = une "
+                             "coupure avec les 20%% dernières lignes en test (défaut: 1).")
+    parser.add_argument("--model-format", choices=sorted(MODEL_FORMATS), default="pkl",
+                        help="Format des modèles horodatés : pkl (joblib), ubj ou json "
+                             "(formats natifs XGBoost) ; model.pkl reste un pickle.")
+    parser.add_argument("--model-compress", type=int, default=0,
+                        help="Niveau de compression 0-9 (zlib pour pkl, gzip pour ubj/json).")
+    parser.add_argument("--keep-last", type=int, default=0,
+                        help="Rétention : conserve les N derniers modèles horodatés (0 = tous).")
+    parser.add_argument("--keep-best", type=int, default=0,
+                        help="Rétention : conserve aussi les K meilleurs modèles (RMSE).")
+    parser.add_argument("--external-memory", action="store_true",
+                        help="Entraînement hors mémoire : données lues par lots (xgboost."
+                             "DataIter) avec un cache de pages sur disque.")
+    parser.add_argument("--batch-rows", type=int, default=250_000,
+                        help="Lignes par lot en mode --external-memory (défaut: 250000).")
+    parser.add_argument("--partitions", type=str, nargs="+", default=None,
+                        help="Fichiers prétraités consécutifs (ordre chronologique) à la "
+                             "place du dernier fichier, en mode --external-memory.")
+    parser.add_argument("--ext-cache-dir", type=str, default=None,
+                        help="Dossier du cache de pages XGBoost (défaut: model/.extmem).")
+    parser.add_argument("--check", "--dry-run", dest="check", action="store_true",
+                        help="Vérifie les entrées (fichier prétraité, colonnes, dossier des "
+                             "modèles) puis sort sans entraîner (code 0 si OK, 2 sinon).")
     args = parser.parse_args(argv)
 
     # Configuration de la log
     setup_logging()
 
+    # Chemin rapide : vérification des entrées sans import d'xgboost/sklearn
+    if args.check:
+        problems = check_inputs(Path(args.processed_dir), args.targets)
+        for problem in problems:
+            logging.error(f"Vérification : {problem}")
+            print(f"[train.py] {problem}")
+        if problems:
+            return 2
+        logging.info("Vérification : entrées OK")
+        print("[train.py] Entrées OK")
+        return 0
+
     # Corps de l'entraînement
     logging.info("=== Début de l'entraînement du modèle ===")
     try:
         # Récupération du fichier CSF le plus récent
         processed_dir = Path(args.processed_dir)
         processed_dir.mkdir(parents=True, exist_ok=True)
+
+        # Entraînement hors mémoire : fichiers lus par lots, jamais chargés
+        if args.external_memory:
+            sources = ([Path(p) for p in args.partitions] if args.partitions
+                       else [find_latest_processed_csv(processed_dir)])
+            logging.info(f"Fichier(s) prétraité(s) : {', '.join(str(p) for p in sources)}")
+            run_external(args, sources)
+            logging.info("=== Fin de l'entraînement du modèle ===")
+            return 0
+
         latest_csv = find_latest_processed_csv(processed_dir)
         logging.info(f"Dernier CSV prétraité : {latest_csv}")
 
         # Lecture du fichier dans un dataframe
-        df = pd.read_csv(latest_csv)
+        with stage(SCRIPT, "load", bytes_read=file_size(latest_csv)) as st:
+            df = load_processed(latest_csv)
+            st.rows_out = len(df)
         logging.info(f"Fichier chargé : {latest_csv.name} | shape={df.shape}")
 
+        # Variables temporelles (décalages, moyennes glissantes, calendrier)
+        timestamps = load_timestamps(latest_csv, len(df))
+        feats = None
+        if not args.no_time_features:
+            with stage(SCRIPT, "features", rows_in=len(df)) as st:
+                feats = time_features(df, timestamps)
+                st.set(n_features=feats.shape[1], calendar=timestamps is not None)
+            logging.info(f"Variables temporelles : {feats.shape[1]} colonnes "
+                         f"(calendrier : {'oui' if timestamps is not None else 'non'})")
+
+        # Mode multi-cibles : un modèle par colonne GPU, recherche en parallèle
+        if args.targets:
+            numeric = list(df.select_dtypes(include=[np.number]).columns)
+            targets = numeric if args.targets == "all" else args.targets.split(",")
+            unknown = sorted(set(targets) - set(numeric))
+            if unknown:
+                raise ValueError(f"Cibles inconnues : {unknown}")
+            configs = search_space(args.search, args.n_iter)
+            serial_wall = None
+            if args.serial_baseline:
+                # Référence série : 1 processus, XGBoost sur tous les cœurs
+                with stage(SCRIPT, "search_serial", rows_in=len(df),
+                           jobs=len(targets) * len(configs), workers=1):
+                    _, _, serial_wall = run_search(df, targets, configs, 1, feats)
+                logging.info(f"Exécution série de référence : {serial_wall:.2f} s")
+            with stage(SCRIPT, "search", rows_in=len(df), jobs=len(targets) * len(configs),
+                       workers=max(1, args.workers)):
+                best, results, wall = run_search(df, targets, configs, max(1, args.workers),
+                                                 feats)
+            timings = search_timings(results, wall, serial_wall)
+            summary_path = save_search_results(best, results, timings)
+            for target, res in sorted(best.items()):
+                m = res["metrics"]
+                logging.info(f"Meilleur modèle {target} : {res['params']} | RMSE: {m['rmse']:.4f} "
+                             f"| MAE: {m['mae']:.4f} | R²: {m['r2']:.4f}")
+            logging.info(f"Durée totale : {wall:.2f} s | somme des durées des jobs : "
+                         f"{timings['job_seconds']:.2f} s | jobs simultanés en moyenne : "
+                         f"{timings['concurrency']:.2f}")
+            if serial_wall is not None:
+                logging.info(f"Accélération vs exécution série ({serial_wall:.2f} s) : "
+                             f"x{timings['speedup']:.2f}")
+            logging.info(f"Résumé de la recherche : {summary_path}")
+            logging.info("=== Fin de l'entraînement du modèle ===")
+            return 0
+
         # Séparation variable cible et variable explicatives
-        X, y = infer_X_y(df)
+        infer_mode = "first"
+        with stage(SCRIPT, "infer_X_y", rows_in=len(df)) as st:
+            X, y = infer_X_y(df, mode=infer_mode, extra=feats)
+            st.rows_out = len(X)
+        # Les variables temporelles sont désormais copiées dans X
+        feats_used = feats is not None
+        feats = None
         logging.info(f"Jeu de données pour entraînement : X={X.shape}, y={y.shape}")
 
+        # Cache d'entraînement : données + hyperparamètres + modes déjà vus ?
+        standard_model_path = MODEL_DIR / "model.pkl"
+        with stage(SCRIPT, "cache_key", rows_in=len(df)):
+            data_hash = dataset_hash(df)
+            key = cache_key(df, infer_mode, args.train_mode, args.window, timestamps,
+                            feats_used, args.cv_splits, data_hash, args.model_format,
+                            args.model_compress)
+        cache = load_train_cache()
+        entry = cache.get(key)
+        if entry is not None and not args.no_cache and Path(entry["model_path"]).exists():
+            logging.info(f"Cache d'entraînement : HIT (clé {key[:12]}) -> {entry['model_path']}")
+            reuse_cached_model(cache, entry, standard_model_path)
+            logging.info("=== Fin de l'entraînement du modèle ===")
+            return 0
+        logging.info(f"Cache d'entraînement : MISS (clé {key[:12]})")
+
+        # Choix du mode d'entraînement (repli sur un entraînement complet si besoin)
+        state = load_train_state()
+        mode, reason, prev_model = plan_training(
+            args.train_mode, state, X, y, args.full_every, args.drift_ratio
+        )
+        logging.info(f"Mode d'entraînement : {mode} ({reason})")
+        if mode == "noop":
+            record_noop(state)
+            logging.info("=== Fin de l'entraînement du modèle ===")
+            return 0
+
         # Entrainement et évaluation du modèle
-        model, metrics = train_and_eval(X, y)
+        start = time.perf_counter()
+        with stage(SCRIPT, "fit", mode=mode) as st:
+            if mode == "continue":
+                n_prev = state["n_rows"]
+                st.rows_in = len(X) - n_prev
+                model, metrics = continue_training(
+                    prev_model, X.iloc[n_prev:], y.iloc[n_prev:], args.extra_rounds
+                )
+                logging.info("Métriques calculées sur les nouvelles lignes avant mise à jour")
+            elif mode == "window":
+                st.rows_in = min(len(X), args.window)
+                model, metrics = train_and_eval(X.iloc[-args.window:], y.iloc[-args.window:],
+                                                cv_splits=args.cv_splits)
+            else:
+                st.rows_in = len(X)
+                model, metrics = train_and_eval(X, y, cv_splits=args.cv_splits)
+        elapsed = time.perf_counter() - start
         logging.info(
             f"Métriques — RMSE: {metrics['rmse']:.4f} | "
             f"MAE: {metrics['mae']:.4f} | R²: {metrics['r2']:.4f}"
         )
 
-        # Sauvegarde du modèle
-        standard_model_path = MODEL_DIR / "model.pkl"
-        saved_path = save_model(model, standard_model_path)
-        logging.info(f"Modèle sauvegardé : {saved_path}")
-
+        record_training(model, metrics, args, mode=mode, elapsed=elapsed, state=state,
+                        cache=cache, key=key, data_hash=data_hash, source=str(latest_csv),
+                        features=list(X.columns), n_rows=len(X))
         logging.info("=== Fin de l'entraînement du modèle ===")
         return 0
 
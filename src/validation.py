@@ -0,0 +1,196 @@
+"""
+-------------------------------------------------------------------------------
+Validation des données brutes et prétraitées en une seule passe vectorisée.
+
+Contrôles (mêmes règles que tests/test_collect.py et tests/test_preprocessed.py) :
+  - raw       : schéma exact ['timestamp', 'model', 'sales'] ; 'sales' sans
+                NaN, entière et positive
+  - processed : pas de colonne 'timestamp', colonnes numériques de type
+                entier, valeurs sans NaN et positives
+
+Les métadonnées suffisent quand elles concluent : une colonne int64 NumPy
+est entière et sans NaN par construction (seul le signe est vérifié, sur
+l'ensemble des colonnes en un seul bloc) ; pour un fichier Parquet, le schéma
+et les statistiques des groupes de lignes (min, null_count) donnent tous les
+contrôles sans lire les données, seules les colonnes des groupes dont le
+minimum est négatif sont lues pour compter les valeurs négatives. Sinon les
+valeurs sont lues une fois et tous les contrôles sont calculés sur le même
+tableau.
+
+Rapport structuré (écrit par preprocessed.py à côté de chaque sortie, et par
+src/collect_writer.py pour le CSV brut à partir de ses compteurs,
+'<sortie>.validation.json' ; format, règles du brut et lecture/écriture
+partagés dans src/reports.py, sans pandas) :
+
+  {"path": "sales_processed_X.csv", "kind": "processed", "bytes": 1234,
+   "mtime_ns": ..., "rows": 42, "columns": [...], "source": "data",
+   "ok": true, "checks": {"no_nan": {"ok": true, "count": 0}, ...}}
+
+'bytes' et 'mtime_ns' identifient le fichier validé : read_report ne renvoie
+le rapport que s'il décrit encore le fichier, ce qui permet aux tests de
+vérifier le rapport au lieu de relire un CSV de plusieurs Go.
+
+Usage :
+    python src/validation.py data/processed/sales_processed_X.csv
+                             [--kind processed|raw] [--force]
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from columnar import require_for
+# combine, report_path et write_report sont réexportés pour preprocessed.py
+from reports import (build_report, check, combine, describe_file, raw_checks,  # noqa: F401
+                     read_report, report_path, write_report)
+
+
+# --------------------------------------------------------------------------- #
+# Contrôles
+# --------------------------------------------------------------------------- #
+def _value_counts(values: pd.DataFrame) -> tuple[int, int, int]:
+    """
+    NaN, non-entiers et négatifs des colonnes numériques de 'values' : les
+    colonnes entières NumPy n'ont que le signe à vérifier, les autres sont
+    converties une fois en float64.
+    """
+    int_cols = [c for c, t in values.dtypes.items() if t.kind in "iu"]
+    other = [c for c in values.columns if c not in int_cols]
+
+    n_nan = n_frac = n_neg = 0
+    if int_cols:
+        n_neg += int((values[int_cols].to_numpy() < 0).sum())
+    if other:
+        arr = values[other].to_numpy(dtype=np.float64, na_value=np.nan)
+        nan = np.isnan(arr)
+        n_nan = int(nan.sum())
+        with np.errstate(invalid="ignore"):
+            n_frac = int((~nan & (arr != np.floor(arr))).sum())
+            n_neg += int((arr < 0).sum())
+    return n_nan, n_frac, n_neg
+
+
+def _non_numeric(df: pd.DataFrame, columns: list[str]) -> list[str]:
+    return [c for c in columns if not pd.api.types.is_numeric_dtype(df[c])]
+
+
+def validate_frame(df: pd.DataFrame, kind: str = "processed") -> dict:
+    """
+    Contrôles d'un DataFrame déjà en mémoire (aucune relecture).
+    """
+    if kind == "raw":
+        values = ["sales"] if "sales" in df.columns else []
+        non_numeric = _non_numeric(df, values)
+        counts = _value_counts(df[[c for c in values if c not in non_numeric]])
+        checks = raw_checks(list(df.columns), non_numeric, *counts)
+        return build_report(kind, len(df), list(map(str, df.columns)), "data", checks)
+
+    values = [c for c in df.columns if c != "timestamp"]
+    not_int = [c for c in values if df[c].dtype.kind not in "iu"]
+    non_numeric = _non_numeric(df, values)
+    n_nan, n_frac, n_neg = _value_counts(df[[c for c in values if c not in non_numeric]])
+    checks = {
+        "no_timestamp": check(int("timestamp" in df.columns)),
+        "integer_dtype": check(len(not_int), columns=not_int),
+        "numeric": check(len(non_numeric), columns=non_numeric),
+        "no_nan": check(n_nan),
+        "integer": check(n_frac),
+        "non_negative": check(n_neg),
+    }
+    return build_report(kind, len(df), list(map(str, df.columns)), "data", checks)
+
+
+def _validate_parquet(path: Path) -> dict | None:
+    """
+    Contrôles d'un Parquet à partir du schéma et des statistiques des
+    groupes de lignes ; None si des statistiques manquent. Les valeurs
+    négatives sont comptées en lisant les seules colonnes des groupes de
+    lignes dont le minimum est négatif.
+    """
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    meta = pq.read_metadata(path)
+    schema = meta.schema.to_arrow_schema()
+    columns = list(schema.names)
+    values = [c for c in columns if c != "timestamp"]
+    n_nan = n_neg = 0
+    negative: dict[int, list[str]] = {}
+    for i in range(meta.num_row_groups):
+        group = meta.row_group(i)
+        for j in range(group.num_columns):
+            col = group.column(j)
+            if col.path_in_schema not in values:
+                continue
+            stats = col.statistics
+            if stats is None or not stats.has_min_max or stats.null_count is None:
+                return None
+            n_nan += stats.null_count
+            if stats.min < 0:
+                negative.setdefault(i, []).append(col.path_in_schema)
+
+    if negative:
+        parquet = pq.ParquetFile(path)
+        for i, cols in negative.items():
+            group = parquet.read_row_group(i, columns=cols)
+            n_neg += sum(pc.sum(pc.less(group[c], 0)).as_py() or 0 for c in cols)
+
+    import pyarrow as pa
+
+    not_int = [c for c in values if not pa.types.is_integer(schema.field(c).type)]
+    checks = {
+        "no_timestamp": check(int("timestamp" in columns)),
+        "integer_dtype": check(len(not_int), columns=not_int),
+        "numeric": check(0, columns=[]),
+        "no_nan": check(n_nan),
+        "integer": check(len(not_int)),
+        "non_negative": check(n_neg),
+    }
+    source = "metadata+row_groups" if negative else "metadata"
+    return build_report("processed", meta.num_rows, columns, source, checks)
+
+
+def validate_file(path: Path, kind: str = "processed") -> dict:
+    """
+    Contrôles d'un fichier : métadonnées seules pour Parquet quand elles
+    suffisent, sinon une seule lecture des données.
+    """
+    path = Path(path)
+    require_for(path)
+    report = _validate_parquet(path) if path.suffix == ".parquet" else None
+    if report is None:
+        if path.suffix == ".parquet":
+            df = pd.read_parquet(path)
+        elif path.suffix == ".feather":
+            df = pd.read_feather(path)
+        else:
+            df = pd.read_csv(path)
+        report = validate_frame(df, kind)
+    return describe_file(report, path)
+
+
+# --------------------------------------------------------------------------- #
+# Main
+# --------------------------------------------------------------------------- #
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Validation d'un fichier brut ou prétraité.")
+    parser.add_argument("path", type=str, help="Fichier à valider.")
+    parser.add_argument("--kind", choices=["processed", "raw"], default="processed")
+    parser.add_argument("--force", action="store_true",
+                        help="Revalide même si un rapport à jour existe.")
+    args = parser.parse_args(argv)
+
+    path = Path(args.path)
+    report = None if args.force else read_report(path)
+    if report is None:
+        report = validate_file(path, args.kind)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
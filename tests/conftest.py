@@ -0,0 +1,12 @@
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def metrics_file(tmp_path, monkeypatch):
+    """Redirige les métriques et profils vers un dossier temporaire."""
+    path = tmp_path / "metrics.jsonl"
+    monkeypatch.setattr(instrumentation, "METRICS_FILE", path)
+    monkeypatch.setattr(instrumentation, "PROFILE_DIR", tmp_path / "profiles")
+    return path
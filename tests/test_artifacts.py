@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBRegressor
+
+import artifacts
+import serve
+import train
+
+
+def _fit(seed=0, n_estimators=5):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.integers(0, 20, (100, 3)), columns=["rtx3070", "rtx3080", "rx6700"])
+    return XGBRegressor(n_estimators=n_estimators, max_depth=2).fit(X, rng.integers(0, 20, 100)), X
+
+
+@pytest.mark.parametrize("fmt,compress", [("pkl", 0), ("pkl", 3), ("ubj", 0), ("ubj", 6),
+                                          ("json", 0)])
+def test_round_trip_all_formats(tmp_path, fmt, compress):
+    model, X = _fit()
+    path = tmp_path / f"model_x{artifacts.artifact_suffix(fmt, compress)}"
+    artifacts.dump_model(model, path, compress)
+    loaded = artifacts.load_model(path)
+
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X), rtol=1e-6)
+    assert loaded.get_booster().feature_names == list(X.columns)
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]  # aucun fichier temporaire
+
+
+def test_retention_keeps_last_and_best(tmp_path):
+    model, _ = _fit()
+    rmse = [5.0, 1.0, 4.0, 3.0, 2.5]
+    paths = []
+    for i, value in enumerate(rmse):
+        path = artifacts.dump_model(model, tmp_path / f"model_2025010{i}_0000.ubj")
+        artifacts.write_metadata(path, {"metrics": {"rmse": value},
+                                        "created": f"2025-01-0{i + 1}T00:00:00"})
+        paths.append(path)
+    artifacts.dump_model(model, tmp_path / "model.pkl")
+    artifacts.swap_latest(tmp_path, paths[0])
+
+    removed = artifacts.apply_retention(tmp_path, keep_last=2, keep_best=1,
+                                        protected={tmp_path / "model.pkl"})
+    # 2 plus récents (3, 4), meilleur RMSE (1), cible de 'latest' (0)
+    assert sorted(p.name for p in removed) == [paths[2].name]
+    assert not artifacts.metadata_path(paths[2]).exists()
+    assert artifacts.apply_retention(tmp_path, 0, 0, set()) == []
+
+
+def test_train_native_format_pointer_and_metadata(tmp_path, monkeypatch):
+    model_dir = tmp_path / "model"
+    monkeypatch.setattr(train, "MODEL_DIR", model_dir)
+    monkeypatch.setattr(train, "TRAIN_STATE", model_dir / ".train_state.json")
+    monkeypatch.setattr(train, "TRAIN_CACHE", model_dir / ".train_cache.json")
+    monkeypatch.setattr(train, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(train, "TRAIN_LOG", tmp_path / "train.logs")
+    proc = tmp_path / "processed"
+    proc.mkdir()
+    rng = np.random.default_rng(0)
+    history = pd.DataFrame(rng.integers(0, 20, (300, 3)), columns=["rtx3060", "rtx3070", "rx6700"])
+    history.iloc[:250].to_csv(proc / "sales_processed_1.csv", index=False)
+    args = ["--processed-dir", str(proc), "--model-format", "ubj", "--model-compress", "6"]
+    assert train.main(args) == 0
+    assert artifacts.resolve_latest(model_dir) == (model_dir / "model.pkl").resolve()
+
+    history.to_csv(proc / "sales_processed_2.csv", index=False)
+    assert train.main(args + ["--train-mode", "continue", "--drift-ratio", "100"]) == 0
+    state = train.load_train_state()
+    saved = model_dir / (state["model_path"].rsplit("/", 1)[-1])
+    assert saved.name.endswith(".ubj.gz") and state["mode"] == "continue"
+    assert artifacts.resolve_latest(model_dir) == saved.resolve()
+    meta = json.loads(artifacts.metadata_path(saved).read_text())
+    assert meta["format"] == "ubj" and meta["n_rows"] == 300
+    assert meta["input_hash"] == train.dataset_hash(history)
+    assert meta["features"] == state["features"]
+
+    # Le service charge le dernier artefact natif via le pointeur
+    holder = serve.ModelHolder(model_dir)
+    assert holder.reload_if_changed() and holder.path == saved.resolve()
+    assert holder.features == state["features"]
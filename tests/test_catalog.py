@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import catalog
+import preprocessed
+import train
+
+COLLECT_SH = Path(__file__).resolve().parents[1] / "scripts" / "collect.sh"
+HEADER = "timestamp,model,sales\n"
+
+
+def _write(path, text, rows, t_min, t_max):
+    path.write_text(text)
+    return catalog.append_entry(path, rows, t_min, t_max, catalog.file_sha256(path))
+
+
+def test_latest_and_since_lookups(tmp_path):
+    for minute in range(50):
+        _write(tmp_path / f"sales_{minute:02d}.csv", HEADER, 1,
+               "2025-01-01T00:00:00Z", f"2025-01-01T00:{minute:02d}:00+00:00")
+    latest = catalog.latest_entry(tmp_path)
+    assert latest["path"] == tmp_path / "sales_49.csv"
+    assert latest["t_max"] == "2025-01-01T00:49:00Z"
+
+    # Dichotomie : mêmes entrées qu'un filtrage linéaire (ligne illisible ignorée)
+    with open(catalog.catalog_path(tmp_path), "a") as fh:
+        fh.write('{"path": "trunc')
+    os.utime(catalog.catalog_path(tmp_path))
+    since = catalog.entries_since(tmp_path, "2025-01-01T00:37:30Z")
+    assert [e["path"] for e in since] == [f"sales_{m:02d}.csv" for m in range(38, 50)]
+    assert catalog.entries_since(tmp_path, "2030-01-01T00:00:00Z") == []
+    assert len(catalog.entries_since(tmp_path, "2000-01-01T00:00:00Z")) == 50
+
+
+def test_since_skips_missing_files_and_stale_catalog(tmp_path):
+    for minute in range(3):
+        _write(tmp_path / f"sales_{minute}.csv", HEADER, 1,
+               "2025-01-01T00:00:00Z", f"2025-01-01T00:0{minute}:00Z")
+    # Fichier supprimé : son entrée n'est plus renvoyée
+    (tmp_path / "sales_1.csv").unlink()
+    os.utime(catalog.catalog_path(tmp_path))
+    since = catalog.entries_since(tmp_path, "2025-01-01T00:00:00Z")
+    assert [e["path"] for e in since] == ["sales_0.csv", "sales_2.csv"]
+
+    # Dossier modifié après le catalogue : même repli que latest_entry
+    os.utime(tmp_path, (3e9, 3e9))
+    assert catalog.entries_since(tmp_path, "2025-01-01T00:00:00Z") is None
+    assert catalog.latest_entry(tmp_path) is None
+
+
+def test_stale_catalog_falls_back_to_directory_scan(tmp_path):
+    _write(tmp_path / "sales_processed_1.csv", "a\n1\n", 1, None, None)
+    _write(tmp_path / "sales_processed_2.csv", "a\n2\n", 1, None, None)
+    # Le catalogue fait foi même si les dates de modification disent autre chose
+    os.utime(tmp_path / "sales_processed_1.csv", (2e9, 2e9))
+    assert train.find_latest_processed_csv(tmp_path).name == "sales_processed_2.csv"
+
+    # Fichier déposé hors catalogue : catalogue périmé, repli sur le parcours
+    (tmp_path / "sales_processed_3.csv").write_text("a\n3\n")
+    os.utime(tmp_path, (3e9, 3e9))
+    assert catalog.latest_entry(tmp_path) is None
+    assert train.find_latest_processed_csv(tmp_path).name == "sales_processed_1.csv"
+
+
+def test_preprocessed_indexes_outputs(tmp_path, monkeypatch):
+    proc_dir = tmp_path / "processed"
+    monkeypatch.setattr(preprocessed, "PROC_DIR", proc_dir)
+    monkeypatch.setattr(preprocessed, "CHECKPOINT_FILE", proc_dir / ".checkpoint.json")
+    monkeypatch.setattr(preprocessed, "LOG_FILE", tmp_path / "preprocessed.logs")
+    monkeypatch.setattr(preprocessed, "RAW_MANIFEST", tmp_path / "manifests" / "latest.json")
+    raw = tmp_path / "sales.csv"
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n2025-01-01T00:01:00Z,rtx3060,1\n")
+    out1, out2 = proc_dir / "sales_processed_1.csv", proc_dir / "sales_processed_2.csv"
+    assert preprocessed.main(["--input", str(raw), "--output", str(out1), "--full-rebuild"]) == 0
+    with open(raw, "a") as fh:
+        fh.write("2025-01-01T00:05:00Z,rtx3060,2\n")
+    assert preprocessed.main(["--input", str(raw), "--output", str(out2)]) == 0
+
+    latest = catalog.latest_entry(proc_dir)
+    assert latest["path"] == out2
+    assert (latest["rows"], latest["t_min"], latest["t_max"]) == (
+        3, "2025-01-01T00:00:00Z", "2025-01-01T00:05:00Z")
+    assert latest["sha256"] == hashlib.sha256(out2.read_bytes()).hexdigest()
+    assert train.find_latest_processed_csv(proc_dir) == out2
+
+
+@pytest.mark.parametrize("mode", ["append", "snapshot"])
+def test_collect_extends_catalog_entries(tmp_path, mode):
+    raw_dir = tmp_path / "data" / "raw"
+    raw_dir.mkdir(parents=True)
+    (raw_dir / "sales_data.csv").write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n")
+    env = {"PATH": "/usr/bin:/bin", "API_BASE": "http://127.0.0.1:9", "COLLECT_MODE": mode}
+    for _ in range(2):
+        subprocess.run(["bash", str(COLLECT_SH)], cwd=tmp_path, env=env,
+                       check=True, capture_output=True)
+
+    lines = catalog.catalog_path(raw_dir).read_text().splitlines()
+    entries = [json.loads(line) for line in lines]
+    assert [e["rows"] for e in entries] == [6, 11]
+    latest = catalog.latest_entry(raw_dir)
+    assert latest["bytes"] == latest["path"].stat().st_size
+    assert latest["rows"] == len(latest["path"].read_text().splitlines()) - 1
+    assert latest["t_min"] == "2025-01-01T00:00:00Z"
+    # Empreinte chaînée : première entrée = contenu complet, puis prolongée par lot
+    assert entries[1]["sha256"] != entries[0]["sha256"]
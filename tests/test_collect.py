@@ -5,6 +5,8 @@ from datetime import datetime
 import sys
 from contextlib import redirect_stdout
 
+import validation
+
 def get_latest_sales_csv():
     """
     Trouve le dernier fichier CSV créé dans le dossier data/raw
@@ -30,14 +32,26 @@ def test_sales_csv_structure():
 
         try:
             latest_csv = get_latest_sales_csv()
-            df = pd.read_csv(latest_csv)
-            print(f"Fichier CSV chargé avec {df.shape[0]} lignes et {df.shape[1]} colonnes")
-
-            assert len(df.columns) == 3, f"Le CSV doit contenir exactement 3 colonnes, trouvé {len(df.columns)}"
-            assert 'sales' in df.columns, "Le CSV doit contenir une colonne 'sales'"
-            assert not df['sales'].isnull().any(), "La colonne 'sales' ne doit pas contenir de valeurs NaN"
-            assert np.all(np.equal(np.floor(df['sales']), df['sales'])), "La colonne 'sales' doit contenir uniquement des entiers"
-            assert (df['sales'] >= 0).all(), "La colonne 'sales' doit contenir uniquement des valeurs positives"
+            # Rapport de validation à jour (écrit par collect_writer.py) : pas de relecture
+            report = validation.read_report(latest_csv)
+            if report is not None and report.get("kind") == "raw":
+                columns, checks = report["columns"], report["checks"]
+                print(f"Rapport de validation chargé ({report['source']}) avec {report['rows']} lignes et {len(columns)} colonnes")
+
+                assert len(columns) == 3, f"Le CSV doit contenir exactement 3 colonnes, trouvé {len(columns)}"
+                assert 'sales' in columns, "Le CSV doit contenir une colonne 'sales'"
+                assert checks['no_nan']['ok'], "La colonne 'sales' ne doit pas contenir de valeurs NaN"
+                assert checks['numeric']['ok'] and checks['integer']['ok'], "La colonne 'sales' doit contenir uniquement des entiers"
+                assert checks['non_negative']['ok'], "La colonne 'sales' doit contenir uniquement des valeurs positives"
+            else:
+                df = pd.read_csv(latest_csv)
+                print(f"Fichier CSV chargé avec {df.shape[0]} lignes et {df.shape[1]} colonnes")
+
+                assert len(df.columns) == 3, f"Le CSV doit contenir exactement 3 colonnes, trouvé {len(df.columns)}"
+                assert 'sales' in df.columns, "Le CSV doit contenir une colonne 'sales'"
+                assert not df['sales'].isnull().any(), "La colonne 'sales' ne doit pas contenir de valeurs NaN"
+                assert np.all(np.equal(np.floor(df['sales']), df['sales'])), "La colonne 'sales' doit contenir uniquement des entiers"
+                assert (df['sales'] >= 0).all(), "La colonne 'sales' doit contenir uniquement des valeurs positives"
 
             print("Test réussi : Le CSV est valide.")
         
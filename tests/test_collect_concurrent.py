@@ -0,0 +1,65 @@
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+COLLECT_SH = Path(__file__).resolve().parents[1] / "scripts" / "collect.sh"
+MODELS = ["rtx3060", "rtx3070", "rtx3080", "rtx3090", "rx6700"]
+DELAY_S = 1.0
+
+
+class _SlowSalesHandler(BaseHTTPRequestHandler):
+    """Stub de l'API : chaque modèle répond après DELAY_S secondes (rx6700 en erreur)."""
+
+    def do_GET(self):
+        time.sleep(DELAY_S)
+        model = self.path.strip("/")
+        if model == "rx6700":
+            self.send_error(500)
+            return
+        body = str(MODELS.index(model) + 1).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowSalesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_collect_fetches_models_concurrently(tmp_path, stub_api):
+    start = time.monotonic()
+    subprocess.run(
+        ["bash", str(COLLECT_SH)],
+        cwd=tmp_path,
+        env={"PATH": "/usr/bin:/bin", "API_BASE": stub_api},
+        check=True,
+        capture_output=True,
+    )
+    elapsed = time.monotonic() - start
+
+    # En série le lot prendrait len(MODELS) * DELAY_S secondes
+    assert elapsed < 2 * DELAY_S + 1
+
+    df = pd.read_csv(tmp_path / "data" / "raw" / "sales_store.csv")
+    assert list(df.columns) == ["timestamp", "model", "sales"]
+    assert df["model"].tolist() == MODELS
+    assert df["sales"].tolist() == [1, 2, 3, 4, 0]
+    assert df["timestamp"].nunique() == 1
+
+    logs = (tmp_path / "logs" / "collect.logs").read_text()
+    assert "Résultat | rtx3080 -> 3" in logs
+    assert "Avertissement | rx6700 -> fallback à 0 (échec API)" in logs
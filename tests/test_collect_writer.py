@@ -0,0 +1,136 @@
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import collect_writer
+import validation
+
+COLLECT_SH = Path(__file__).resolve().parents[1] / "scripts" / "collect.sh"
+MODELS = ["rtx3060", "rtx3070", "rtx3080", "rtx3090", "rx6700"]
+HEADER = b"timestamp,model,sales\n"
+
+
+def _batch(ts: str, sales: list) -> bytes:
+    return "".join(f"{ts},{m},{s}\n" for m, s in zip(MODELS, sales)).encode()
+
+
+def test_append_matches_full_scan(tmp_path):
+    csv = tmp_path / "sales_store.csv"
+    csv.write_bytes(HEADER + b"2025-01-01T00:00:00Z,rtx3060,4")  # sans saut de ligne final
+    first = collect_writer.append_batch(csv, b"\n" + _batch("2025-01-01T00:01:00Z", [1] * 5))
+    assert first["rebuilt"] and first["base_bytes"] == len(HEADER) + 30
+
+    second = collect_writer.append_batch(csv, _batch("2025-01-01T00:02:00Z", [2, 0, 0, 0, 3]))
+    assert not second["rebuilt"]
+    data = csv.read_bytes()
+    assert (second["bytes"], second["lines"], second["columns"], second["rows"]) == (
+        len(data), data.count(b"\n"), 3, 11)
+    assert (second["t_min"], second["t_max"]) == ("2025-01-01T00:00:00Z", "2025-01-01T00:02:00Z")
+
+    counters = collect_writer.read_counters(csv)
+    assert counters["models"]["rtx3060"] == {"rows": 3, "sales": 7}
+    assert counters["models"]["rx6700"] == {"rows": 2, "sales": 4}
+    rescanned = collect_writer.scan_counters(csv)
+    assert {k: counters[k] for k in rescanned} == rescanned
+
+    # Rapport de validation du CSV brut tenu à jour sans relecture
+    report = validation.read_report(csv)
+    assert report["ok"] and report["source"] == "counters"
+    collect_writer.append_batch(csv, _batch("2025-01-01T00:03:00Z", [1, -2, "", "2.5", 1]))
+    report = validation.read_report(csv)
+    expected = validation.validate_file(csv, "raw")
+    assert not report["ok"] and report["rows"] == expected["rows"] == 16
+    assert ({k: c["count"] for k, c in report["checks"].items()}
+            == {k: c["count"] for k, c in expected["checks"].items()})
+
+
+def test_summary_is_constant_time_until_file_changes(tmp_path, monkeypatch):
+    csv = tmp_path / "sales_store.csv"
+    csv.write_bytes(HEADER)
+    collect_writer.append_batch(csv, _batch("2025-01-01T00:00:00Z", [1] * 5))
+
+    # Compteurs à jour : aucune relecture du fichier
+    monkeypatch.setattr(collect_writer, "scan_counters", pytest.fail)
+    collect_writer.append_batch(csv, _batch("2025-01-01T00:00:10Z", [1] * 5))
+    assert collect_writer.main([str(csv), "--summary"]) == 0
+    monkeypatch.undo()
+
+    # Fichier modifié hors de l'écrivain : compteurs reconstruits
+    with open(csv, "ab") as fh:
+        fh.write(b"2025-01-01T00:00:20Z,rtx3060,5\n")
+    assert collect_writer.read_counters(csv) is None
+    counters, rebuilt = collect_writer.load_counters(csv)
+    assert rebuilt and counters["rows"] == 11 and counters["models"]["rtx3060"]["sales"] == 7
+
+
+class _SalesHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = str(MODELS.index(self.path.strip("/")) + 1).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SalesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.mark.parametrize("mode", ["append", "snapshot"])
+def test_collect_uses_counters(tmp_path, stub_api, mode):
+    # Instantané historique (avec ses compteurs) copié à la première exécution
+    raw = tmp_path / "data" / "raw"
+    raw.mkdir(parents=True)
+    seed = raw / "sales_20250101_0000.csv"
+    seed.write_bytes(HEADER)
+    collect_writer.append_batch(seed, _batch("2025-01-01T00:00:00Z", [1] * 5))
+
+    env = {"PATH": "/usr/bin:/bin", "API_BASE": stub_api, "COLLECT_MODE": mode}
+    for _ in range(2):
+        subprocess.run(["bash", str(COLLECT_SH)], cwd=tmp_path, env=env, check=True,
+                       capture_output=True)
+
+    csv = max(raw.glob("sales_*.csv"), key=lambda p: p.stat().st_mtime)
+    assert csv != seed
+    counters = collect_writer.read_counters(csv)
+    assert counters is not None and counters["rows"] == 15
+    assert counters["models"]["rtx3080"] == {"rows": 3, "sales": 7}
+
+    entry = json.loads((raw / "catalog.jsonl").read_text().splitlines()[-1])
+    assert (entry["path"], entry["bytes"], entry["rows"]) == (
+        csv.name, csv.stat().st_size, counters["rows"])
+    if mode == "append":
+        manifest = json.loads((raw / "manifests" / "latest.json").read_text())
+        assert (manifest["bytes"], manifest["lines"]) == (
+            csv.stat().st_size, csv.read_bytes().count(b"\n"))
+
+    logs = (tmp_path / "logs" / "collect.logs").read_text()
+    assert "Compteurs reconstruits" not in logs
+    assert f"lignes={counters['lines']} colonnes=3 dernier timestamp={counters['t_max']}" in logs
+
+
+def test_collect_prunes_old_manifests(tmp_path, stub_api):
+    manifests = tmp_path / "data" / "raw" / "manifests"
+    manifests.mkdir(parents=True)
+    for stamp in ("20250101_0000", "20250101_0001", "20250101_0002"):
+        (manifests / f"sales_{stamp}.json").write_text("{}\n")
+
+    env = {"PATH": "/usr/bin:/bin", "API_BASE": stub_api, "MANIFEST_KEEP": "2"}
+    subprocess.run(["bash", str(COLLECT_SH)], cwd=tmp_path, env=env, check=True,
+                   capture_output=True)
+
+    # Le plus récent des anciens et celui de l'exécution, plus le pointeur
+    kept = sorted(p.name for p in manifests.glob("*.json"))
+    assert len(kept) == 3 and kept[0] == "latest.json" and kept[1] == "sales_20250101_0002.json"
+    assert (manifests / kept[2]).read_text() == (manifests / "latest.json").read_text()
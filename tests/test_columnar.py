@@ -0,0 +1,31 @@
+import pytest
+
+import columnar
+import forecast
+import preprocessed
+import train
+
+
+@pytest.fixture
+def no_pyarrow(monkeypatch):
+    """Simule un environnement installé sans l'extra 'columnar'."""
+    monkeypatch.setattr(columnar, "has_pyarrow", lambda: False)
+    monkeypatch.setattr(preprocessed, "has_pyarrow", lambda: False)
+    monkeypatch.setattr(forecast, "has_pyarrow", lambda: False)
+
+
+@pytest.mark.parametrize("module, argv", [
+    (preprocessed, ["--format", "parquet"]),
+    (preprocessed, ["--output", "sales.feather"]),
+    (forecast, ["--format", "feather"]),
+])
+def test_cli_rejects_columnar_format_without_pyarrow(no_pyarrow, capsys, module, argv):
+    with pytest.raises(SystemExit) as exc:
+        module.main(argv)
+    assert exc.value.code == 2
+    assert "extra 'columnar'" in capsys.readouterr().err
+
+
+def test_load_columnar_without_pyarrow_names_the_extra(no_pyarrow, tmp_path):
+    with pytest.raises(ImportError, match="extra 'columnar'"):
+        train.load_processed(tmp_path / "sales_processed.parquet")
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import external
+import preprocessed
+import train
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Redirige modèles, état d'entraînement et logs vers un dossier temporaire."""
+    model_dir = tmp_path / "model"
+    monkeypatch.setattr(train, "MODEL_DIR", model_dir)
+    monkeypatch.setattr(train, "TRAIN_STATE", model_dir / ".train_state.json")
+    monkeypatch.setattr(train, "TRAIN_CACHE", model_dir / ".train_cache.json")
+    monkeypatch.setattr(train, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(train, "TRAIN_LOG", tmp_path / "train.logs")
+    (tmp_path / "processed").mkdir()
+    return tmp_path
+
+
+def _history(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.integers(0, 20, (n_rows, 3)), columns=["rtx3060", "rtx3070", "rx6700"])
+
+
+def _prepare(wide, feats):
+    return train.infer_X_y(wide, extra=feats)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".feather"])
+def test_batches_match_in_memory_features(tmp_path, suffix):
+    if suffix != ".csv":
+        pytest.importorskip("pyarrow")
+    df = _history(500)
+    path = tmp_path / f"sales_processed_1{suffix}"
+    preprocessed._save_processed(df, path, suffix.lstrip("."))
+    index = pd.date_range("2025-01-01", periods=500, freq="min")
+    preprocessed._save_timestamps(index, path)
+    ts = path.with_name(path.name + ".ts")
+
+    X, y = train.infer_X_y(df, extra=train.time_features(df, index))
+    batches = list(external.BatchStream([path], 64, _prepare, timestamps=[ts]))
+    assert external.count_rows(path) == 500 and len(batches) == 8
+    np.testing.assert_array_equal(pd.concat([b[0] for b in batches]).to_numpy(), X.to_numpy())
+    assert list(batches[0][0].columns) == list(X.columns)
+
+    # Lignes [start, stop) : mêmes valeurs que la tranche en mémoire
+    part = list(external.BatchStream([path], 64, _prepare, timestamps=[ts], start=130, stop=300))
+    np.testing.assert_array_equal(pd.concat([b[1] for b in part]).to_numpy(), y.iloc[130:300])
+
+
+def test_streaming_metrics_match_compute_metrics():
+    rng = np.random.default_rng(1)
+    y_true, y_pred = rng.normal(10, 3, 1000), rng.normal(10, 3, 1000)
+    metrics = external.StreamingMetrics()
+    for lo in range(0, 1000, 97):
+        metrics.update(y_true[lo:lo + 97], y_pred[lo:lo + 97])
+    expected = train.compute_metrics(y_true, y_pred)
+    assert metrics.result() == pytest.approx(expected, rel=1e-9)
+
+
+def test_external_memory_matches_in_memory_split(workdir):
+    proc = workdir / "processed"
+    history = _history(600)
+    first, second = proc / "sales_processed_a.csv", proc / "sales_processed_b.csv"
+    history.iloc[:250].to_csv(first, index=False)
+    history.iloc[250:].to_csv(second, index=False)
+
+    args = ["--processed-dir", str(proc), "--external-memory", "--batch-rows", "100",
+            "--partitions", str(first), str(second)]
+    assert train.main(args) == 0
+    state = train.load_train_state()
+    (entry,) = train.load_train_cache().values()
+    # Métriques accumulées = celles du modèle sauvegardé sur les 20 % finaux
+    X, y = train.infer_X_y(history, extra=train.time_features(history))
+    model = train.load_model(state["model_path"])
+    expected = train.compute_metrics(y.iloc[480:], model.predict(X.iloc[480:]))
+    assert entry["metrics"] == pytest.approx(expected, rel=1e-6)
+    assert state["features"] == list(X.columns) and state["n_rows"] == 600
+    assert list((workdir / "model" / ".extmem").iterdir()) == []  # cache de pages supprimé
+
+    # Même données : cache HIT, sans réentraînement
+    assert train.main(args) == 0
+    assert len(train.load_train_cache()) == 1
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import features
+import preprocessed
+import train
+
+HEADER = "timestamp,model,sales\n"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Redirige dossiers, point de reprise, modèles et logs vers un dossier temporaire."""
+    proc_dir = tmp_path / "processed"
+    monkeypatch.setattr(preprocessed, "PROC_DIR", proc_dir)
+    monkeypatch.setattr(preprocessed, "CHECKPOINT_FILE", proc_dir / ".checkpoint.json")
+    monkeypatch.setattr(preprocessed, "LOG_FILE", tmp_path / "preprocessed.logs")
+    monkeypatch.setattr(preprocessed, "RAW_MANIFEST", tmp_path / "manifests" / "latest.json")
+    model_dir = tmp_path / "model"
+    monkeypatch.setattr(train, "MODEL_DIR", model_dir)
+    monkeypatch.setattr(train, "TRAIN_STATE", model_dir / ".train_state.json")
+    monkeypatch.setattr(train, "TRAIN_CACHE", model_dir / ".train_cache.json")
+    monkeypatch.setattr(train, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(train, "TRAIN_LOG", tmp_path / "train.logs")
+    return tmp_path
+
+
+def test_lag_and_rolling_match_naive_past_only():
+    wide = pd.DataFrame({"rtx3060": [3, 0, 5, 1, 4, 2], "rx6700": [1, 1, 0, 2, 0, 7]})
+    feats = features.lag_features(wide, lags=(1, 2), windows=(3,))
+
+    for col in wide.columns:
+        values = wide[col].tolist()
+        for i in range(len(values)):
+            lag2 = values[i - 2] if i >= 2 else np.nan
+            past = values[max(0, i - 3):i]
+            roll = np.mean(past) if past else np.nan
+            np.testing.assert_equal(feats[f"{col}_lag2"].iloc[i], np.float32(lag2))
+            np.testing.assert_allclose(feats[f"{col}_roll3"].iloc[i], roll, equal_nan=True)
+    # La valeur courante (cible potentielle) n'entre dans aucune variable
+    assert not (feats.columns.str.endswith("_lag0")).any()
+    assert (feats.dtypes == np.float32).all()
+
+
+def test_timestamps_sidecar_incremental_matches_full(workdir):
+    raw = workdir / "sales.csv"
+    raw.write_text(HEADER
+                   + "2025-01-01T00:00:00Z,rtx3060,3\n"
+                   + "2025-01-01T00:01:00Z,rtx3060,1\n")
+    assert preprocessed.main(["--input", str(raw), "--output", str(workdir / "p1.csv"),
+                              "--full-rebuild"]) == 0
+
+    with open(raw, "a") as fh:
+        fh.write("2025-01-01T00:01:00Z,rtx3060,2\n")
+        fh.write("2025-01-02T13:45:00Z,rtx3060,4\n")
+    assert preprocessed.main(["--input", str(raw), "--output", str(workdir / "p2.csv")]) == 0
+    assert preprocessed.main(["--input", str(raw), "--output", str(workdir / "p3.csv"),
+                              "--full-rebuild"]) == 0
+
+    incremental = (workdir / "p2.csv.ts").read_bytes()
+    assert incremental == (workdir / "p3.csv.ts").read_bytes()
+    assert "timestamp" not in pd.read_csv(workdir / "p2.csv").columns
+
+    ts = train.load_timestamps(workdir / "p2.csv", 3)
+    assert [t.isoformat() for t in ts] == ["2025-01-01T00:00:00+00:00",
+                                           "2025-01-01T00:01:00+00:00",
+                                           "2025-01-02T13:45:00+00:00"]
+    # Fichier annexe désaligné : ignoré
+    assert train.load_timestamps(workdir / "p2.csv", 4) is None
+
+
+def test_chronological_splits_never_test_on_the_past():
+    (train_idx, test_idx), = train.time_splits(100)
+    assert train_idx.max() < test_idx.min() and len(test_idx) == 20
+
+    folds = train.time_splits(100, cv_splits=4)
+    assert len(folds) == 4
+    for train_idx, test_idx in folds:
+        assert train_idx.max() < test_idx.min()
+
+
+def test_train_uses_time_features(workdir):
+    rng = np.random.default_rng(0)
+    proc = workdir / "processed"
+    proc.mkdir()
+    df = pd.DataFrame(rng.integers(0, 20, (120, 2)), columns=["rtx3060", "rx6700"])
+    df.to_csv(proc / "sales_processed_1.csv", index=False)
+    index = pd.date_range("2025-01-01", periods=120, freq="min")
+    preprocessed._save_timestamps(index, proc / "sales_processed_1.csv")
+
+    assert train.main(["--processed-dir", str(proc), "--cv-splits", "3"]) == 0
+    columns = train.load_train_state()["features"]
+    assert "rx6700" in columns and "rtx3060_lag1" in columns and "hour" in columns
+    assert "rtx3060" not in columns
+
+    assert train.main(["--processed-dir", str(proc), "--no-time-features", "--no-cache"]) == 0
+    assert train.load_train_state()["features"] == ["rx6700"]
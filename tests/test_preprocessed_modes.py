@@ -0,0 +1,218 @@
+import json
+
+import pandas as pd
+import pytest
+
+import catalog
+import preprocessed
+import validation
+
+HEADER = "timestamp,model,sales\n"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Redirige les dossiers et le point de reprise vers un dossier temporaire."""
+    proc_dir = tmp_path / "processed"
+    monkeypatch.setattr(preprocessed, "PROC_DIR", proc_dir)
+    monkeypatch.setattr(preprocessed, "CHECKPOINT_FILE", proc_dir / ".checkpoint.json")
+    monkeypatch.setattr(preprocessed, "LOG_FILE", tmp_path / "preprocessed.logs")
+    monkeypatch.setattr(preprocessed, "RAW_MANIFEST", tmp_path / "manifests" / "latest.json")
+    return tmp_path
+
+
+def _run(raw, out, *extra):
+    assert preprocessed.main(["--input", str(raw), "--output", str(out), *extra]) == 0
+    return pd.read_csv(out)
+
+
+def test_incremental_matches_full_rebuild(workdir):
+    raw = workdir / "sales.csv"
+    raw.write_text(
+        HEADER
+        + "2025-01-01T00:00:00Z,rtx3060,3\n"
+        + "2025-01-01T00:00:00Z,rx6700,1.4\n"
+        + "2025-01-01T00:01:00Z,rtx3060,-2\n"
+        + "2025-01-01T00:01:00Z,rx6700,1.4\n"
+    )
+    _run(raw, workdir / "p1.csv", "--full-rebuild")
+    assert preprocessed.CHECKPOINT_FILE.exists()
+
+    # Lot suivant : même timestamp que la dernière ligne, puis nouvelles minutes
+    with open(raw, "a") as fh:
+        fh.write("\n2025-01-01T00:01:00Z, RX6700 ,1.4\n")
+        fh.write("2025-01-01T00:02:00Z,rtx3060,\n")
+        fh.write("2025-01-01T00:03:00Z,rtx3060,7\n")
+    incremental = _run(raw, workdir / "p2.csv")
+    full = _run(raw, workdir / "p3.csv", "--full-rebuild")
+
+    pd.testing.assert_frame_equal(incremental, full)
+    assert len(full) == 4
+    assert full["rx6700"].tolist() == [1, 3, 0, 0]
+
+
+def test_incremental_extends_previous_output_in_place(workdir):
+    raw = workdir / "sales.csv"
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n")
+    first = workdir / "p1.csv"
+    _run(raw, first, "--full-rebuild")
+    inode = first.stat().st_ino
+
+    with open(raw, "a") as fh:
+        fh.write("2025-01-01T00:01:00Z,rtx3060,5\n")
+    second = workdir / "p2.csv"
+    assert _run(raw, second)["rtx3060"].tolist() == [3, 5]
+
+    # Sortie glissante : renommée et prolongée, jamais copiée
+    assert second.stat().st_ino == inode
+    assert sorted(p.name for p in workdir.glob("p*.csv*")) == [
+        "p2.csv", "p2.csv.ts", "p2.csv.validation.json"]
+    assert validation.read_report(second)["rows"] == 2
+    # L'entrée de l'ancien nom est retirée du catalogue (toujours à jour)
+    assert [r["path"] for r in catalog.entries_since(workdir, "2025-01-01")] == ["p2.csv"]
+    assert catalog.latest_entry(workdir)["path"] == second
+
+
+def test_incremental_falls_back_on_new_model(workdir):
+    raw = workdir / "sales.csv"
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n")
+    _run(raw, workdir / "p1.csv", "--full-rebuild")
+
+    with open(raw, "a") as fh:
+        fh.write("2025-01-01T00:01:00Z,rtx4090,5\n")
+    incremental = _run(raw, workdir / "p2.csv")
+    full = _run(raw, workdir / "p3.csv", "--full-rebuild")
+
+    pd.testing.assert_frame_equal(incremental, full)
+    assert list(full.columns) == ["rtx3060", "rtx4090"]
+
+
+def test_incremental_falls_back_on_rewritten_raw(workdir):
+    raw = workdir / "sales.csv"
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n")
+    _run(raw, workdir / "p1.csv", "--full-rebuild")
+
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,9\n2025-01-01T00:01:00Z,rtx3060,1\n")
+    incremental = _run(raw, workdir / "p2.csv")
+
+    assert incremental["rtx3060"].tolist() == [9, 1]
+
+
+def test_manifest_bounds_latest_snapshot(workdir):
+    store = workdir / "sales_store.csv"
+    store.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n")
+    published = store.stat().st_size
+    # Lot en cours d'écriture, pas encore publié dans le manifeste
+    with open(store, "a") as fh:
+        fh.write("2025-01-01T00:01:00Z,rtx3060,5\n")
+    preprocessed.RAW_MANIFEST.parent.mkdir()
+    preprocessed.RAW_MANIFEST.write_text(json.dumps({"path": str(store), "bytes": published}))
+
+    assert preprocessed._find_latest_raw_csv() == store
+    out = workdir / "p1.csv"
+    assert preprocessed.main(["--output", str(out)]) == 0
+    assert pd.read_csv(out)["rtx3060"].tolist() == [3]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_incremental_columnar_matches_full_rebuild(workdir, fmt):
+    pytest.importorskip("pyarrow")
+    import train
+
+    raw = workdir / "sales.csv"
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n2025-01-01T00:00:00Z,rx6700,2\n")
+    first = workdir / f"sales_processed_1.{fmt}"
+    assert preprocessed.main(["--input", str(raw), "--output", str(first), "--full-rebuild"]) == 0
+
+    with open(raw, "a") as fh:
+        fh.write("2025-01-01T00:00:00Z,rx6700,2\n2025-01-01T00:01:00Z,rtx3060,4\n")
+    incremental = workdir / f"sales_processed_2.{fmt}"
+    full = workdir / f"sales_processed_3.{fmt}"
+    assert preprocessed.main(["--input", str(raw), "--output", str(incremental)]) == 0
+    assert preprocessed.main(["--input", str(raw), "--output", str(full), "--full-rebuild"]) == 0
+
+    df = train.load_processed(incremental)
+    pd.testing.assert_frame_equal(df, train.load_processed(full))
+    assert (df.dtypes == "int64").all()
+    assert df.to_dict("list") == {"rtx3060": [3, 4], "rx6700": [4, 0]}
+    # Réécriture complète : la sortie précédente est conservée, intacte
+    assert train.load_processed(first).to_dict("list") == {"rtx3060": [3], "rx6700": [2]}
+    assert validation.read_report(first)["rows"] == 1
+    assert train.find_latest_processed_csv(workdir) == full
+
+
+@pytest.mark.parametrize("chunksize", [1, 3, 1000])
+def test_streaming_matches_in_memory(workdir, chunksize):
+    raw = workdir / "sales.csv"
+    raw.write_text(
+        HEADER
+        + "2025-01-01T00:00:00Z,rtx3060,3\n"
+        + "2025-01-01T00:00:00Z, RTX3060 ,2\n"
+        + "2025-01-01T00:00:00Z,,5\n"
+        + "not-a-date,rx6700,9\n"
+        + "2025-01-01T00:01:00Z,rx6700,-4\n"
+        + "2025-01-01T00:01:00Z,rx6700,x\n"
+        + "2025-01-01T00:00:00Z,rx6700,1\n"
+        + "2025-01-01T00:02:00Z,rtx3070,6\n"
+    )
+    streamed = _run(raw, workdir / "p1.csv", "--full-rebuild", "--chunksize", str(chunksize))
+    in_memory = _run(raw, workdir / "p2.csv", "--full-rebuild")
+
+    pd.testing.assert_frame_equal(streamed, in_memory)
+    assert in_memory.to_dict("list") == {
+        "rtx3060": [5, 0, 0], "rtx3070": [0, 0, 6], "rx6700": [1, 0, 0],
+    }
+
+
+def test_check_reports_pending_bytes_without_writing(workdir, caplog):
+    caplog.set_level("INFO")
+    raw = workdir / "sales.csv"
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n")
+    _run(raw, workdir / "p1.csv", "--full-rebuild")
+    with open(raw, "a") as fh:
+        fh.write("2025-01-01T00:01:00Z,rtx3060,5\n")
+
+    checkpoint = preprocessed.CHECKPOINT_FILE.read_bytes()
+    out = workdir / "p2.csv"
+    assert preprocessed.main(["--input", str(raw), "--output", str(out), "--check"]) == 0
+    assert "31 octets bruts nouveaux" in caplog.text
+    assert not out.exists()
+    assert preprocessed.CHECKPOINT_FILE.read_bytes() == checkpoint
+
+    bad = workdir / "bad.csv"
+    bad.write_text("timestamp,sales\n2025-01-01T00:00:00Z,3\n")
+    assert preprocessed.main(["--input", str(bad), "--dry-run"]) == 2
+
+
+@pytest.mark.parametrize("workers,freq", [(1, "D"), (2, "D"), (2, "6h")])
+def test_workers_match_single_process(workdir, workers, freq):
+    raw = workdir / "sales.csv"
+    raw.write_text(
+        HEADER
+        + "2025-01-01T23:59:00Z,rtx3060,3\n"
+        + "2025-01-01T23:59:00Z, RTX3060 ,2\n"
+        + "not-a-date,rtx3060,9\n"
+        + "2025-01-02T00:00:00Z,rx6700,-1\n"
+        + "2025-01-03T12:00:00Z,rtx3070,6\n"
+        + "2025-01-02T07:00:00Z,rtx3060,\n"
+        + "2025-01-03T12:00:00Z,rx6700,1.6\n"
+    )
+    split = _run(raw, workdir / "p1.csv", "--full-rebuild", "--workers", str(workers),
+                 "--partition-freq", freq)
+    single = _run(raw, workdir / "p2.csv", "--full-rebuild")
+
+    pd.testing.assert_frame_equal(split, single)
+    assert single.to_dict("list") == {
+        "rtx3060": [5, 0, 0, 0], "rtx3070": [0, 0, 0, 6], "rx6700": [0, 0, 0, 2],
+    }
+    assert (workdir / "p1.csv.ts").read_text() == (workdir / "p2.csv.ts").read_text()
+    reports = [validation.read_report(workdir / f"p{i}.csv") for i in (1, 2)]
+    assert [(r["ok"], r["rows"], r["checks"]) for r in reports] == [
+        (True, 4, reports[1]["checks"])] * 2
+
+
+def test_workers_rejects_chunksize(workdir):
+    with pytest.raises(SystemExit):
+        preprocessed.main(["--workers", "2", "--chunksize", "10"])
+    with pytest.raises(SystemExit):
+        preprocessed.main(["--workers", "2", "--partition-freq", "ME"])
@@ -0,0 +1,121 @@
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBRegressor
+
+import serve
+
+FEATURES = ["rtx3070", "rtx3080", "rx6700"]
+
+
+def _fit(seed, n_estimators=5):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.integers(0, 20, (100, 3)), columns=FEATURES)
+    return XGBRegressor(n_estimators=n_estimators, max_depth=2).fit(X, rng.integers(0, 20, 100))
+
+
+@pytest.fixture
+def service(tmp_path):
+    joblib.dump(_fit(0), tmp_path / "model.pkl")
+    holder = serve.ModelHolder(tmp_path)
+    holder.reload_if_changed()
+    batcher = serve.MicroBatcher(holder, max_batch_rows=1024, max_wait_s=0.02)
+    server = serve.make_server(holder, batcher, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(port, payload):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("POST", "/predict", json.dumps(payload))
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read())
+
+
+def test_concurrent_requests_are_micro_batched(service):
+    port = service.server_address[1]
+    rows = [[i, i + 1, i + 2] for i in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda r: _post(port, {"instances": [r]}), rows))
+
+    expected = service.holder.model.predict(np.asarray(rows, dtype=np.float32))
+    assert [status for status, _ in responses] == [200] * len(rows)
+    got = [body["predictions"][0] for _, body in responses]
+    np.testing.assert_allclose(got, expected, rtol=1e-6)
+    assert service.batcher.n_requests == len(rows)
+    assert service.batcher.n_batches < len(rows)
+
+
+def test_named_rows_and_invalid_payload(service):
+    port = service.server_address[1]
+    status, body = _post(port, {"instances": [dict(zip(FEATURES, [1, 2, 3]))]})
+    assert status == 200 and len(body["predictions"]) == 1
+
+    status, body = _post(port, {"instances": [[1, 2]]})
+    assert status == 400
+
+    # Corps JSON valide mais pas un objet : 400, le service continue de répondre
+    for payload in ([[1, 2, 3]], "instances", 3):
+        status, body = _post(port, payload)
+        assert status == 400 and "objet JSON" in body["error"]
+    status, _ = _post(port, {"instances": [[1, 2, 3]]})
+    assert status == 200
+
+
+def test_hot_reload_picks_up_new_model(service, tmp_path):
+    holder = service.holder
+    assert holder.reload_if_changed() is False
+
+    new_path = tmp_path / "model_20250101_0000.pkl"
+    joblib.dump(_fit(1, n_estimators=7), new_path)
+    os.utime(new_path, (1e10, 1e10))
+    assert holder.reload_if_changed() is True
+    assert holder.path == new_path
+
+    status, body = _post(service.server_address[1], {"instances": [[1, 2, 3]]})
+    assert status == 200 and body["model"] == new_path.name
+
+
+def test_batch_revalidates_rows_against_its_model(tmp_path):
+    joblib.dump(_fit(0), tmp_path / "model.pkl")
+    holder = serve.ModelHolder(tmp_path)
+    holder.reload_if_changed()
+    batcher = serve.MicroBatcher(holder, max_batch_rows=1024, max_wait_s=0.0)
+    payload = {"instances": [dict(zip(FEATURES, [1, 2, 3]))]}
+    X = serve.parse_instances(payload, holder.features)
+
+    # Rechargement entre l'arrivée et le batch : colonnes dans un autre ordre
+    rng = np.random.default_rng(2)
+    reordered = FEATURES[::-1]
+    new_model = XGBRegressor(n_estimators=5, max_depth=2).fit(
+        pd.DataFrame(rng.integers(0, 20, (100, 3)), columns=reordered), rng.integers(0, 20, 100))
+    new_path = tmp_path / "model_20250101_0000.pkl"
+    joblib.dump(new_model, new_path)
+    os.utime(new_path, (1e10, 1e10))
+    assert holder.reload_if_changed() is True
+
+    preds, path = batcher.submit(X, FEATURES, payload).result(timeout=5)
+    assert path == new_path
+    np.testing.assert_allclose(preds, new_model.predict(np.asarray([[3, 2, 1]], np.float32)))
+
+    # Lignes positionnelles (ordre de l'ancien modèle) : requête rejetée
+    positional = {"instances": [[1, 2, 3]]}
+    X = serve.parse_instances(positional, FEATURES)
+    with pytest.raises(serve.StaleRequest):
+        batcher.submit(X, FEATURES, positional).result(timeout=5)
+
+    # Corps sans ligne exploitable : rejeté sans arrêter le batcher
+    for payload in ({"instances": []}, {}, None):
+        with pytest.raises(serve.StaleRequest):
+            batcher.submit(X, FEATURES, payload).result(timeout=5)
+    X = serve.parse_instances({"instances": [[3, 2, 1]]}, holder.features)
+    assert batcher.submit(X, holder.features).result(timeout=5)[1] == new_path
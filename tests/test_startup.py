@@ -0,0 +1,17 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+DEFERRED = ("xgboost", "sklearn", "joblib")
+
+
+@pytest.mark.parametrize("module", ["train", "preprocessed", "forecast"])
+def test_import_defers_heavy_dependencies(module):
+    """Garde-fou du démarrage rapide (--help, --check) : voir benchmarks/bench_startup.py."""
+    code = (f"import sys; sys.path.insert(0, {str(SRC)!r}); import {module}; "
+            f"print(','.join(m for m in {DEFERRED!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
@@ -0,0 +1,242 @@
+import json
+import logging
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import train
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Redirige modèles, état d'entraînement et logs vers un dossier temporaire."""
+    model_dir = tmp_path / "model"
+    monkeypatch.setattr(train, "MODEL_DIR", model_dir)
+    monkeypatch.setattr(train, "TRAIN_STATE", model_dir / ".train_state.json")
+    monkeypatch.setattr(train, "TRAIN_CACHE", model_dir / ".train_cache.json")
+    monkeypatch.setattr(train, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(train, "TRAIN_LOG", tmp_path / "train.logs")
+    (tmp_path / "processed").mkdir()
+    return tmp_path
+
+
+def _write_processed(workdir, df, name):
+    df.to_csv(workdir / "processed" / f"sales_processed_{name}.csv", index=False)
+
+
+def _train(workdir, *extra):
+    assert train.main(["--processed-dir", str(workdir / "processed"), *extra]) == 0
+    state = train.load_train_state()
+    return state, joblib.load(state["model_path"])
+
+
+def _history(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.integers(0, 20, (n_rows, 3)), columns=["rtx3060", "rtx3070", "rx6700"])
+
+
+def test_continue_boosts_previous_model_on_new_rows(workdir, caplog):
+    caplog.set_level(logging.INFO)
+    history = _history(300)
+    _write_processed(workdir, history.iloc[:250], "1")
+    state, _ = _train(workdir, "--train-mode", "continue")
+    assert state["mode"] == "full"
+
+    _write_processed(workdir, history, "2")
+    state, model = _train(workdir, "--train-mode", "continue", "--extra-rounds", "10",
+                          "--drift-ratio", "100")
+    assert state["mode"] == "continue"
+    assert state["n_rows"] == 300
+    assert state["runs_since_full"] == 1
+    assert model.get_booster().num_boosted_rounds() == 310
+    assert "temps gagné" in caplog.text
+
+
+def test_continue_falls_back_to_full_retrain(workdir):
+    history = _history(300)
+    _write_processed(workdir, history.iloc[:250], "1")
+    _train(workdir)
+
+    # Réentraînement périodique forcé
+    _write_processed(workdir, history, "2")
+    state, model = _train(workdir, "--train-mode", "continue", "--full-every", "0")
+    assert state["mode"] == "full"
+    assert model.get_booster().num_boosted_rounds() == 300
+
+    # Colonnes explicatives modifiées
+    _write_processed(workdir, history.assign(rtx3090=1), "3")
+    state, _ = _train(workdir, "--train-mode", "continue", "--drift-ratio", "100")
+    assert state["mode"] == "full"
+
+
+def test_continue_without_new_rows_keeps_previous_model(workdir):
+    history = _history(250)
+    _write_processed(workdir, history, "1")
+    state, _ = _train(workdir, "--train-mode", "continue")
+    first_model, trained_at = state["model_path"], state["trained_at"]
+
+    # Mêmes données (cache désactivé), puis dernière ligne refusionnée
+    _write_processed(workdir, history, "2")
+    state, model = _train(workdir, "--train-mode", "continue", "--no-cache")
+    assert (state["mode"], state["noop_runs"]) == ("noop", 1)
+    history.iloc[-1] += 1
+    _write_processed(workdir, history, "3")
+    state, model = _train(workdir, "--train-mode", "continue")
+    assert (state["mode"], state["noop_runs"]) == ("noop", 2)
+
+    assert (state["model_path"], state["trained_at"]) == (first_model, trained_at)
+    assert state["runs_since_full"] == 0
+    assert model.get_booster().num_boosted_rounds() == 300
+    assert sorted(p.name for p in train.MODEL_DIR.glob("*.pkl")) == ["model.pkl"]
+
+
+def test_window_trains_on_window_without_previous_state(workdir, monkeypatch):
+    fitted = []
+    train_and_eval = train.train_and_eval
+
+    def spy(X, y, **kwargs):
+        fitted.append(len(X))
+        return train_and_eval(X, y, **kwargs)
+
+    monkeypatch.setattr(train, "train_and_eval", spy)
+    history = _history(200)
+    _write_processed(workdir, history, "1")
+    state, _ = _train(workdir, "--train-mode", "window", "--window", "50")
+    assert (state["mode"], state["full_rows"]) == ("window", 50)
+
+    # Colonnes modifiées : toujours la fenêtre, jamais tout l'historique
+    _write_processed(workdir, history.assign(rtx3090=1), "2")
+    state, _ = _train(workdir, "--train-mode", "window", "--window", "50")
+    assert state["mode"] == "window"
+    assert fitted == [50, 50]
+
+
+def test_cache_hit_skips_training(workdir, caplog):
+    caplog.set_level(logging.INFO)
+    history = _history(200)
+    _write_processed(workdir, history, "1")
+    state, _ = _train(workdir)
+    first_model = state["model_path"]
+
+    # Même contenu sous un autre nom de fichier : aucun nouvel artefact
+    _write_processed(workdir, history, "2")
+    state, _ = _train(workdir)
+    assert state["model_path"] == first_model
+    assert "HIT" in caplog.text
+    assert sorted(p.name for p in train.MODEL_DIR.glob("*.pkl")) == ["model.pkl"]
+
+    # Contenu modifié : nouvel entraînement
+    _write_processed(workdir, _history(200, seed=1), "3")
+    state, _ = _train(workdir)
+    assert state["model_path"] != first_model
+
+
+def test_cache_key_includes_model_format(workdir, caplog):
+    caplog.set_level(logging.INFO)
+    processed = str(workdir / "processed")
+    _write_processed(workdir, _history(200), "1")
+    _train(workdir)
+
+    # Mêmes données, autre format : pas de HIT sur l'artefact pickle
+    for fmt in (["json"], ["json", "--model-compress", "1"]):
+        assert train.main(["--processed-dir", processed, "--model-format", *fmt]) == 0
+        assert "HIT" not in caplog.text
+    json_path = train.load_train_state()["model_path"]
+    assert json_path.endswith(".json.gz")
+
+    caplog.clear()
+    assert train.main(["--processed-dir", processed, "--model-format", "json",
+                       "--model-compress", "1"]) == 0
+    assert "HIT" in caplog.text and train.load_train_state()["model_path"] == json_path
+
+
+def test_cache_hit_rebuilds_pickle_from_native_artifact(workdir, caplog):
+    caplog.set_level(logging.INFO)
+    processed = str(workdir / "processed")
+    _write_processed(workdir, _history(200), "1")
+    _train(workdir)
+    assert train.main(["--processed-dir", processed, "--model-format", "ubj"]) == 0
+    standard = train.MODEL_DIR / "model.pkl"
+    standard.unlink()
+
+    # HIT sur l'artefact natif : model.pkl redevient un pickle, pas un lien
+    caplog.clear()
+    assert train.main(["--processed-dir", processed, "--model-format", "ubj"]) == 0
+    assert "HIT" in caplog.text
+    assert not standard.is_symlink()
+    assert joblib.load(standard).get_booster().num_boosted_rounds() == 300
+
+
+def test_cache_eviction_keeps_most_recent_and_protected(tmp_path):
+    cache = {}
+    for i in range(4):
+        path = tmp_path / f"model_{i}.pkl"
+        path.write_bytes(b"x")
+        cache[f"k{i}"] = {"model_path": str(path), "last_used": f"2025-01-01T00:0{i}:00"}
+
+    removed = train.evict_train_cache(cache, keep=2, protected={tmp_path / "model_0.pkl"})
+
+    assert sorted(cache) == ["k2", "k3"]
+    assert removed == [tmp_path / "model_1.pkl"]
+    remaining = sorted(p.name for p in tmp_path.iterdir())
+    assert remaining == ["model_0.pkl", "model_2.pkl", "model_3.pkl"]
+
+
+def test_multi_target_search_saves_best_model_per_target(workdir, monkeypatch):
+    monkeypatch.setattr(train, "TARGETS_DIR", workdir / "model" / "targets")
+    monkeypatch.setattr(train, "SEARCH_GRID", {"max_depth": [2, 3], "n_estimators": [5]})
+    _write_processed(workdir, _history(120), "1")
+
+    assert train.main(["--processed-dir", str(workdir / "processed"), "--targets", "all",
+                       "--search", "grid", "--workers", "2", "--serial-baseline"]) == 0
+
+    summary = json.loads((train.TARGETS_DIR / "search_summary.json").read_text())
+    assert sorted(summary["best"]) == ["rtx3060", "rtx3070", "rx6700"]
+    assert len(summary["results"]) == 6
+    # Accélération = série mesurée / parallèle, pas une somme de temps CPU
+    assert summary["job_seconds"] == pytest.approx(sum(r["seconds"] for r in summary["results"]))
+    assert summary["speedup"] == pytest.approx(
+        summary["serial_wall_seconds"] / summary["wall_seconds"])
+    for target, best in summary["best"].items():
+        model = joblib.load(best["model_path"])
+        assert target not in model.get_booster().feature_names
+        rmses = [r["metrics"]["rmse"] for r in summary["results"] if r["target"] == target]
+        assert best["metrics"]["rmse"] == min(rmses)
+
+
+def test_check_validates_inputs_without_training(workdir):
+    processed = str(workdir / "processed")
+    assert train.main(["--processed-dir", processed, "--check"]) == 2
+
+    _write_processed(workdir, _history(50), "1")
+    assert train.main(["--processed-dir", processed, "--dry-run"]) == 0
+    assert train.main(["--processed-dir", processed, "--check", "--targets", "rtx4090"]) == 2
+    assert not train.MODEL_DIR.exists()
+
+
+def test_float32_matrix_is_one_block_split_by_views(monkeypatch):
+    df = _history(100)
+    feats = pd.DataFrame({"rtx3060_lag1": df["rtx3060"].shift(1)}, dtype=np.float32)
+    X, y = train.infer_X_y(df, extra=feats)
+    assert list(X.columns) == ["rtx3070", "rx6700", "rtx3060_lag1"]
+    assert (X.dtypes == np.float32).all() and y.dtype == np.float32
+    data = X.to_numpy()
+    assert np.shares_memory(data, X.to_numpy(dtype=np.float32))  # un seul bloc, sans copie
+    np.testing.assert_array_equal(data[:, 1], df["rx6700"])
+
+    # Les plis chronologiques sont des vues du bloc transmises à XGBoost
+    seen = []
+    fit = train.build_model().__class__.fit
+
+    def spy(self, X_fit, y_fit, **kwargs):
+        seen.append(X_fit)
+        return fit(self, X_fit, y_fit, **kwargs)
+
+    monkeypatch.setattr(train.build_model().__class__, "fit", spy)
+    model, metrics = train.train_and_eval(X, y, params={"n_estimators": 5}, cv_splits=2)
+    assert len(seen) == 2 and all(np.shares_memory(a, data) for a in seen)
+    assert model.get_booster().feature_names == list(X.columns)
+    assert model.get_params()["tree_method"] == "hist"
+    assert model.predict(X.iloc[:3]).shape == (3,)
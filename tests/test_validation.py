@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessed
+import validation
+
+HEADER = "timestamp,model,sales\n"
+
+
+def test_raw_checks_in_one_pass():
+    df = pd.DataFrame({"timestamp": ["t"] * 5, "model": ["a"] * 5,
+                       "sales": [1.0, np.nan, 2.5, -3.0, 4.0]})
+    report = validation.validate_frame(df, "raw")
+    counts = {name: c["count"] for name, c in report["checks"].items()}
+    assert not report["ok"]
+    assert counts == {"schema": 0, "numeric": 0, "no_nan": 1, "integer": 1, "non_negative": 1}
+
+    clean = df.assign(sales=[1.0, 0.0, 2.0, 3.0, 4.0], extra=1)
+    report = validation.validate_frame(clean, "raw")
+    assert not report["checks"]["schema"]["ok"]
+    assert report["checks"]["non_negative"]["ok"] and report["checks"]["integer"]["ok"]
+
+
+def test_processed_checks_use_dtype_metadata():
+    ok = pd.DataFrame({"rtx3060": np.arange(4, dtype=np.int64), "rx6700": [0, 1, 2, 3]})
+    report = validation.validate_frame(ok)
+    assert report["ok"] and report["rows"] == 4
+
+    bad = ok.assign(rx6700=[0.0, 1.5, np.nan, -1.0], timestamp="t")
+    checks = validation.validate_frame(bad)["checks"]
+    assert not checks["no_timestamp"]["ok"]
+    assert checks["integer_dtype"]["columns"] == ["rx6700"]
+    assert (checks["no_nan"]["count"], checks["integer"]["count"],
+            checks["non_negative"]["count"]) == (1, 1, 1)
+
+
+def test_parquet_validated_from_metadata(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "sales_processed_1.parquet"
+    df = pd.DataFrame({"rtx3060": [1, 2, 3, 4], "rx6700": [0, 1, 1, 2]})
+    df.to_parquet(path)
+    monkeypatch.setattr(pd, "read_parquet", pytest.fail)  # aucune lecture des données
+    report = validation.validate_file(path)
+    assert report["source"] == "metadata" and report["rows"] == 4 and report["ok"]
+
+    # Négatifs : valeurs comptées dans les seuls groupes de lignes concernés
+    df.assign(rx6700=[-1, -4, 1, -2]).to_parquet(path, row_group_size=2)
+    report = validation.validate_file(path)
+    assert report["source"] == "metadata+row_groups"
+    assert not report["ok"] and report["checks"]["non_negative"]["count"] == 3
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    proc_dir = tmp_path / "processed"
+    monkeypatch.setattr(preprocessed, "PROC_DIR", proc_dir)
+    monkeypatch.setattr(preprocessed, "CHECKPOINT_FILE", proc_dir / ".checkpoint.json")
+    monkeypatch.setattr(preprocessed, "LOG_FILE", tmp_path / "preprocessed.logs")
+    monkeypatch.setattr(preprocessed, "RAW_MANIFEST", tmp_path / "manifests" / "latest.json")
+    return tmp_path
+
+
+def test_preprocessed_writes_current_report(workdir):
+    raw = workdir / "sales.csv"
+    raw.write_text(HEADER + "2025-01-01T00:00:00Z,rtx3060,3\n2025-01-01T00:01:00Z,rtx3060,\n")
+    out1, out2 = workdir / "p1.csv", workdir / "p2.csv"
+    assert preprocessed.main(["--input", str(raw), "--output", str(out1), "--full-rebuild"]) == 0
+    report = validation.read_report(out1)
+    assert report["ok"] and report["source"] == "data" and report["rows"] == 2
+
+    # Incrémental : rapport prolongé sans relire la sortie, identique au recalcul
+    with open(raw, "a") as fh:
+        fh.write("2025-01-01T00:01:00Z,rtx3060,2\n2025-01-01T00:02:00Z,rtx3060,4\n")
+    assert preprocessed.main(["--input", str(raw), "--output", str(out2)]) == 0
+    report = validation.read_report(out2)
+    assert report["source"] == "incremental"
+    full = validation.validate_file(out2)
+    assert (report["ok"], report["rows"], report["checks"]) == (
+        full["ok"], full["rows"], full["checks"])
+
+    # Fichier modifié après coup : le rapport ne le décrit plus
+    with open(out2, "a") as fh:
+        fh.write("-1\n")
+    assert validation.read_report(out2) is None
+    assert validation.main([str(out2)]) == 1